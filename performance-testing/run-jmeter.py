@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+# runs paymentHubEE.jmx headless with the thread counts given on the command line, then summarises
+# the JTL results per sampler and optionally compares them with a stored baseline run
+#
+# usage:
+#   run-jmeter.py --threads 50 --ramp-up 30 --loops 20 --output-dir results/run1
+#   run-jmeter.py --thread-group "Operations App APIs" --duration 300 --output-dir results/run2 --baseline results/run1/summary.json
+#   run-jmeter.py --analyze results/run2/results.jtl --baseline results/run1/summary.json --diff-json diff.json
+#
+# JTL files (CSV or XML) are read one sample at a time, so their size does not matter
+import argparse
+import collections
+import csv
+import json
+import os
+import shutil
+import subprocess
+import sys
+import xml.etree.ElementTree as ElementTree
+
+# --- Configuration ---
+TEST_PLAN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "paymentHubEE.jmx")
+PERCENTILES = (0.5, 0.9, 0.95, 0.99)
+
+# Properties passed to JMeter so the JTL is CSV with the fields the summary needs
+JTL_PROPERTIES = {
+    "jmeter.save.saveservice.output_format": "csv",
+    "jmeter.save.saveservice.print_field_names": "true",
+    "jmeter.save.saveservice.timestamp_format": "ms",
+    "jmeter.save.saveservice.latency": "true",
+    "jmeter.save.saveservice.connect_time": "true",
+    "jmeter.save.saveservice.bytes": "true",
+    "jmeter.save.saveservice.response_data": "false",
+    "jmeter.save.saveservice.samplerData": "false",
+}
+
+# Metrics compared against the baseline; True when a higher value is worse
+DIFF_METRICS = {"p50_ms": True, "p90_ms": True, "p99_ms": True, "mean_ms": True,
+                "throughput": False, "error_rate": True}
+DEFAULT_MAX_REGRESSION = 0.10 # Relative change that counts as a regression
+ERROR_RATE_TOLERANCE = 0.01 # Absolute error-rate increase that counts as a regression
+
+
+# --- Test plan preparation ---
+def prepare_plan(source, destination, thread_groups=None, threads=None, ramp_up=None, loops=None, duration=None,
+                 keep_listeners=False):
+    """
+    Writes a copy of the test plan with the requested thread group settings. thread_groups lists
+    the groups to run (others are disabled; None keeps the plan's own enabled flags). GUI
+    listeners such as View Results Tree are disabled unless keep_listeners is set, since they
+    only cost memory in a headless run. Returns the names of the thread groups that will run.
+    """
+    tree = ElementTree.parse(source)
+    enabled_groups = []
+    for group in tree.iter("ThreadGroup"):
+        name = group.get("testname", "").strip()
+        if thread_groups is not None:
+            group.set("enabled", "true" if name in thread_groups else "false")
+        if group.get("enabled", "true") != "true":
+            continue
+        enabled_groups.append(name)
+        if threads is not None:
+            _set_prop(group, "intProp", "ThreadGroup.num_threads", threads)
+        if ramp_up is not None:
+            _set_prop(group, "intProp", "ThreadGroup.ramp_time", ramp_up)
+        controller = group.find("elementProp[@name='ThreadGroup.main_controller']")
+        if loops is not None and controller is not None:
+            _set_prop(controller, "stringProp", "LoopController.loops", loops)
+        if duration is not None:
+            # Run for duration seconds, looping as often as needed
+            _set_prop(group, "boolProp", "ThreadGroup.scheduler", "true")
+            _set_prop(group, "stringProp", "ThreadGroup.duration", duration)
+            if loops is None and controller is not None:
+                _set_prop(controller, "stringProp", "LoopController.loops", -1)
+    if not keep_listeners:
+        for collector in tree.iter("ResultCollector"):
+            collector.set("enabled", "false")
+    tree.write(destination, encoding="UTF-8", xml_declaration=True)
+    return enabled_groups
+
+
+def _set_prop(element, tag, name, value):
+    prop = element.find(f"*[@name='{name}']")
+    if prop is None:
+        prop = ElementTree.SubElement(element, tag, {"name": name})
+    prop.text = str(value).lower() if isinstance(value, bool) else str(value)
+
+
+def find_jmeter(path=None):
+    """Returns the jmeter executable: path, $JMETER_HOME/bin/jmeter or jmeter on PATH."""
+    if path:
+        return path
+    if os.environ.get("JMETER_HOME"):
+        return os.path.join(os.environ["JMETER_HOME"], "bin", "jmeter")
+    jmeter = shutil.which("jmeter")
+    if jmeter is None:
+        raise FileNotFoundError("jmeter not found; install Apache JMeter 5.x, set JMETER_HOME or pass --jmeter")
+    return jmeter
+
+
+def run_jmeter(jmeter, plan, jtl_path, log_path, properties=None):
+    """Runs JMeter in non-GUI mode. Returns its exit code."""
+    command = [jmeter, "-n", "-t", plan, "-l", jtl_path, "-j", log_path]
+    for name, value in {**JTL_PROPERTIES, **(properties or {})}.items():
+        command.append(f"-J{name}={value}")
+    print(f"Running: {' '.join(command)}", file=sys.stderr)
+    return subprocess.call(command)
+
+
+# --- JTL parsing ---
+def read_samples(path):
+    """
+    Yields (label, timestamp ms, elapsed ms, success, bytes) for every sample in a JTL file,
+    CSV (with a header line) or XML, reading it incrementally.
+    """
+    with open(path, "rb") as probe:
+        is_xml = probe.read(64).lstrip().startswith(b"<")
+    if is_xml:
+        yield from _read_xml_samples(path)
+        return
+    with open(path, newline="", encoding="utf-8", errors="replace") as jtl_file:
+        for row in csv.DictReader(jtl_file):
+            try:
+                yield (row["label"], int(row["timeStamp"]), int(row["elapsed"]),
+                       row.get("success", "true").lower() == "true", int(row.get("bytes") or 0))
+            except (AttributeError, KeyError, TypeError, ValueError):
+                continue # truncated last line of a run that was killed
+
+
+def _read_xml_samples(path):
+    depth = 0
+    root = None
+    for event, element in ElementTree.iterparse(path, events=("start", "end")):
+        if root is None:
+            root = element # <testResults>; finished samples are dropped from it below
+        if element.tag not in ("httpSample", "sample"):
+            continue
+        if event == "start":
+            depth += 1
+            continue
+        depth -= 1
+        if depth == 0:
+            # Only top-level samples; sub-results of a transaction are already counted in it
+            yield (element.get("lb", ""), int(element.get("ts", 0)), int(element.get("t", 0)),
+                   element.get("s", "true") == "true", int(element.get("by", 0)))
+            root.clear()
+
+
+class SamplerStats:
+    """
+    Running statistics of one sampler. JMeter reports whole milliseconds, so the latency
+    histogram is a Counter keyed by millisecond: percentiles are exact and memory is bounded by
+    the number of distinct latencies, not the number of samples.
+    """
+
+    def __init__(self):
+        self.latencies = collections.Counter()
+        self.count = 0
+        self.errors = 0
+        self.bytes = 0
+        self.total_ms = 0
+        self.first_start = None
+        self.last_end = None
+
+    def add(self, timestamp, elapsed, success, size):
+        self.latencies[elapsed] += 1
+        self.count += 1
+        self.errors += not success
+        self.bytes += size
+        self.total_ms += elapsed
+        self.first_start = timestamp if self.first_start is None else min(self.first_start, timestamp)
+        end = timestamp + elapsed
+        self.last_end = end if self.last_end is None else max(self.last_end, end)
+
+    def percentile(self, fraction):
+        rank = fraction * self.count
+        seen = 0
+        for latency in sorted(self.latencies):
+            seen += self.latencies[latency]
+            if seen >= rank:
+                return latency
+        return max(self.latencies, default=0)
+
+    def summary(self):
+        window = ((self.last_end - self.first_start) / 1000) if self.count else 0
+        summary = {
+            "count": self.count,
+            "errors": self.errors,
+            "error_rate": self.errors / self.count if self.count else 0.0,
+            "throughput": self.count / window if window > 0 else 0.0,
+            "kb_per_second": self.bytes / 1024 / window if window > 0 else 0.0,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "min_ms": min(self.latencies, default=0),
+            "max_ms": max(self.latencies, default=0),
+        }
+        for fraction in PERCENTILES:
+            summary[f"p{fraction * 100:g}_ms"] = self.percentile(fraction)
+        return summary
+
+
+def summarize_jtl(path):
+    """Returns {label: summary dict} for every sampler in a JTL file, plus a 'TOTAL' entry."""
+    samplers = collections.defaultdict(SamplerStats)
+    total = SamplerStats()
+    for label, timestamp, elapsed, success, size in read_samples(path):
+        samplers[label].add(timestamp, elapsed, success, size)
+        total.add(timestamp, elapsed, success, size)
+    summaries = {label: stats.summary() for label, stats in samplers.items()}
+    summaries["TOTAL"] = total.summary()
+    return summaries
+
+
+def format_summary(summaries):
+    """Per-sampler table like JMeter's Aggregate Report."""
+    width = max([len(label) for label in summaries] + [7])
+    lines = [f"{'Sampler':<{width}} {'count':>7} {'err %':>6} {'req/s':>8} {'mean':>8} {'p50':>7} "
+             f"{'p90':>7} {'p95':>7} {'p99':>7} {'max':>7}"]
+    for label in sorted(summaries, key=lambda label: (label == "TOTAL", label)):
+        s = summaries[label]
+        lines.append(f"{label:<{width}} {s['count']:>7} {s['error_rate'] * 100:>6.1f} {s['throughput']:>8.2f} "
+                     f"{s['mean_ms']:>8.1f} {s['p50_ms']:>7} {s['p90_ms']:>7} {s['p95_ms']:>7} "
+                     f"{s['p99_ms']:>7} {s['max_ms']:>7}")
+    return "\n".join(lines)
+
+
+# --- Baseline comparison ---
+def diff_against_baseline(summaries, baseline, max_regression=DEFAULT_MAX_REGRESSION):
+    """
+    Compares summaries with a baseline summary (same format). Returns a dict with per-sampler
+    metric changes, the regressions found, and samplers missing from either run. A latency or
+    throughput metric regresses when it is more than max_regression worse relative to the
+    baseline; the error rate when it rises by more than ERROR_RATE_TOLERANCE.
+    """
+    samplers = {}
+    regressions = []
+    for label in sorted(set(summaries) & set(baseline)):
+        current, previous = summaries[label], baseline[label]
+        changes = {}
+        for metric, higher_is_worse in DIFF_METRICS.items():
+            before, after = previous.get(metric, 0), current.get(metric, 0)
+            change = (after - before) / before if before else None
+            if metric == "error_rate":
+                regressed = after - before > ERROR_RATE_TOLERANCE
+            elif change is None:
+                regressed = False
+            else:
+                regressed = change > max_regression if higher_is_worse else change < -max_regression
+            changes[metric] = {"baseline": before, "current": after, "change": change, "regressed": regressed}
+            if regressed:
+                regressions.append({"sampler": label, "metric": metric, "baseline": before, "current": after, "change": change})
+        samplers[label] = changes
+    return {
+        "max_regression": max_regression,
+        "samplers": samplers,
+        "regressions": regressions,
+        "missing_from_current": sorted(set(baseline) - set(summaries)),
+        "new_in_current": sorted(set(summaries) - set(baseline)),
+    }
+
+
+def format_diff(diff):
+    lines = []
+    for regression in diff["regressions"]:
+        change = f"{regression['change'] * 100:+.1f}%" if regression["change"] is not None else "new"
+        lines.append(f"REGRESSION {regression['sampler']}: {regression['metric']} "
+                     f"{regression['baseline']:.3f} -> {regression['current']:.3f} ({change})")
+    if diff["missing_from_current"]:
+        lines.append(f"Samplers missing from this run: {', '.join(diff['missing_from_current'])}")
+    if not diff["regressions"]:
+        lines.append(f"No regressions beyond {diff['max_regression'] * 100:g}% against the baseline.")
+    return "\n".join(lines)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run paymentHubEE.jmx headless and summarise the results.")
+    parser.add_argument("--analyze", metavar="JTL", help="only summarise this existing JTL file; do not run JMeter")
+    parser.add_argument("--plan", default=TEST_PLAN, help="JMeter test plan (default: paymentHubEE.jmx next to this script)")
+    parser.add_argument("--jmeter", help="jmeter executable (default: $JMETER_HOME/bin/jmeter or jmeter on PATH)")
+    parser.add_argument("--output-dir", default="jmeter-results",
+                        help="directory for the plan copy, JTL, JMeter log and summary (default: jmeter-results)")
+    parser.add_argument("--thread-group", action="append", metavar="NAME",
+                        help="run only this thread group; may be repeated (default: the groups enabled in the plan)")
+    parser.add_argument("--threads", type=int, help="threads (users) per thread group")
+    parser.add_argument("--ramp-up", type=int, help="ramp-up period in seconds")
+    parser.add_argument("--loops", type=int, help="iterations per thread")
+    parser.add_argument("--duration", type=int, help="run each thread group for this many seconds")
+    parser.add_argument("--keep-listeners", action="store_true", help="leave the plan's GUI listeners enabled")
+    parser.add_argument("-J", dest="properties", action="append", default=[], metavar="NAME=VALUE",
+                        help="extra JMeter property; may be repeated")
+    parser.add_argument("--baseline", metavar="SUMMARY_JSON", help="compare with this earlier summary.json")
+    parser.add_argument("--max-regression", type=float, default=DEFAULT_MAX_REGRESSION,
+                        help=f"relative change counted as a regression (default: {DEFAULT_MAX_REGRESSION:g})")
+    parser.add_argument("--diff-json", metavar="PATH", help="write the baseline comparison to this JSON file")
+    args = parser.parse_args()
+    for value, option in ((args.threads, "--threads"), (args.loops, "--loops"), (args.duration, "--duration")):
+        if value is not None and value < 1:
+            parser.error(f"{option} must be at least 1")
+    if args.ramp_up is not None and args.ramp_up < 0:
+        parser.error("--ramp-up cannot be negative")
+    if any("=" not in prop for prop in args.properties):
+        parser.error("-J expects NAME=VALUE")
+    return args
+
+
+# --- Main Execution ---
+if __name__ == "__main__":
+    args = parse_args()
+    if args.analyze:
+        jtl_path = args.analyze
+        summary_path = os.path.splitext(jtl_path)[0] + "-summary.json"
+    else:
+        os.makedirs(args.output_dir, exist_ok=True)
+        plan_path = os.path.join(args.output_dir, "plan.jmx")
+        jtl_path = os.path.join(args.output_dir, "results.jtl")
+        summary_path = os.path.join(args.output_dir, "summary.json")
+        if os.path.exists(jtl_path):
+            os.remove(jtl_path) # JMeter appends to an existing JTL
+        groups = prepare_plan(args.plan, plan_path, args.thread_group, args.threads, args.ramp_up, args.loops,
+                              args.duration, args.keep_listeners)
+        if not groups:
+            sys.exit("No thread group to run: check --thread-group against the plan's thread group names.")
+        print(f"Thread groups: {', '.join(groups)}", file=sys.stderr)
+        properties = dict(prop.split("=", 1) for prop in args.properties)
+        try:
+            jmeter = find_jmeter(args.jmeter)
+        except FileNotFoundError as e:
+            sys.exit(str(e))
+        exit_code = run_jmeter(jmeter, plan_path, jtl_path, os.path.join(args.output_dir, "jmeter.log"), properties)
+        if exit_code != 0:
+            print(f"JMeter exited with code {exit_code}", file=sys.stderr)
+        if not os.path.exists(jtl_path):
+            sys.exit("JMeter wrote no results.")
+
+    summaries = summarize_jtl(jtl_path)
+    print(format_summary(summaries))
+    with open(summary_path, "w", encoding="utf-8") as summary_file:
+        json.dump(summaries, summary_file, indent=2)
+    print(f"Summary written to {summary_path}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            diff = diff_against_baseline(summaries, json.load(baseline_file), args.max_regression)
+        print("")
+        print(format_diff(diff))
+        if args.diff_json:
+            with open(args.diff_json, "w", encoding="utf-8") as diff_file:
+                json.dump(diff, diff_file, indent=2)
+        sys.exit(1 if diff["regressions"] else 0)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# benchmarks decode-ilp-packet.py's parser (struct and integer offsets over the packet bytes, the data
+# field left as a memoryview when not decoded) against a bytes-slicing parser of the same ILPv4 layout
+# (the approach the decoder used before), on Prepare packets of several sizes; real Mojaloop Prepare
+# packets are around 700 bytes, which the default 512-byte data size approximates
+#
+# the memoryview rows pass a view into a larger buffer, as when packets are sliced out of a capture:
+# the decoder parses it in place, the slicing parser has to copy it to bytes first. With data decoding
+# on, base64 and JSON decoding of the data field dominate and cost the same in both parsers, so the
+# gain there is the fixed per-packet saving plus the copies, a few percent on multi-KB packets
+#
+# usage: benchmark-ilp-decode.py [--sizes 512,4096,16384] [--seconds 1.0]
+import argparse
+import base64
+import datetime
+import importlib.util
+import json
+import os
+import struct
+import timeit
+
+DECODER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "decode-ilp-packet.py")
+
+
+def load_decoder():
+    spec = importlib.util.spec_from_file_location("decode_ilp_packet", DECODER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def oer_length(length):
+    if length < 0x80:
+        return bytes([length])
+    size = (length.bit_length() + 7) // 8
+    return bytes([0x80 | size]) + length.to_bytes(size, "big")
+
+
+def build_prepare(data_size):
+    """Builds an ILP Prepare whose data is base64 JSON of about data_size bytes, like a Mojaloop transfer."""
+    transaction = {
+        "transactionId": "9f5d9784-3a57-5865-9aa0-7dde7791548a",
+        "quoteId": "7c23e80c-d078-4077-8263-2c047876fcf6",
+        "payee": {"partyIdInfo": {"partyIdType": "MSISDN", "partyIdentifier": "0485689135", "fspId": "bluebank"}},
+        "payer": {"partyIdInfo": {"partyIdType": "MSISDN", "partyIdentifier": "0468831414", "fspId": "greenbank"}},
+        "amount": {"currency": "USD", "amount": "100"},
+        "transactionType": {"scenario": "TRANSFER", "initiator": "PAYER", "initiatorType": "CONSUMER"},
+        "extensionList": {"extension": []},
+    }
+    while len(base64.b64encode(json.dumps(transaction).encode())) < data_size:
+        transaction["extensionList"]["extension"].append({"key": f"k{len(transaction['extensionList']['extension'])}", "value": "x" * 40})
+    data = base64.b64encode(json.dumps(transaction).encode())
+    destination = b"g.bluebank.msisdn.0485689135"
+    expires_at = datetime.datetime(2026, 1, 1, 12, 0, 0).strftime("%Y%m%d%H%M%S000").encode()
+    content = (struct.pack(">Q", 10000) + expires_at + bytes(range(32))
+               + oer_length(len(destination)) + destination + oer_length(len(data)) + data)
+    return bytes([0x0C]) + oer_length(len(content)) + content
+
+
+# --- Reference parser: same layout, but every step slices (copies) the remaining bytes ---
+def _sliced_length(raw):
+    first = raw[0]
+    if first < 0x80:
+        return first, raw[1:]
+    size = first & 0x7F
+    return int.from_bytes(raw[1:1 + size], "big"), raw[1 + size:]
+
+
+def _sliced_var_octet_string(raw):
+    length, rest = _sliced_length(raw)
+    return rest[:length], rest[length:]
+
+
+def parse_sliced(raw, decode_data=True):
+    packet_type = raw[0]
+    packet_length, rest = _sliced_length(raw[1:])
+    payload = rest[:packet_length]
+    amount, = struct.unpack(">Q", payload[0:8])
+    t = payload[8:25].decode("ascii")
+    condition = payload[25:57].hex()
+    destination, rest = _sliced_var_octet_string(payload[57:])
+    data, _ = _sliced_var_octet_string(rest)
+    if decode_data:
+        data = json.loads(base64.b64decode(data))
+    return {
+        "packet_type": packet_type,
+        "packet_length": packet_length,
+        "amount": amount,
+        "expires_at": f"{t[0:4]}-{t[4:6]}-{t[6:8]}T{t[8:10]}:{t[10:12]}:{t[12:14]}.{t[14:17]}Z",
+        "execution_condition": condition,
+        "destination": destination.decode("utf8"),
+        "data": data,
+    }
+
+
+def time_per_call(function, seconds):
+    """Best-of-5 seconds per call, with each run sized to take about seconds / 5."""
+    timer = timeit.Timer(function)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * (seconds / 5) / max(elapsed, 1e-9)))
+    return min(timer.repeat(repeat=5, number=number)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ILP Prepare parsing: offsets vs bytes slicing.")
+    parser.add_argument("--sizes", default="512,1024,2048,4096,16384,65536", help="comma-separated data sizes in bytes")
+    parser.add_argument("--seconds", type=float, default=1.0, help="rough time budget per measurement")
+    args = parser.parse_args()
+
+    decoder = load_decoder()
+    print(f"{'Packet bytes':>12} {'Input':>10} {'Decode data':>11} {'sliced us':>10} {'offsets us':>11} {'speedup':>8}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        raw = build_prepare(size)
+        fast = decoder.parse_ilp_packet(raw)
+        slow = parse_sliced(raw)
+        for key, value in slow.items():
+            assert fast[key] == value, f"parsers disagree on {key} for a {len(raw)}-byte packet"
+        view = memoryview(b"\0" * 64 + raw + b"\0" * 64)[64:-64]
+        for input_name, packet, to_bytes in (("bytes", raw, lambda packet: packet), ("memoryview", view, bytes)):
+            for decode_data in (False, True):
+                sliced = time_per_call(lambda: parse_sliced(to_bytes(packet), decode_data), args.seconds)
+                offsets = time_per_call(lambda: decoder.parse_ilp_packet(packet, decode_data), args.seconds)
+                print(f"{len(raw):>12} {input_name:>10} {str(decode_data):>11} {sliced * 1e6:>10.2f} "
+                      f"{offsets * 1e6:>11.2f} {sliced / offsets:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
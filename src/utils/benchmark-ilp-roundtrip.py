@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# round-trip fuzz test and throughput benchmark for encode-ilp-packet.py and decode-ilp-packet.py:
+# checks that decode(encode(record)) == record for random Prepare/Fulfill/Reject records (including
+# fields long enough to need multi-byte OER lengths, and data of every kind the encoder takes: JSON
+# values, text that looks like JSON or base64, bytes that are not UTF-8, none), then reports
+# packets/sec in both directions
+#
+# the encoder must refuse text it cannot round-trip; the fuzz checks that each refusal was needed,
+# that missing data comes back as "" and that bytes reach the packet unchanged
+#
+# usage: benchmark-ilp-roundtrip.py [--fuzz 20000] [--count 50000] [--seed 1]
+#
+# exits with status 1 on the first record that does not survive the round trip
+import argparse
+import base64
+import datetime
+import importlib.util
+import json
+import os
+import random
+import string
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ENCODER_PATH = os.path.join(HERE, "encode-ilp-packet.py")
+DECODER_PATH = os.path.join(HERE, "decode-ilp-packet.py")
+
+# Field lengths the fuzzer picks from: around the 1-byte/2-byte/3-byte OER length boundaries
+FUZZ_LENGTHS = [0, 1, 17, 127, 128, 255, 256, 1000, 65535, 65536]
+ADDRESS_CHARACTERS = string.ascii_letters + string.digits + "._-~"
+TEXT_CHARACTERS = string.ascii_letters + string.digits + " .,:;!?-_'\"éüß€日本"
+BASE64_CHARACTERS = string.ascii_letters + string.digits + "+/"
+JSON_LOOKING_TEXT = ["5", "-1.5e3", "true", "false", "null", '"quoted"', "[1, 2]", '{"a": 1}', " 42 ", "NaN"]
+
+
+def load_module(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# --- Fuzz records ---
+def random_json(rng, depth=0):
+    """A random JSON value; objects and lists nest up to three levels."""
+    kind = rng.randrange(7 if depth < 3 else 5)
+    if kind == 0:
+        return rng.choice([True, False, None])
+    if kind == 1:
+        return rng.randrange(-10 ** 12, 10 ** 12)
+    if kind == 2:
+        return rng.uniform(-1e6, 1e6)
+    if kind in (3, 4):
+        return random_text(rng, rng.randrange(20))
+    if kind == 5:
+        return [random_json(rng, depth + 1) for _ in range(rng.randrange(4))]
+    return {random_text(rng, rng.randrange(1, 12)): random_json(rng, depth + 1) for _ in range(rng.randrange(5))}
+
+
+def random_characters(rng, alphabet, length):
+    """length random characters; long strings repeat a random 256-character chunk, which is as good for lengths and much faster."""
+    chunk = "".join(rng.choices(alphabet, k=min(length, 256)))
+    return (chunk * (length // 256 + 1))[:length] if length > 256 else chunk
+
+
+def random_text(rng, length):
+    return random_characters(rng, TEXT_CHARACTERS, length)
+
+
+def random_address(rng, length):
+    return "g." + random_characters(rng, ADDRESS_CHARACTERS, max(length - 2, 1))
+
+
+def random_data(rng):
+    """Any data the encoder takes, including text it has to refuse because it would decode as something else."""
+    kind = rng.randrange(9)
+    if kind == 0:
+        return {"transactionId": random_text(rng, 36), "payload": random_json(rng),
+                "padding": "x" * rng.choice(FUZZ_LENGTHS)}
+    if kind == 1:
+        return rng.choice(["", None])
+    if kind == 2:
+        return "note " + random_text(rng, rng.choice(FUZZ_LENGTHS))
+    if kind == 3:
+        return random_json(rng) # numbers, bools, lists and short text as well as objects
+    if kind == 4:
+        return rng.choice(JSON_LOOKING_TEXT)
+    if kind == 5:
+        # text that is valid base64: of nothing in particular, of JSON, or base64url of JSON without padding
+        encoded = base64.b64encode(json.dumps(random_json(rng)).encode("utf8")).decode("ascii")
+        return rng.choice([random_characters(rng, BASE64_CHARACTERS, 4 * rng.randrange(1, 50)), encoded,
+                           encoded.rstrip("=").replace("+", "-").replace("/", "_")])
+    if kind == 6:
+        return random_text(rng, rng.choice(FUZZ_LENGTHS))
+    if kind == 7:
+        return rng.randbytes(rng.choice(FUZZ_LENGTHS)) # mostly not UTF-8
+    return random_text(rng, rng.randrange(1, 40)).encode("utf8")
+
+
+def random_timestamp(rng):
+    moment = datetime.datetime(2000, 1, 1) + datetime.timedelta(milliseconds=rng.randrange(3 * 10 ** 12))
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.") + f"{moment.microsecond // 1000:03d}Z"
+
+
+def fuzz_record(rng):
+    packet_type = rng.choice([0x0C, 0x0D, 0x0E])
+    if packet_type == 0x0C:
+        return {"packet_type": 0x0C, "amount": rng.getrandbits(64), "expires_at": random_timestamp(rng),
+                "execution_condition": rng.getrandbits(256).to_bytes(32, "big").hex(),
+                "destination": random_address(rng, rng.choice(FUZZ_LENGTHS[1:])), "data": random_data(rng)}
+    if packet_type == 0x0D:
+        return {"packet_type": 0x0D, "fulfillment": rng.getrandbits(256).to_bytes(32, "big").hex(), "data": random_data(rng)}
+    return {"packet_type": 0x0E, "code": rng.choice("FTR") + f"{rng.randrange(100):02d}",
+            "triggered_by": random_address(rng, rng.choice(FUZZ_LENGTHS[1:])) if rng.random() < 0.9 else "",
+            "message": random_text(rng, rng.choice(FUZZ_LENGTHS)), "data": random_data(rng)}
+
+
+def strip_derived(record):
+    """The decoded record without the fields the decoder derives (type name and length)."""
+    return {key: value for key, value in record.items() if key not in ("packet_type_name", "packet_length")}
+
+
+def fuzz_one(encoder, decoder_module, record):
+    """
+    Round-trips one record. Returns None if it came back as expected (or the encoder was right to
+    refuse it), else the decoded record or the error that differs.
+    """
+    data = record["data"]
+    try:
+        packet = bytes(encoder.encode(record))
+    except ValueError as e:
+        if not isinstance(data, str):
+            return f"ValueError: {e}"
+        # the refusal is only right if the text, sent as is, would come back as something else
+        decoded = decoder_module.parse_ilp_packet(bytes(encoder.encode({**record, "data": data.encode("utf8")})))
+        return None if decoded["data"] != data else f"refused text that round-trips: {e}"
+    try:
+        if isinstance(data, bytes):
+            decoded = strip_derived(decoder_module.parse_ilp_packet(packet, decode_data=False))
+            decoded["data"] = bytes(decoded["data"])
+        else:
+            decoded = strip_derived(decoder_module.parse_ilp_packet(packet))
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+    expected = {**record, "data": ""} if data is None else record
+    return None if decoded == expected else decoded
+
+
+def fuzz(encoder_module, decoder_module, count, seed):
+    """Round-trips count random records. Returns (records refused, None if all match else (record, decoded or error))."""
+    rng = random.Random(seed)
+    encoder = encoder_module.PacketEncoder()
+    refused = 0
+    for _ in range(count):
+        record = fuzz_record(rng)
+        try:
+            encoder.encode(record)
+        except ValueError:
+            refused += 1
+        mismatch = fuzz_one(encoder, decoder_module, record)
+        if mismatch is not None:
+            return refused, (record, mismatch)
+    return refused, None
+
+
+# --- Throughput ---
+def measure(function, items):
+    started = time.perf_counter()
+    for item in items:
+        function(item)
+    elapsed = time.perf_counter() - started
+    return len(items) / elapsed if elapsed > 0 else 0.0
+
+
+def benchmark(encoder_module, decoder_module, count, seed):
+    """Returns [(type name, packet bytes, encode packets/s, decode packets/s)] for realistic synthetic packets."""
+    results = []
+    for name, packet_type in encoder_module.PACKET_TYPES.items():
+        records = list(encoder_module.synthetic_records(count, [packet_type], seed))
+        encoder = encoder_module.PacketEncoder()
+        encode_rate = measure(encoder.encode_base64, records)
+        packets = [encoder.encode_base64(record) for record in records]
+        decode_rate = measure(decoder_module.decode_ilp_packet, packets)
+        size = sum(len(packet) for packet in packets) * 3 // 4 // len(packets)
+        results.append((name, size, encode_rate, decode_rate))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Round-trip fuzz test and benchmark for the ILP encoder and decoder.")
+    parser.add_argument("--fuzz", type=int, default=20000, help="random records to round-trip (default: 20000)")
+    parser.add_argument("--count", type=int, default=50000, help="packets per type for the benchmark (default: 50000)")
+    parser.add_argument("--seed", type=int, default=1, help="random seed (default: 1)")
+    args = parser.parse_args()
+    encoder_module = load_module("encode_ilp_packet", ENCODER_PATH)
+    decoder_module = load_module("decode_ilp_packet", DECODER_PATH)
+
+    if args.fuzz > 0:
+        started = time.perf_counter()
+        refused, mismatch = fuzz(encoder_module, decoder_module, args.fuzz, args.seed)
+        if mismatch is not None:
+            record, decoded = mismatch
+            print("Round trip failed for:", json.dumps(record, default=repr)[:2000])
+            print("Decoded as:", decoded if isinstance(decoded, str) else json.dumps(decoded, default=repr)[:2000])
+            sys.exit(1)
+        print(f"Fuzz: {args.fuzz} random records survived decode(encode(x)) in {time.perf_counter() - started:.1f}s "
+              f"({refused} refused as ambiguous)")
+
+    if args.count > 0:
+        print(f"{'Type':<8} {'bytes':>6} {'encode/s':>10} {'decode/s':>10}")
+        for name, size, encode_rate, decode_rate in benchmark(encoder_module, decoder_module, args.count, args.seed):
+            print(f"{name:<8} {size:>6} {encode_rate:>10.0f} {decode_rate:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
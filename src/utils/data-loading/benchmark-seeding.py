@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# measures clients/sec of generate-mifos-vnext-data.py against the local stub servers (stub-servers.py)
+# in several modes: sequential, concurrent workers, Fineract /batches and bulk vNext registration
+#
+# usage: benchmark-seeding.py [--clients 200] [--latency 0.01] [--error-rate 0] [--modes sequential,workers-8]
+#        benchmark-seeding.py --error-rate 0.05 --repeat 5 --modes workers-8,workers-8-vnext-bulk
+#        benchmark-seeding.py --capacity 8 --max-queue 32 --modes workers-8,workers-32,adaptive
+#
+# with --repeat every mode runs that many times and the run with the median time is reported, since
+# retry backoff makes single runs with --error-rate vary by several percent
+# the stubs run in this process with fresh state for every mode; the generator runs as a subprocess
+# exactly as it would against a real deployment, so the numbers include its own overhead
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+GENERATOR = os.path.join(HERE, "generate-mifos-vnext-data.py")
+STUBS_PATH = os.path.join(HERE, "stub-servers.py")
+
+# Mode name -> extra generator arguments
+MODES = {
+    "sequential": [],
+    "workers-8": ["--workers", "8"],
+    "workers-32": ["--workers", "32", "--tenant-concurrency", "16"],
+    "batch-10": ["--batch-size", "10"],
+    "workers-8-batch-10": ["--workers", "8", "--batch-size", "10"],
+    "workers-8-vnext-bulk": ["--workers", "8", "--vnext-bulk-size", "100"],
+    "adaptive": ["--adaptive-concurrency", "--target-p95", "0.05"],
+}
+
+
+def load_stubs():
+    spec = importlib.util.spec_from_file_location("stub_servers", STUBS_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_mode(name, extra_args, fineract_url, vnext_url, clients):
+    """Runs the generator once. Returns (wall seconds, succeeded, failed)."""
+    with tempfile.TemporaryDirectory() as scratch:
+        metrics_path = os.path.join(scratch, "metrics.json")
+        command = [sys.executable, GENERATOR, "--fineract-url", fineract_url, "--vnext-url", vnext_url,
+                   "--clients-per-tenant", str(clients), "--metrics-json", metrics_path] + extra_args
+        started = time.perf_counter()
+        result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        elapsed = time.perf_counter() - started
+        if result.returncode != 0 or not os.path.exists(metrics_path):
+            print(f"{name}: generator exited with code {result.returncode}", file=sys.stderr)
+            return elapsed, 0, 0
+        with open(metrics_path, encoding="utf-8") as metrics_file:
+            tenants = json.load(metrics_file)["tenants"]
+    return elapsed, sum(t["succeeded"] for t in tenants.values()), sum(t["failed"] for t in tenants.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the seeding pipeline against local stub servers.")
+    parser.add_argument("--clients", type=int, default=200, help="clients per tenant in each run (default: 200)")
+    parser.add_argument("--latency", type=float, default=0.01, help="stub latency per request in seconds (default: 0.01)")
+    parser.add_argument("--jitter", type=float, default=0.5, help="stub latency jitter fraction (default: 0.5)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="stub 503 rate (default: 0)")
+    parser.add_argument("--lost-response-rate", type=float, default=0.0, help="stub applied-but-504 rate (default: 0)")
+    parser.add_argument("--capacity", type=int, default=0,
+                        help="requests the Fineract stub works on at once, the rest queue (default: 0, unlimited)")
+    parser.add_argument("--max-queue", type=int, default=0,
+                        help="with --capacity, queued requests beyond which the stub answers 503 (default: 0, unlimited)")
+    parser.add_argument("--modes", default=",".join(MODES), help=f"comma-separated modes (default: all of {', '.join(MODES)})")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per mode; the median run is reported (default: 1)")
+    parser.add_argument("--output-json", metavar="PATH", help="also write the results to this JSON file")
+    args = parser.parse_args()
+    modes = [mode.strip() for mode in args.modes.split(",")]
+    unknown = [mode for mode in modes if mode not in MODES]
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(unknown)}")
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    stubs = load_stubs()
+    server, fineract_port, vnext_port = stubs.start_in_thread(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        lost_response_rate=args.lost_response_rate, seed=1, capacity=args.capacity, max_queue=args.max_queue)
+    fineract_url = f"http://127.0.0.1:{fineract_port}{stubs.FINERACT_PREFIX.rstrip('/')}"
+    vnext_url = f"http://127.0.0.1:{vnext_port}"
+
+    print(f"Stub latency {args.latency * 1000:g} ms (+/-{args.jitter * 100:g}%), error rate {args.error_rate:g}, "
+          f"lost responses {args.lost_response_rate:g}, capacity {args.capacity or 'unlimited'}; "
+          f"{args.clients} clients per tenant")
+    print(f"{'Mode':<22} {'seconds':>8} {'ok':>6} {'failed':>7} {'clients/s':>10} {'requests':>9} {'speedup':>8}")
+    results = []
+    baseline = None
+    for mode in modes:
+        runs = []
+        for _ in range(args.repeat):
+            server.reset()
+            runs.append(run_mode(mode, MODES[mode], fineract_url, vnext_url, args.clients) + (sum(server.stats.values()),))
+        median = statistics.median_low(run[0] for run in runs)
+        elapsed, succeeded, failed, requests_served = next(run for run in runs if run[0] == median)
+        rate = succeeded / elapsed if elapsed > 0 else 0.0
+        baseline = baseline or rate
+        print(f"{mode:<22} {elapsed:>8.2f} {succeeded:>6} {failed:>7} {rate:>10.1f} {requests_served:>9} "
+              f"{rate / baseline if baseline else 0:>7.2f}x")
+        results.append({"mode": mode, "args": MODES[mode], "seconds": elapsed, "succeeded": succeeded,
+                        "failed": failed, "clients_per_second": rate, "requests": requests_served})
+    server.close()
+    if args.output_json:
+        with open(args.output_json, "w", encoding="utf-8") as output_file:
+            json.dump({"latency": args.latency, "jitter": args.jitter, "error_rate": args.error_rate,
+                       "lost_response_rate": args.lost_response_rate, "capacity": args.capacity,
+                       "max_queue": args.max_queue, "clients_per_tenant": args.clients,
+                       "results": results}, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+# generates PHEE bulk payment batch CSVs between the clients that generate-mifos-vnext-data.py seeded,
+# optionally submits them to the bulk processor and tracks how long each batch takes to complete
+# assumes generate-mifos-vnext-data.py has been run with the same --msisdn-seed, --tenant-config,
+# --tenant-spec and --clients-per-tenant, which decide the clients rows are made between
+#
+# usage:
+#   generate-bulk-batches.py --rows 1000000 --batch-size 10000 --output-dir batches/      write CSVs only
+#   generate-bulk-batches.py --rows 100000 --batch-size 5000 --submit                      submit and track
+#   generate-bulk-batches.py --submit --input batches/*.csv                                submit existing files
+#
+# rows are produced lazily and written one batch at a time, so memory use depends on --batch-size only.
+# Request ids are UUIDs, which spreadsheets leave alone, but opening a file in Excel or LibreOffice
+# still turns MSISDNs like 0485689135 into numbers and drops the leading zero, quoted or not (the
+# old postman/phee-example-batch-2.csv had Excel-mangled values like 8.7988E+11); to edit one, import
+# it as text (Data > From Text/CSV with every column set to Text) and export it as CSV again
+import argparse
+import csv
+import hashlib
+import importlib.util
+import io
+import itertools
+import json
+import os
+import random
+import sys
+import time
+import uuid
+
+import requests
+import urllib3
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning) # Disable InsecureRequestWarning
+
+# --- Configuration ---
+BULK_API_URL = "https://bulk-connector.mifos.gazelle.test/batchtransactions"
+# Operations app batch summary, polled until no transaction of the batch is ongoing
+BATCH_STATUS_URL = "https://ops-bk.mifos.gazelle.test/api/v1/batch"
+
+# Columns of the bulk processor CSV format, as in postman/phee-example-batch-2.csv
+BATCH_CSV_FIELDS = ["Request", "CreditParty Key", "CreditParty Value", "DebitParty Key", "DebitParty Value",
+                    "SubType", "Payment Mode", "Currency", "Amount", "Description"]
+PAYMENT_MODE = "mojaloop"
+CURRENCY = "USD"
+PURPOSE = "load test"
+
+DEFAULT_BATCH_SIZE = 1000 # Rows per batch file
+POLL_INTERVAL = 5.0 # Seconds between batch status polls
+COMPLETION_TIMEOUT = 1800.0 # Seconds after submission before a batch counts as timed out
+REQUEST_TIMEOUT = (5.0, 120.0) # (connect, read) seconds; uploads of large batches can be slow
+
+GENERATOR_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "generate-mifos-vnext-data.py")
+
+
+def load_generator():
+    """Loads generate-mifos-vnext-data.py as a module, for its deterministic client records."""
+    spec = importlib.util.spec_from_file_location("generate_mifos_vnext_data", GENERATOR_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+generator = load_generator()
+
+
+# --- Batch rows ---
+def seeded_mobile_numbers(plan, tenant):
+    """
+    Mobile numbers of the clients the data generator seeds for tenant with plan (from
+    generator.build_tenant_plan()), client numbers 1..clients. Raises ValueError if the plan
+    does not seed tenant.
+    """
+    if tenant not in plan:
+        raise ValueError(f"Tenant {tenant} is not seeded by the tenant plan ({', '.join(plan)})")
+    return [generator.client_record(tenant, n)["mobile_number"] for n in range(1, plan[tenant]["clients"] + 1)]
+
+
+def batch_rows(payers, payees, rows, max_amount, seed):
+    """
+    Yields rows dicts (BATCH_CSV_FIELDS) for rows transfers from a random payer (debit party) to a
+    random payee (credit party). Request ids are derived from (seed, row number), so the same
+    arguments always produce the same files.
+    """
+    rng = random.Random(seed)
+    for row_number in range(1, rows + 1):
+        digest = hashlib.blake2b(f"{seed}-{row_number}".encode(), digest_size=16).digest()
+        yield {
+            "Request": str(uuid.UUID(bytes=digest, version=4)),
+            "CreditParty Key": "msisdn",
+            "CreditParty Value": rng.choice(payees),
+            "DebitParty Key": "msisdn",
+            "DebitParty Value": rng.choice(payers),
+            "SubType": "",
+            "Payment Mode": PAYMENT_MODE,
+            "Currency": CURRENCY,
+            "Amount": str(rng.randint(1, max_amount)),
+            "Description": f"bulk load row {row_number}",
+        }
+
+
+def batches(rows, batch_size):
+    """Splits an iterable of rows into lists of at most batch_size rows, lazily."""
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def batch_csv(batch):
+    """Returns a batch as CSV bytes, in the format of postman/phee-example-batch-2.csv."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=BATCH_CSV_FIELDS, lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(batch)
+    return buffer.getvalue().encode("utf-8")
+
+
+# --- Submission and tracking ---
+def submit_batch(session, payer_tenant, payee_tenant, filename, content):
+    """
+    POSTs one batch file to the bulk processor. Returns (batch id, seconds the upload took).
+    The batch id comes from the response when it has one, otherwise it is the correlation id sent.
+    """
+    correlation_id = str(uuid.uuid4())
+    headers = {
+        "Platform-TenantId": payer_tenant,
+        "X-PayeeDFSP-ID": payee_tenant,
+        "X-CorrelationID": correlation_id,
+        "Purpose": PURPOSE,
+        "filename": filename,
+        "type": "csv",
+        "Accept": "*/*",
+    }
+    started = time.monotonic()
+    response = session.post(BULK_API_URL, headers=headers, params={"type": "csv"},
+                            files={"data": (filename, content, "text/csv")}, timeout=REQUEST_TIMEOUT, verify=False)
+    elapsed = time.monotonic() - started
+    response.raise_for_status()
+    try:
+        body = response.json()
+    except ValueError:
+        body = {}
+    return _batch_id(body) or correlation_id, elapsed
+
+
+def _batch_id(body):
+    if not isinstance(body, dict):
+        return None
+    for key in ("batch_id", "batchId", "BatchId"):
+        if body.get(key):
+            return str(body[key])
+    # e.g. {"PollingPath": "/batch/Summary/<batch id>", "SuggestedCallbackSeconds": "30"}
+    polling_path = body.get("PollingPath") or body.get("pollingPath")
+    if polling_path:
+        return polling_path.rstrip("/").rsplit("/", 1)[-1]
+    return None
+
+
+def batch_status(session, tenant, batch_id):
+    """Returns (total, successful, failed, ongoing) from the operations app batch summary, or None if not found yet."""
+    response = session.get(BATCH_STATUS_URL, headers={"Platform-TenantId": tenant, "Accept": "application/json"},
+                           params={"batchId": batch_id}, timeout=REQUEST_TIMEOUT, verify=False)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    body = response.json()
+    if not isinstance(body, dict):
+        return None
+    counts = [int(body.get(key) or 0) for key in ("total", "successful", "failed", "ongoing")]
+    return tuple(counts)
+
+
+class BatchTracker:
+    """
+    Keeps the submitted batches that have not finished and polls their status. A batch is
+    complete once the operations app reports all of its rows and none ongoing; its completion
+    time runs from the start of its upload to the poll that saw it complete.
+    """
+
+    def __init__(self, session, tenant, poll_interval=POLL_INTERVAL, completion_timeout=COMPLETION_TIMEOUT):
+        self.session = session
+        self.tenant = tenant
+        self.poll_interval = poll_interval
+        self.completion_timeout = completion_timeout
+        self.pending = {} # batch id -> result dict
+        self.results = []
+        self.last_poll = 0.0
+
+    def add(self, result):
+        self.pending[result["batch_id"]] = result
+        self.results.append(result)
+
+    def poll(self, force=False):
+        """Checks every pending batch, at most once per poll interval unless force is set."""
+        if not self.pending or (not force and time.monotonic() - self.last_poll < self.poll_interval):
+            return
+        self.last_poll = time.monotonic()
+        for batch_id, result in list(self.pending.items()):
+            try:
+                status = batch_status(self.session, self.tenant, batch_id)
+            except (requests.exceptions.RequestException, ValueError) as e:
+                print(f"Status check for batch {batch_id} failed: {e}", file=sys.stderr)
+                continue
+            now = time.monotonic()
+            if status is not None:
+                total, successful, failed, ongoing = status
+                result.update(successful=successful, failed=failed)
+                if total >= result["rows"] and ongoing == 0:
+                    result["status"] = "completed"
+            if result["status"] == "submitted" and now - result["submitted_at"] > self.completion_timeout:
+                result["status"] = "timeout"
+            if result["status"] != "submitted":
+                result["completion_seconds"] = now - result["submitted_at"]
+                result["rows_per_second"] = result["rows"] / result["completion_seconds"]
+                del self.pending[batch_id]
+                print(f"Batch {result['file']} {result['status']} in {result['completion_seconds']:.1f}s "
+                      f"({result['rows_per_second']:.1f} rows/s, {result['successful']} successful, "
+                      f"{result['failed']} failed)", file=sys.stderr)
+
+    def wait(self):
+        """Polls until no batch is pending."""
+        while self.pending:
+            time.sleep(self.poll_interval)
+            self.poll(force=True)
+
+
+def format_results(results, elapsed):
+    """Per-batch table and totals printed at the end of a submit run."""
+    lines = [f"{'Batch':<28} {'rows':>8} {'status':>10} {'upload s':>9} {'complete s':>11} {'rows/s':>9} {'ok':>8} {'failed':>8}"]
+    for result in results:
+        complete = f"{result['completion_seconds']:.1f}" if "completion_seconds" in result else "-"
+        rate = f"{result['rows_per_second']:.1f}" if "rows_per_second" in result else "-"
+        lines.append(f"{result['file']:<28} {result['rows']:>8} {result['status']:>10} {result['upload_seconds']:>9.2f} "
+                     f"{complete:>11} {rate:>9} {result['successful']:>8} {result['failed']:>8}")
+    rows = sum(result["rows"] for result in results)
+    completed_rows = sum(result["rows"] for result in results if result["status"] == "completed")
+    lines.append("")
+    lines.append(f"{len(results)} batches, {rows} rows in {elapsed:.1f}s; "
+                 f"{completed_rows} rows in completed batches ({completed_rows / elapsed if elapsed else 0:.1f} rows/s overall)")
+    return "\n".join(lines)
+
+
+def read_batch_file(path):
+    """Returns (content, row count) of an existing batch CSV."""
+    with open(path, "rb") as batch_file:
+        content = batch_file.read()
+    rows = csv.reader(io.StringIO(content.decode("utf-8-sig")))
+    return content, max(sum(1 for row in rows if row) - 1, 0)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Generate PHEE bulk payment batch CSVs between seeded clients and optionally submit them."
+    )
+    parser.add_argument("--rows", type=int, default=10000, help="total transfer rows to generate (default: 10000)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"rows per batch file (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--output-dir", metavar="DIR", help="write each batch to DIR/batch-NNNNNN.csv")
+    parser.add_argument("--input", nargs="+", metavar="FILE", help="submit these existing batch CSVs instead of generating")
+    parser.add_argument("--submit", action="store_true", help="submit each batch to the bulk processor and track it")
+    parser.add_argument("--no-track", dest="track", action="store_false",
+                        help="with --submit, do not poll the operations app for batch completion")
+    parser.add_argument("--payer-tenant", default="greenbank", help="tenant whose clients are debited (default: greenbank)")
+    parser.add_argument("--payee-tenant", default="bluebank", help="tenant whose clients are credited (default: bluebank)")
+    parser.add_argument("--clients-per-tenant", type=int, default=None,
+                        help="the --clients-per-tenant the data was generated with (default: the --tenant-spec or TENANTS counts)")
+    parser.add_argument("--tenant-spec", metavar="PATH",
+                        help="the --tenant-spec the data was generated with (default: every tenant in --tenant-config)")
+    parser.add_argument("--max-amount", type=int, default=10, help="amounts are 1..this (default: 10)")
+    parser.add_argument("--seed", type=int, default=1, help="seed for request ids, parties and amounts (default: 1)")
+    parser.add_argument("--msisdn-seed", type=int, default=generator.MSISDN_SEED,
+                        help=f"the --msisdn-seed the data was generated with (default: {generator.MSISDN_SEED})")
+    parser.add_argument("--tenant-config", metavar="PATH", default=generator.TENANT_CONFIG_FILE,
+                        help="tenant config CSV (default: config/mifos-tenant-config.csv)")
+    parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL,
+                        help=f"seconds between batch status polls (default: {POLL_INTERVAL:g})")
+    parser.add_argument("--completion-timeout", type=float, default=COMPLETION_TIMEOUT,
+                        help=f"seconds before an unfinished batch counts as timed out (default: {COMPLETION_TIMEOUT:g})")
+    parser.add_argument("--output-json", metavar="PATH", help="write the per-batch results to this JSON file")
+    args = parser.parse_args()
+    if not args.submit and not args.output_dir:
+        parser.error("nothing to do: pass --output-dir, --submit or both")
+    if args.input and not args.submit:
+        parser.error("--input needs --submit")
+    if args.rows < 1 or args.batch_size < 1:
+        parser.error("--rows and --batch-size must be at least 1")
+    if args.max_amount < 1:
+        parser.error("--max-amount must be at least 1")
+    if args.clients_per_tenant is not None and args.clients_per_tenant < 1:
+        parser.error("--clients-per-tenant must be at least 1")
+    if args.payer_tenant == args.payee_tenant:
+        parser.error("--payer-tenant and --payee-tenant must differ")
+    return args
+
+
+# --- Main Execution ---
+if __name__ == "__main__":
+    args = parse_args()
+    generator.MSISDN_SEED = args.msisdn_seed
+    generator.TENANT_CONFIG_FILE = args.tenant_config
+
+    if args.input:
+        batch_files = ((os.path.basename(path),) + read_batch_file(path) for path in args.input)
+    else:
+        try:
+            plan = generator.build_tenant_plan(args.tenant_spec, args.clients_per_tenant)
+            payers = seeded_mobile_numbers(plan, args.payer_tenant)
+            payees = seeded_mobile_numbers(plan, args.payee_tenant)
+        except (OSError, ValueError) as e:
+            sys.exit(f"Error: {e}")
+        print(f"Generating {args.rows} rows in batches of {args.batch_size}: {len(payers)} {args.payer_tenant} payers, "
+              f"{len(payees)} {args.payee_tenant} payees", file=sys.stderr)
+        rows = batch_rows(payers, payees, args.rows, args.max_amount, args.seed)
+        batch_files = ((f"batch-{number:06d}.csv", batch_csv(batch), len(batch))
+                       for number, batch in enumerate(batches(rows, args.batch_size), 1))
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    session = requests.Session() if args.submit else None
+    tracker = BatchTracker(session, args.payer_tenant, args.poll_interval, args.completion_timeout) if args.submit else None
+    started = time.monotonic()
+    written = 0
+    for filename, content, row_count in batch_files:
+        if args.output_dir and not args.input:
+            with open(os.path.join(args.output_dir, filename), "wb") as batch_file:
+                batch_file.write(content)
+            written += row_count
+        if not args.submit:
+            continue
+        submitted_at = time.monotonic()
+        try:
+            batch_id, upload_seconds = submit_batch(session, args.payer_tenant, args.payee_tenant, filename, content)
+        except requests.exceptions.RequestException as e:
+            print(f"Submitting {filename} failed: {e}", file=sys.stderr)
+            tracker.results.append({"file": filename, "batch_id": None, "rows": row_count, "status": "rejected",
+                                    "upload_seconds": time.monotonic() - submitted_at, "successful": 0, "failed": 0})
+            continue
+        print(f"Submitted {filename} ({row_count} rows) as batch {batch_id} in {upload_seconds:.2f}s", file=sys.stderr)
+        result = {"file": filename, "batch_id": batch_id, "rows": row_count, "status": "submitted",
+                  "submitted_at": submitted_at, "upload_seconds": upload_seconds, "successful": 0, "failed": 0}
+        if args.track:
+            tracker.add(result)
+            tracker.poll()
+        else:
+            result["status"] = "accepted"
+            tracker.results.append(result)
+
+    if args.output_dir and not args.input:
+        print(f"Wrote {written} rows to {args.output_dir}", file=sys.stderr)
+    if tracker is not None:
+        if tracker.pending:
+            print(f"All batches submitted; waiting for {len(tracker.pending)} to complete...", file=sys.stderr)
+        tracker.wait()
+        session.close()
+        print("", file=sys.stderr)
+        print(format_results(tracker.results, time.monotonic() - started), file=sys.stderr)
+        if args.output_json:
+            with open(args.output_json, "w", encoding="utf-8") as output_file:
+                json.dump([{k: v for k, v in result.items() if k != "submitted_at"} for result in tracker.results],
+                          output_file, indent=2)
@@ -1,29 +1,68 @@
 #!/usr/bin/env python3
 # generates demo data for Fineract and registers it with built-in Oracle in vNext
 # assumes all services are up because not much error checking is done
+# clients are generated deterministically from (tenant, client number); use --msisdn-seed to get a different set
+# tenants come from config/mifos-tenant-config.csv, or from --tenant-spec for per-tenant client counts and
+# deposit distributions; with --workers > 1 all tenants are provisioned at the same time
+# logging: tenant level messages and a progress line by default, every step with -v, only errors and
+# progress with -q; --log-format json writes one JSON object per line
+# --verify checks what a run left behind (paged reads, one stdout line per client that differs, exit
+# status 1 if any does) and --verify --repair runs the missing steps of those clients
+# --cleanup removes what a run created (from its --journal, or by external ids) so the next round can
+# be seeded without a redeploy; seed that round with another --msisdn-seed, as Fineract keeps closed records
+# --adaptive-concurrency finds how many in-flight requests each host sustains within --target-p95 and
+# --max-error-rate instead of a fixed --workers, and logs the level it settled at
+# --profile PREFIX records wall vs CPU time per stage and sampled stacks of all threads (see ../stage-profiler.py)
 # TODO
 # - add error checking
-# - generate the same set of unique clients by setting a seed value e.g. random.seed(42)  # Set a fixed seed
-#                                           and removing the shuffle step when creating clients 
-#                                           this should be a user argument because for dev/test need to be different
 
 
 import requests
+import argparse
+import collections
+import concurrent.futures
+import contextlib
+import importlib.util
+import itertools
+import logging
+import threading
+import time
+import math
 import random
 import hashlib
 import json
 import datetime
 import uuid
 import sys
+import os
+import csv
+import urllib.parse
 import base64 # Needed to decode the Authorization header if you want to see the credentials
 import urllib3 # Import urllib3
+import urllib3.connection
+import urllib3.connectionpool
+import requests.adapters
+try:
+    import yaml # Optional: only needed for a YAML --tenant-spec
+except ImportError:
+    yaml = None
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning) # Disable InsecureRequestWarning
 
 # --- Configuration ---
+# Clients per tenant when neither --clients-per-tenant nor --tenant-spec says otherwise;
+# tenants in the tenant config that are not listed here get DEFAULT_TENANT_CLIENTS
 TENANTS = {
     "bluebank": 2,
     "greenbank": 1
 }
+DEFAULT_TENANT_CLIENTS = 1
+
+# Tenants known to Fineract (see src/utils/update-mifos-tenants.sh); each tenant's numeric id
+# decides which share of the mobile number space its clients get
+TENANT_CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "config", "mifos-tenant-config.csv")
+STAGE_PROFILER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "stage-profiler.py")
+TENANT_CONFIG_FIELDS = ["tenant_id", "tenant_identifier", "tenant_name", "tenant_timezone",
+                        "db_host", "db_port", "db_name", "db_user", "db_password"]
 
 
 FIRST_NAMES = [
@@ -53,7 +92,8 @@ LAST_NAMES = [
     "Rivera", "Campbell", "Mitchell", "Carter", "Roberts"
 ]
 
-tenant_client_counter = {}
+# Guards the per-tenant MSISDN allocators when client chains run on worker threads
+client_allocation_lock = threading.Lock()
 
 
 API_BASE_URL = "https://mifos.mifos.gazelle.test/fineract-provider/api/v1"
@@ -61,10 +101,37 @@ CLIENTS_API_URL = f"{API_BASE_URL}/clients"
 SAVINGS_API_URL = f"{API_BASE_URL}/savingsaccounts"
 SAVINGS_PRODUCTS_API_URL = f"{API_BASE_URL}/savingsproducts"
 INTEROP_PARTIES_API_URL = f"{API_BASE_URL}/interoperation/parties/MSISDN"
+VNEXT_ADMIN_BASE_URL = "http://vnextadmin.mifos.gazelle.test"
+VNEXT_PARTICIPANTS_API_URL = f"{VNEXT_ADMIN_BASE_URL}/_interop/participants"
+BATCHES_API_URL = f"{API_BASE_URL}/batches"
+OFFICES_API_URL = f"{API_BASE_URL}/offices"
+PAYMENT_TYPES_API_URL = f"{API_BASE_URL}/paymenttypes"
+CLIENTS_TEMPLATE_API_URL = f"{API_BASE_URL}/clients/template"
+
+
+def configure_api_urls(api_base_url=None, vnext_admin_base_url=None):
+    """Points the API URLs at another Fineract API base and/or vNext admin host, e.g. the local stub servers."""
+    global API_BASE_URL, CLIENTS_API_URL, SAVINGS_API_URL, SAVINGS_PRODUCTS_API_URL, INTEROP_PARTIES_API_URL
+    global BATCHES_API_URL, OFFICES_API_URL, PAYMENT_TYPES_API_URL, CLIENTS_TEMPLATE_API_URL
+    global VNEXT_ADMIN_BASE_URL, VNEXT_PARTICIPANTS_API_URL
+    if api_base_url:
+        API_BASE_URL = api_base_url.rstrip("/")
+        CLIENTS_API_URL = f"{API_BASE_URL}/clients"
+        SAVINGS_API_URL = f"{API_BASE_URL}/savingsaccounts"
+        SAVINGS_PRODUCTS_API_URL = f"{API_BASE_URL}/savingsproducts"
+        INTEROP_PARTIES_API_URL = f"{API_BASE_URL}/interoperation/parties/MSISDN"
+        BATCHES_API_URL = f"{API_BASE_URL}/batches"
+        OFFICES_API_URL = f"{API_BASE_URL}/offices"
+        PAYMENT_TYPES_API_URL = f"{API_BASE_URL}/paymenttypes"
+        CLIENTS_TEMPLATE_API_URL = f"{API_BASE_URL}/clients/template"
+    if vnext_admin_base_url:
+        VNEXT_ADMIN_BASE_URL = vnext_admin_base_url.rstrip("/")
+        VNEXT_PARTICIPANTS_API_URL = f"{VNEXT_ADMIN_BASE_URL}/_interop/participants"
 
 #TENANT_ID = "fredbank" # placeholder , should never be used
 AUTH_HEADER_VALUE = "Basic bWlmb3M6cGFzc3dvcmQ="
 # This is a base64 encoded string of "mifos:password"
+# Template only: each tenant gets its own copy from tenant_headers()
 HEADERS = {
     "Fineract-Platform-TenantId": " ",
     "Authorization": AUTH_HEADER_VALUE,
@@ -79,43 +146,1004 @@ LOCALE = "en" # Define LOCALE globally
 PRODUCT_CURRENCY_CODE = "USD"  # <-- Change this to your desired currency
 PRODUCT_INTEREST_RATE = 5.0    # <-- Annual interest rate (float)
 PRODUCT_SHORTNAME = "savb"    
-# PRODUCT_NAME = f"{tenant_id}-savings" 
-# PRODUCT_DESCRIPTION = f"Savings product for {tenant_id} demo"
+# Product name is f"{tenant_id}-savings", see savings_product_name()
 
 # Deposit details
-DEFAULT_DEPOSIT_AMOUNT = 5000.0 # Default deposit amount
-DEFAULT_PAYMENT_TYPE_ID = 1 # Assuming payment type ID 1 exists and is suitable for deposits
+DEFAULT_DEPOSIT_AMOUNT = 5000.0 # Default deposit amount, unless the tenant spec gives a distribution
+MIN_DEPOSIT_AMOUNT = 1.0 # Amounts drawn from a distribution are clamped to at least this
+DEFAULT_PAYMENT_TYPE_ID = 1 # Preferred payment type for deposits; TenantMetadataCache checks that it exists
+
+# Client details
+DEFAULT_OFFICE_ID = 1 # Head office in a fresh Fineract database
+DEFAULT_LEGAL_FORM_ID = 1 # Person
 PAYLOAD_DATE_FORMAT_LITERAL = "dd MMMM yyyy"
 
-# generate random unique mobile numbers
-random.seed(42)  # Set a fixed seed for reproducibility
-total_clients = sum(TENANTS.values())
-unique_mobile_numbers = [f"04{random.randint(10000000, 99999999)}" for _ in range(total_clients)]
-random.shuffle(unique_mobile_numbers)
+# Mobile numbers are "04" followed by 8 digits, handed out by MsisdnAllocator
+MSISDN_PREFIX = "04"
+MSISDN_SEED = 42 # Set a fixed seed for reproducibility
+ORIGINAL_MSISDN_SEED = 42 # Clients of this seed have external ids derived from (tenant, client number) alone
+MSISDN_TENANT_SHARDS = 32 # Maximum number of tenants; each gets 1/32 of the number space (~2.8M numbers)
+
+
+# --- Unique mobile number allocation ---
+class MsisdnAllocator:
+    """
+    Maps an index to a unique 8-digit mobile number using a seeded permutation of
+    10000000..99999999 (a Feistel network with cycle walking), so no list of numbers is
+    ever built and two different indexes can never produce the same number.
+
+    The index space is split into shard_count interleaved shards (shard, shard + shard_count, ...),
+    so tenants or processes with different shard numbers never collide and need no coordination.
+    number_at() is stateless; allocate() hands out the shard's numbers in order.
+    """
+    LOW = 10000000
+    SIZE = 90000000 # 10000000..99999999
+    HALF_BITS = 14 # 2 * 14 bits = 268435456 >= SIZE
+    HALF_MASK = (1 << HALF_BITS) - 1
+    ROUNDS = 6
+
+    def __init__(self, seed=MSISDN_SEED, shard=0, shard_count=1, prefix=MSISDN_PREFIX):
+        if not 0 <= shard < shard_count:
+            raise ValueError(f"shard must be in 0..{shard_count - 1}, got {shard}")
+        self.shard = shard
+        self.shard_count = shard_count
+        self.prefix = prefix
+        rng = random.Random(seed)
+        self._round_keys = [rng.getrandbits(32) for _ in range(self.ROUNDS)]
+        self._next_index = 0
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self):
+        """Number of mobile numbers available to this shard."""
+        return (self.SIZE - self.shard + self.shard_count - 1) // self.shard_count
+
+    def _permute(self, value):
+        left, right = value >> self.HALF_BITS, value & self.HALF_MASK
+        for key in self._round_keys:
+            mixed = ((right ^ key) * 0x9E3779B1) & 0xFFFFFFFF
+            mixed ^= mixed >> 15
+            left, right = right, left ^ (mixed & self.HALF_MASK)
+        return (left << self.HALF_BITS) | right
+
+    def number_at(self, index):
+        """Returns the mobile number for the index-th allocation of this shard."""
+        if not 0 <= index < self.capacity:
+            raise ValueError(f"MSISDN index {index} outside shard capacity {self.capacity}")
+        value = self.shard + index * self.shard_count
+        # Cycle walking: the permutation covers 2**28 values, keep applying it until
+        # the result falls back inside the 90M-value range. This stays a bijection.
+        value = self._permute(value)
+        while value >= self.SIZE:
+            value = self._permute(value)
+        return f"{self.prefix}{self.LOW + value}"
+
+    def allocate(self):
+        """Returns the next unused mobile number of this shard (thread safe)."""
+        with self._lock:
+            index = self._next_index
+            self._next_index += 1
+        return self.number_at(index)
+
+
+msisdn_allocators = {}
+
+
+def msisdn_allocator_for(tenant_id):
+    """Returns the allocator for tenant_id; tenants use their numeric id from the tenant config as shard number."""
+    with client_allocation_lock:
+        allocator = msisdn_allocators.get(tenant_id)
+        if allocator is None:
+            tenant = load_tenant_config().get(tenant_id)
+            if tenant is None:
+                raise ValueError(f"Tenant {tenant_id} is not in {TENANT_CONFIG_FILE}; add it there first")
+            allocator = MsisdnAllocator(MSISDN_SEED, tenant["tenant_id"] % MSISDN_TENANT_SHARDS, MSISDN_TENANT_SHARDS)
+            msisdn_allocators[tenant_id] = allocator
+        return allocator
+
+
+# --- Tenant configuration ---
+tenant_config = None
+
+
+def load_tenant_config(path=None):
+    """
+    Reads the tenant config CSV (tenant_id,tenant_identifier,...,db_password; lines starting
+    with # are comments). Returns {tenant_identifier: row dict} in file order, with
+    tenant_id as an int. The file is read once and cached.
+    """
+    global tenant_config
+    if tenant_config is not None and path is None:
+        return tenant_config
+    tenants = {}
+    with open(path or TENANT_CONFIG_FILE, newline="", encoding="utf-8") as config_file:
+        rows = csv.reader(line for line in config_file if line.strip() and not line.lstrip().startswith("#"))
+        for row in rows:
+            tenant = dict(zip(TENANT_CONFIG_FIELDS, (field.strip() for field in row)))
+            tenant["tenant_id"] = int(tenant["tenant_id"])
+            tenants[tenant["tenant_identifier"]] = tenant
+    tenant_config = tenants
+    return tenants
+
+
+# --- Tenant provisioning plan ---
+# Parameters each deposit distribution takes in the tenant spec
+DEPOSIT_DISTRIBUTIONS = {
+    "fixed": ("amount",),
+    "uniform": ("min", "max"),
+    "normal": ("mean", "sd"),
+    "lognormal": ("median", "sigma"),
+}
+tenant_plan = {} # tenant_id -> {"clients": n, "deposit": distribution}, set by build_tenant_plan()
+
+
+def parse_deposit_distribution(value, where):
+    """
+    Validates a deposit distribution from the tenant spec: a number (a fixed amount) or a
+    mapping like {"distribution": "uniform", "min": 100, "max": 10000}. Returns the mapping.
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        value = {"distribution": "fixed", "amount": value}
+    if not isinstance(value, dict) or value.get("distribution") not in DEPOSIT_DISTRIBUTIONS:
+        raise ValueError(f"{where}: deposit must be an amount or have a distribution of {', '.join(DEPOSIT_DISTRIBUTIONS)}")
+    for parameter in DEPOSIT_DISTRIBUTIONS[value["distribution"]]:
+        if not isinstance(value.get(parameter), (int, float)):
+            raise ValueError(f"{where}: {value['distribution']} deposit needs a numeric {parameter}")
+    return value
+
+
+def load_tenant_spec(path):
+    """
+    Reads a tenant spec (YAML, or JSON if the file name ends in .json):
+
+        defaults:
+          clients: 100
+          deposit: {distribution: lognormal, median: 2500, sigma: 0.8}
+        tenants:
+          bluebank: {clients: 500, deposit: {distribution: uniform, min: 100, max: 10000}}
+          greenbank: {clients: 50, deposit: 5000}
+
+    Returns {tenant_id: {"clients": n, "deposit": distribution}} in file order.
+    Raises ValueError if the spec is malformed.
+    """
+    with open(path, encoding="utf-8") as spec_file:
+        if path.endswith(".json"):
+            spec = json.load(spec_file)
+        elif yaml is None:
+            raise ValueError(f"{path}: reading a YAML tenant spec needs PyYAML (pip install pyyaml), or use JSON")
+        else:
+            spec = yaml.safe_load(spec_file)
+    if not isinstance(spec, dict) or not isinstance(spec.get("tenants"), dict) or not spec["tenants"]:
+        raise ValueError(f"{path}: expected a 'tenants' mapping")
+    defaults = spec.get("defaults") or {}
+    plan = {}
+    for tenant_id, settings in spec["tenants"].items():
+        settings = {**defaults, **(settings or {})}
+        clients = settings.get("clients", TENANTS.get(tenant_id, DEFAULT_TENANT_CLIENTS))
+        if not isinstance(clients, int) or clients < 1:
+            raise ValueError(f"{path}: tenant {tenant_id} needs a positive whole number of clients")
+        deposit = parse_deposit_distribution(settings.get("deposit", DEFAULT_DEPOSIT_AMOUNT), f"{path}: tenant {tenant_id}")
+        plan[tenant_id] = {"clients": clients, "deposit": deposit}
+    return plan
+
+
+def build_tenant_plan(spec_path=None, clients_per_tenant=None):
+    """
+    Decides which tenants to provision and how: the tenants of the spec file if one is given,
+    otherwise every tenant in the tenant config with its TENANTS count. clients_per_tenant
+    overrides every tenant's count. Sets and returns tenant_plan.
+    Raises ValueError if a tenant is not in the tenant config (its MSISDN shard comes from there).
+    """
+    global tenant_plan
+    known = load_tenant_config()
+    if spec_path:
+        plan = load_tenant_spec(spec_path)
+    else:
+        plan = {tenant_id: {"clients": TENANTS.get(tenant_id, DEFAULT_TENANT_CLIENTS),
+                            "deposit": parse_deposit_distribution(DEFAULT_DEPOSIT_AMOUNT, "default")}
+                for tenant_id in known}
+    unknown = [tenant_id for tenant_id in plan if tenant_id not in known]
+    if unknown:
+        raise ValueError(f"Tenants {', '.join(unknown)} are not in {TENANT_CONFIG_FILE}; add them there first")
+    if clients_per_tenant:
+        for settings in plan.values():
+            settings["clients"] = clients_per_tenant
+    tenant_plan = plan
+    return plan
+
+
+def deposit_amount(tenant_id, seed):
+    """Draws the deposit for one client from the tenant's distribution; the same seed always gives the same amount."""
+    deposit = tenant_plan.get(tenant_id, {}).get("deposit")
+    if deposit is None or deposit["distribution"] == "fixed":
+        return float(deposit["amount"]) if deposit else DEFAULT_DEPOSIT_AMOUNT
+    rng = random.Random(seed)
+    if deposit["distribution"] == "uniform":
+        amount = rng.uniform(deposit["min"], deposit["max"])
+    elif deposit["distribution"] == "normal":
+        amount = rng.gauss(deposit["mean"], deposit["sd"])
+    else:
+        amount = rng.lognormvariate(math.log(deposit["median"]), deposit["sigma"])
+    return round(max(amount, MIN_DEPOSIT_AMOUNT), 2)
+
+
+def tenant_headers(tenant_id):
+    """A fresh copy of the request headers for tenant_id."""
+    return {**HEADERS, "Fineract-Platform-TenantId": tenant_id}
+
+
+def savings_product_name(tenant_id):
+    return f"{tenant_id}-savings"
+
+
+class TenantContext:
+    """
+    Everything one tenant's provisioning uses: its own headers, client numbers, process date
+    and, once prepare_tenant() has run, its savings product. Nothing in it is shared with
+    other tenants, so tenants can be provisioned side by side.
+    """
+
+    def __init__(self, tenant_id, client_numbers):
+        self.tenant_id = tenant_id
+        self.headers = tenant_headers(tenant_id)
+        self.client_numbers = client_numbers
+        self.process_date_str = datetime.datetime.now().strftime(DATE_FORMAT)
+        self.savings_product_id = None
+
+# --- Logging ---
+# Per-step messages are DEBUG (shown with --verbose); tenant level progress is INFO; --quiet shows
+# only errors and the periodic progress lines, which use their own level above ERROR.
+PROGRESS = 45
+logging.addLevelName(PROGRESS, "PROGRESS")
+LOG_FLUSH_INTERVAL = 0.5 # Seconds buffered log lines may wait before being written
+LOG_FLUSH_LINES = 1000 # Buffered lines that trigger a write straight away
+PROGRESS_INTERVAL = 5.0 # Seconds between progress lines
+
+log = logging.getLogger("mifos-seeding")
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, msg, thread and any extra={...} fields."""
+
+    STANDARD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+    def format(self, record):
+        entry = {"ts": round(record.created, 3), "level": record.levelname.lower(),
+                 "msg": record.getMessage(), "thread": record.threadName}
+        entry.update((key, value) for key, value in vars(record).items() if key not in self.STANDARD_ATTRIBUTES)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class BufferedStreamHandler(logging.StreamHandler):
+    """
+    Collects formatted lines and writes them to the stream in one call, from a background
+    thread every LOG_FLUSH_INTERVAL seconds or as soon as LOG_FLUSH_LINES are waiting.
+    ERROR and above wake that thread at once. Workers format outside any lock and hold a
+    lock of the list only to append a line; the flusher holds it only to swap the list, and
+    writes under a separate write lock, which keeps the batches in order. Neither is the
+    handler lock, which logging.shutdown() holds while it flushes and closes the handler.
+    """
+
+    def __init__(self, stream=None):
+        super().__init__(stream)
+        self._lines = []
+        self._lines_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event() # Not _closed, which logging.Handler.close() sets to True
+        self._flusher = threading.Thread(target=self._flush_periodically, name="log-flusher", daemon=True)
+        self._flusher.start()
+
+    def handle(self, record):
+        """Like Handler.handle(), but without holding the handler lock around emit()."""
+        if not self.filter(record):
+            return False
+        self.emit(record)
+        return True
+
+    def emit(self, record):
+        try:
+            line = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        with self._lines_lock:
+            self._lines.append(line)
+            waiting = len(self._lines)
+        if record.levelno >= logging.ERROR or waiting >= LOG_FLUSH_LINES:
+            self._wake.set()
+
+    def flush(self):
+        with self._write_lock:
+            with self._lines_lock:
+                lines, self._lines = self._lines, []
+            if lines:
+                self.stream.write("\n".join(lines) + "\n")
+            if self.stream and hasattr(self.stream, "flush"):
+                self.stream.flush()
+
+    def _flush_periodically(self):
+        while not self._stopped.is_set():
+            self._wake.wait(LOG_FLUSH_INTERVAL)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        self._stopped.set()
+        self._wake.set()
+        self._flusher.join()
+        self.flush()
+        super().close()
+
+
+def setup_logging(level=logging.INFO, log_format="text", log_file=None):
+    """Sends the generator's log records to stderr (or log_file) through a BufferedStreamHandler."""
+    stream = open(log_file, "a", encoding="utf-8") if log_file else sys.stderr
+    handler = BufferedStreamHandler(stream)
+    if log_format == "json":
+        handler.setFormatter(JsonLinesFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)-8s %(message)s"))
+    log.handlers[:] = [handler]
+    log.setLevel(level)
+    log.propagate = False
+
+
+# --- HTTP session layer ---
+DEFAULT_POOL_SIZE = 10 # Connections kept open per host (raised to --workers if that is larger)
+
+# Counts real TCP/TLS connects per (scheme, host, port); requests made on an
+# already open connection do not show up here, which is how reuse is measured.
+connections_opened = collections.Counter()
+connections_opened_lock = threading.Lock()
+
+
+class _CountingConnectionMixin:
+    scheme = "http"
+
+    def connect(self):
+        super().connect()
+        with connections_opened_lock:
+            connections_opened[(self.scheme, self.host, self.port)] += 1
+
+
+class _CountingHTTPConnection(_CountingConnectionMixin, urllib3.connection.HTTPConnection):
+    scheme = "http"
+
+
+class _CountingHTTPSConnection(_CountingConnectionMixin, urllib3.connection.HTTPSConnection):
+    scheme = "https"
+
+
+class _CountingHTTPConnectionPool(urllib3.connectionpool.HTTPConnectionPool):
+    ConnectionCls = _CountingHTTPConnection
+
+
+class _CountingHTTPSConnectionPool(urllib3.connectionpool.HTTPSConnectionPool):
+    ConnectionCls = _CountingHTTPSConnection
+
+
+class _CountingHTTPAdapter(requests.adapters.HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+
+def _host_key(url):
+    parts = urllib.parse.urlsplit(url)
+    default_port = 443 if parts.scheme == "https" else 80
+    return parts.scheme, parts.hostname, parts.port or default_port
+
+
+class SessionPool:
+    """
+    Keeps one requests.Session per base URL (scheme://host:port) so that connections to
+    Fineract and vNext admin are pooled and reused instead of re-opened for every call.
+    A single instance is shared by all worker threads.
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, keep_alive=True):
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self._sessions = {}
+        self._requests_sent = collections.Counter()
+        self._lock = threading.Lock()
+
+    def configure(self, pool_size, keep_alive):
+        """Changes pool settings. Sessions that already exist are closed and re-created on next use."""
+        with self._lock:
+            self.pool_size = pool_size
+            self.keep_alive = keep_alive
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+    def session_for(self, url):
+        """Returns the shared session for the base URL of url, creating it on first use."""
+        key = _host_key(url)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                adapter = _CountingHTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                if not self.keep_alive:
+                    session.headers["Connection"] = "close"
+                self._sessions[key] = session
+            return session
+
+    def request(self, method, url, **kwargs):
+        session = self.session_for(url)
+        with self._lock:
+            self._requests_sent[_host_key(url)] += 1
+        return session.request(method, url, **kwargs)
+
+    def connection_stats(self):
+        """
+        Returns {base_url: (opened, reused)} where opened is the number of new TCP/TLS
+        connections and reused is the number of requests served on an already open connection.
+        """
+        stats = {}
+        with self._lock, connections_opened_lock:
+            for key, sent in self._requests_sent.items():
+                scheme, host, port = key
+                opened = connections_opened[key]
+                stats[f"{scheme}://{host}:{port}"] = (opened, max(sent - opened, 0))
+        return stats
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+http_sessions = SessionPool()
+
+# --- Timeouts, retries and circuit breaking ---
+CONNECT_TIMEOUT = 5.0 # Seconds to wait for a TCP/TLS connection
+READ_TIMEOUT = 30.0 # Seconds to wait for a response once connected
+MAX_RETRIES = 3 # Extra attempts after a 5xx/429, connection error or timeout
+BACKOFF_BASE = 0.5 # First retry waits up to this many seconds, doubling on each retry
+BACKOFF_MAX = 30.0
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+CONFLICT_STATUS_CODES = {400, 403, 409} # Responses after which lookup_existing is checked
+
+
+def backoff_delay(attempt):
+    """Exponential backoff with full jitter for retry number attempt (1-based)."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** (attempt - 1))))
+
+
+class CircuitBreaker:
+    """
+    Tracks the outcome of the last `window` requests to one host. When at least `min_samples`
+    of them are known and the share of failures (5xx, connection errors, timeouts) reaches
+    `error_threshold`, the breaker opens and every worker calling that host waits for
+    `cooldown` seconds. Then a single probe request is let through: success closes the
+    breaker, failure opens it again. Only the probe decides; requests that were already in
+    flight when the breaker opened are not counted.
+    """
+
+    def __init__(self, name, window=20, min_samples=10, error_threshold=0.5, cooldown=10.0):
+        self.name = name
+        self.window = collections.deque(maxlen=window)
+        self.min_samples = min_samples
+        self.error_threshold = error_threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self._open_until = 0.0
+        self._probe_in_flight = False
+        self._condition = threading.Condition()
+
+    def before_request(self):
+        """
+        Blocks while the breaker is open, or while another worker's probe is in flight.
+        Returns True if this request is the probe; pass it on to record().
+        """
+        with self._condition:
+            while True:
+                if self.state == "closed":
+                    return False
+                now = time.monotonic()
+                if self.state == "open" and now >= self._open_until:
+                    self.state = "half-open"
+                if self.state == "half-open" and not self._probe_in_flight:
+                    self._probe_in_flight = True
+                    return True
+                timeout = self._open_until - now if self.state == "open" else None
+                self._condition.wait(timeout)
+
+    def record(self, success, probe=False):
+        """
+        Records a request's outcome: True for a healthy response, False for a failure of the host,
+        None when the request failed for a reason of our own, which says nothing about the host
+        (a probe that ends that way lets the next request probe instead). Must be called for
+        every before_request(), with what it returned.
+        """
+        with self._condition:
+            if probe:
+                self._probe_in_flight = False
+                if success:
+                    log.info("Circuit breaker for %s closed, resuming requests.", self.name)
+                    self.state = "closed"
+                    self.window.clear()
+                elif success is not None:
+                    self._trip()
+                self._condition.notify_all()
+                return
+            if success is None or self.state != "closed":
+                return
+            self.window.append(success)
+            failures = self.window.count(False)
+            if len(self.window) >= self.min_samples and failures / len(self.window) >= self.error_threshold:
+                self._trip()
+
+    def _trip(self):
+        self.state = "open"
+        self._open_until = time.monotonic() + self.cooldown
+        log.warning("Circuit breaker for %s opened: pausing requests for %.0fs.", self.name, self.cooldown)
+
+
+circuit_breakers = {}
+circuit_breakers_lock = threading.Lock()
+
+
+def circuit_breaker_for(url):
+    key = _host_key(url)
+    with circuit_breakers_lock:
+        breaker = circuit_breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(f"{key[0]}://{key[1]}:{key[2]}")
+            circuit_breakers[key] = breaker
+        return breaker
+
+
+# --- Adaptive concurrency ---
+ADAPTIVE_INITIAL_LIMIT = 4 # In-flight requests per host to start from
+ADAPTIVE_DEFAULT_WORKERS = 64 # --workers when --adaptive-concurrency is given without it; the limit never exceeds it
+ADAPTIVE_TARGET_P95 = 1.0 # Seconds; a window whose p95 latency is above this backs off
+ADAPTIVE_MAX_ERROR_RATE = 0.05 # A window with a larger share of 5xx/429/connection errors backs off
+ADAPTIVE_DECREASE = 0.7 # Multiplicative decrease factor
+ADAPTIVE_MIN_WINDOW = 20 # Requests per decision; the window is at least the current limit
+ADAPTIVE_SETTLE_WINDOWS = 10 # Decisions averaged for the level reported as settled
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD limit on the number of in-flight requests to one host. Requests are judged in windows
+    of max(ADAPTIVE_MIN_WINDOW, limit) responses: if the window's p95 latency is within
+    target_p95 and its error rate within max_error_rate the limit grows by one, otherwise it is
+    multiplied by ADAPTIVE_DECREASE. The limit moves between minimum and maximum and, like TCP
+    congestion control, ends up oscillating just under the host's sustainable concurrency.
+    Responses to requests sent before a decrease are not counted: they reflect the old limit
+    and would otherwise cut it again straight away.
+    """
+
+    def __init__(self, name, maximum, initial=ADAPTIVE_INITIAL_LIMIT, minimum=1,
+                 target_p95=ADAPTIVE_TARGET_P95, max_error_rate=ADAPTIVE_MAX_ERROR_RATE):
+        self.name = name
+        self.minimum = minimum
+        self.maximum = max(maximum, minimum)
+        self.limit = float(min(max(initial, minimum), self.maximum))
+        self.target_p95 = target_p95
+        self.max_error_rate = max_error_rate
+        self.history = [] # Limit after each decision
+        self._in_flight = 0
+        self._latencies = []
+        self._errors = 0
+        self._epoch = 0 # Incremented on every decrease
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """Waits for a free slot. Returns a token to pass to release()."""
+        with self._condition:
+            while self._in_flight >= int(self.limit):
+                self._condition.wait()
+            self._in_flight += 1
+            return self._epoch
+
+    def release(self, token, seconds, ok):
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+            if token != self._epoch:
+                return
+            self._latencies.append(seconds)
+            if not ok:
+                self._errors += 1
+            if len(self._latencies) >= max(ADAPTIVE_MIN_WINDOW, int(self.limit)):
+                self._decide()
+
+    def _decide(self):
+        latencies = sorted(self._latencies)
+        p95 = latencies[int(0.95 * (len(latencies) - 1))]
+        error_rate = self._errors / len(latencies)
+        previous = int(self.limit)
+        if p95 > self.target_p95 or error_rate > self.max_error_rate:
+            self.limit = max(self.minimum, self.limit * ADAPTIVE_DECREASE)
+            self._epoch += 1
+            if int(self.limit) < previous:
+                log.debug("Adaptive concurrency for %s: p95 %.0f ms, %.1f%% errors; backing off to %d in-flight requests",
+                         self.name, p95 * 1000, error_rate * 100, int(self.limit))
+        else:
+            self.limit = min(self.maximum, self.limit + 1)
+            log.debug("Adaptive concurrency for %s: p95 %.0f ms, %.1f%% errors; raising to %d in-flight requests",
+                      self.name, p95 * 1000, error_rate * 100, int(self.limit))
+        self.history.append(int(self.limit))
+        self._latencies = []
+        self._errors = 0
+
+    def settled(self):
+        """The limit averaged over the last ADAPTIVE_SETTLE_WINDOWS decisions (the current limit if there were none)."""
+        with self._condition:
+            recent = self.history[-ADAPTIVE_SETTLE_WINDOWS:] or [int(self.limit)]
+            return round(sum(recent) / len(recent))
+
+    def summary(self):
+        with self._condition:
+            history = self.history or [int(self.limit)]
+        return {"settled": self.settled(), "final": int(self.limit), "min": min(history), "max": max(history),
+                "decisions": len(self.history)}
+
+
+adaptive_concurrency = None # (maximum, initial, target_p95, max_error_rate) when --adaptive-concurrency is given
+concurrency_limiters = {}
+concurrency_limiters_lock = threading.Lock()
+
+
+def concurrency_limiter_for(url):
+    """Returns the host's AdaptiveConcurrencyLimiter, or None if adaptive concurrency is off."""
+    if adaptive_concurrency is None:
+        return None
+    key = _host_key(url)
+    with concurrency_limiters_lock:
+        limiter = concurrency_limiters.get(key)
+        if limiter is None:
+            maximum, initial, target_p95, max_error_rate = adaptive_concurrency
+            limiter = AdaptiveConcurrencyLimiter(f"{key[0]}://{key[1]}:{key[2]}", maximum, initial,
+                                                 target_p95=target_p95, max_error_rate=max_error_rate)
+            concurrency_limiters[key] = limiter
+        return limiter
+
+
+def send_request(method, url, **kwargs):
+    """http_sessions.request(), holding one of the host's adaptive concurrency slots while it runs."""
+    limiter = concurrency_limiter_for(url)
+    if limiter is None:
+        return http_sessions.request(method, url, **kwargs)
+    token = limiter.acquire()
+    started = time.perf_counter()
+    ok = False
+    try:
+        response = http_sessions.request(method, url, **kwargs)
+        ok = response.status_code not in RETRYABLE_STATUS_CODES
+        return response
+    finally:
+        limiter.release(token, time.perf_counter() - started, ok)
+
+
+# --- Request metrics ---
+class LatencyHistogram:
+    """
+    Log-scaled latency histogram: bucket i holds latencies in [GROWTH**i, GROWTH**(i+1)) microseconds,
+    so percentiles are accurate to within about 5% and memory stays constant however many
+    requests are recorded.
+    """
+    GROWTH = 1.05
+    _LOG_GROWTH = math.log(GROWTH)
+
+    def __init__(self):
+        self.buckets = collections.Counter()
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def record(self, seconds):
+        micros = max(seconds * 1e6, 1.0)
+        self.buckets[int(math.log(micros) / self._LOG_GROWTH)] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def percentile(self, fraction):
+        """Returns the latency in seconds below which `fraction` of the recorded requests fall."""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                # Upper edge of the bucket, capped by the largest value actually seen
+                return min(self.GROWTH ** (index + 1) / 1e6, self.max)
+        return self.max
+
+
+class RequestMetrics:
+    """
+    Collects, per endpoint, a latency histogram, status code counts and bytes sent/received,
+    plus per-tenant client counts and timings for a clients/sec figure. Thread safe.
+
+    Endpoints are the request method and URL path with IDs and MSISDNs replaced by
+    placeholders, e.g. "POST /savingsaccounts/{id}?command=approve".
+    """
+
+    def __init__(self):
+        self.endpoints = {}
+        self.tenants = {}
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def endpoint_name(method, url, params=None):
+        parts = urllib.parse.urlsplit(url)
+        path = parts.path
+        api_prefix = urllib.parse.urlsplit(API_BASE_URL).path
+        if path.startswith(api_prefix):
+            path = path[len(api_prefix):]
+        segments = []
+        for segment in path.split("/"):
+            if segments and segments[-1] == "MSISDN":
+                segment = "{msisdn}"
+            elif segment.isdigit():
+                segment = "{id}"
+            segments.append(segment)
+        name = f"{method} {'/'.join(segments)}"
+        query = dict(urllib.parse.parse_qsl(parts.query))
+        query.update(params or {})
+        if "command" in query:
+            name += f"?command={query['command']}"
+        return name
+
+    def record_request(self, endpoint, status, seconds, bytes_sent, bytes_received):
+        with self._lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = {"latency": LatencyHistogram(), "status": collections.Counter(), "bytes_sent": 0, "bytes_received": 0}
+                self.endpoints[endpoint] = stats
+            stats["latency"].record(seconds)
+            stats["status"][str(status)] += 1
+            stats["bytes_sent"] += bytes_sent
+            stats["bytes_received"] += bytes_received
+
+    def tenant_started(self, tenant_id):
+        with self._lock:
+            self.tenants.setdefault(tenant_id, {"succeeded": 0, "failed": 0, "started": time.monotonic(), "finished": None})
+
+    def client_totals(self):
+        """Returns (succeeded, failed) clients over all tenants so far."""
+        with self._lock:
+            return (sum(tenant["succeeded"] for tenant in self.tenants.values()),
+                    sum(tenant["failed"] for tenant in self.tenants.values()))
+
+    def tenant_progress(self, tenant_id, succeeded, failed):
+        with self._lock:
+            tenant = self.tenants[tenant_id]
+            tenant["succeeded"] += succeeded
+            tenant["failed"] += failed
+            tenant["finished"] = time.monotonic()
+
+    def to_dict(self):
+        with self._lock:
+            endpoints = {
+                endpoint: {
+                    "count": stats["latency"].count,
+                    "p50_seconds": stats["latency"].percentile(0.50),
+                    "p95_seconds": stats["latency"].percentile(0.95),
+                    "p99_seconds": stats["latency"].percentile(0.99),
+                    "max_seconds": stats["latency"].max,
+                    "total_seconds": stats["latency"].total,
+                    "status_codes": dict(stats["status"]),
+                    "bytes_sent": stats["bytes_sent"],
+                    "bytes_received": stats["bytes_received"],
+                }
+                for endpoint, stats in sorted(self.endpoints.items())
+            }
+            tenants = {}
+            for tenant_id, tenant in self.tenants.items():
+                elapsed = (tenant["finished"] or time.monotonic()) - tenant["started"]
+                tenants[tenant_id] = {
+                    "succeeded": tenant["succeeded"],
+                    "failed": tenant["failed"],
+                    "elapsed_seconds": elapsed,
+                    "clients_per_second": tenant["succeeded"] / elapsed if elapsed > 0 else 0.0,
+                }
+            return {"elapsed_seconds": time.monotonic() - self.started, "endpoints": endpoints, "tenants": tenants}
+
+    def summary_table(self):
+        data = self.to_dict()
+        lines = [
+            f"{'Endpoint':<58} {'Count':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'KB in':>9}  Status codes",
+        ]
+        for endpoint, stats in data["endpoints"].items():
+            codes = " ".join(f"{code}:{n}" for code, n in sorted(stats["status_codes"].items()))
+            lines.append(
+                f"{endpoint[:58]:<58} {stats['count']:>7} {stats['p50_seconds'] * 1000:>8.1f} "
+                f"{stats['p95_seconds'] * 1000:>8.1f} {stats['p99_seconds'] * 1000:>8.1f} "
+                f"{stats['bytes_received'] / 1024:>9.1f}  {codes}"
+            )
+        lines.append("")
+        lines.append(f"{'Tenant':<20} {'Succeeded':>10} {'Failed':>8} {'Seconds':>9} {'Clients/s':>10}")
+        for tenant_id, tenant in data["tenants"].items():
+            lines.append(
+                f"{tenant_id:<20} {tenant['succeeded']:>10} {tenant['failed']:>8} "
+                f"{tenant['elapsed_seconds']:>9.1f} {tenant['clients_per_second']:>10.2f}"
+            )
+        return "\n".join(lines)
+
+    def to_prometheus(self):
+        """Returns the metrics in the Prometheus text exposition format."""
+        data = self.to_dict()
+
+        def label(value):
+            return value.replace("\\", "\\\\").replace('"', '\\"')
+
+        lines = [
+            "# HELP gazelle_seed_request_duration_seconds Latency of API requests made by the data generator.",
+            "# TYPE gazelle_seed_request_duration_seconds summary",
+        ]
+        for endpoint, stats in data["endpoints"].items():
+            for quantile, key in (("0.5", "p50_seconds"), ("0.95", "p95_seconds"), ("0.99", "p99_seconds")):
+                lines.append(f'gazelle_seed_request_duration_seconds{{endpoint="{label(endpoint)}",quantile="{quantile}"}} {stats[key]}')
+            lines.append(f'gazelle_seed_request_duration_seconds_sum{{endpoint="{label(endpoint)}"}} {stats["total_seconds"]}')
+            lines.append(f'gazelle_seed_request_duration_seconds_count{{endpoint="{label(endpoint)}"}} {stats["count"]}')
+        lines.append("# HELP gazelle_seed_requests_total API requests made by the data generator, by status code.")
+        lines.append("# TYPE gazelle_seed_requests_total counter")
+        for endpoint, stats in data["endpoints"].items():
+            for code, n in sorted(stats["status_codes"].items()):
+                lines.append(f'gazelle_seed_requests_total{{endpoint="{label(endpoint)}",code="{code}"}} {n}')
+        lines.append("# HELP gazelle_seed_bytes_total Request and response body bytes.")
+        lines.append("# TYPE gazelle_seed_bytes_total counter")
+        for endpoint, stats in data["endpoints"].items():
+            lines.append(f'gazelle_seed_bytes_total{{endpoint="{label(endpoint)}",direction="sent"}} {stats["bytes_sent"]}')
+            lines.append(f'gazelle_seed_bytes_total{{endpoint="{label(endpoint)}",direction="received"}} {stats["bytes_received"]}')
+        lines.append("# HELP gazelle_seed_clients_total Clients onboarded per tenant.")
+        lines.append("# TYPE gazelle_seed_clients_total counter")
+        lines.append("# HELP gazelle_seed_clients_per_second Successful clients per second per tenant.")
+        lines.append("# TYPE gazelle_seed_clients_per_second gauge")
+        for tenant_id, tenant in data["tenants"].items():
+            lines.append(f'gazelle_seed_clients_total{{tenant="{label(tenant_id)}",result="succeeded"}} {tenant["succeeded"]}')
+            lines.append(f'gazelle_seed_clients_total{{tenant="{label(tenant_id)}",result="failed"}} {tenant["failed"]}')
+            lines.append(f'gazelle_seed_clients_per_second{{tenant="{label(tenant_id)}"}} {tenant["clients_per_second"]}')
+        return "\n".join(lines) + "\n"
+
+
+run_metrics = RequestMetrics()
+
+
+class ProgressReporter:
+    """
+    Logs a progress bar line with clients done, throughput, failures and ETA every interval
+    seconds while clients are onboarded, and once more when stopped. The lines use the PROGRESS
+    level, so they still show with --quiet; interval 0 turns them off.
+    """
+
+    BAR_WIDTH = 30
+
+    def __init__(self, total, interval=PROGRESS_INTERVAL):
+        self.total = total
+        self.interval = interval
+        self.started = time.monotonic()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.interval > 0 and self.total > 0:
+            self._thread = threading.Thread(target=self._run, name="progress", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.report()
+
+    def report(self):
+        succeeded, failed = run_metrics.client_totals()
+        done = min(succeeded + failed, self.total)
+        elapsed = time.monotonic() - self.started
+        rate = done / elapsed if elapsed > 0 else 0.0
+        eta = f"{(self.total - done) / rate:.0f}s" if rate > 0 else "?"
+        filled = self.BAR_WIDTH * done // self.total
+        log.log(PROGRESS, "[%s%s] %s/%s clients (%.1f%%), %.1f clients/s, %s failed, ETA %s",
+                "#" * filled, "." * (self.BAR_WIDTH - filled), done, self.total, 100.0 * done / self.total,
+                rate, failed, eta,
+                extra={"done": done, "total": self.total, "failed": failed, "clients_per_second": round(rate, 1)})
+
+    def stop(self):
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join()
+            self.report()
+
 
 # --- Helper Function for API Calls ---
-def make_api_request(method, url, headers, json_data=None, params=None):
+def make_api_request(method, url, headers, json_data=None, params=None, lookup_existing=None):
     """
     Makes an API request and handles error checking based on status codes.
     Returns the JSON response body on success (2xx/3xx with non-null JSON),
     {} for 2xx/3xx with null JSON or JSONDecodeError, and None on failure (4xx/5xx or request error).
-    Includes debug prints to trace execution.
+
+    Connection errors, timeouts and 5xx/429 responses are retried up to MAX_RETRIES times
+    with exponential backoff, and calls to a host whose circuit breaker is open wait for it.
+    A retried POST may already have been applied by the server, so if lookup_existing is
+    given it is called before every re-send, and after a 400/403/409 rejection: a non-None
+    result is returned instead of POSTing again or failing. For the same reason a DELETE
+    answered with 404 counts as done.
     """
     #print(f"DEBUG make_api_request ENTERING for {method} {url}", file=sys.stderr)
     response = None # Initialize response to None to check if one was received
+    breaker = circuit_breaker_for(url)
+    endpoint = RequestMetrics.endpoint_name(method, url, params)
 
     try:
-        # --- Step 1: Attempt the request ---
-        response = requests.request(
-            method,
-            url,
-            headers=headers,
-            json=json_data,
-            params=params,
-            verify=False # Equivalent to curl -k - Use with caution!
-        )
+        # --- Step 1: Attempt the request, retrying transient failures ---
+        for attempt in range(MAX_RETRIES + 1):
+            if attempt > 0:
+                delay = backoff_delay(attempt)
+                log.warning("Retrying %s %s in %.1fs (retry %s of %s)...", method, url, delay, attempt, MAX_RETRIES)
+                time.sleep(delay)
+                if lookup_existing is not None:
+                    existing = lookup_existing()
+                    if existing is not None:
+                        log.info("%s %s was already applied by an earlier attempt; not sending it again.", method, url)
+                        return existing
+
+            probe = breaker.before_request()
+            request_started = time.perf_counter()
+            healthy = None # Stays None if send_request fails in an unexpected way, e.g. KeyboardInterrupt
+            try:
+                response = send_request(
+                    method,
+                    url,
+                    headers=headers,
+                    json=json_data,
+                    params=params,
+                    timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+                    verify=False # Equivalent to curl -k - Use with caution!
+                )
+                healthy = response.status_code < 500
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                healthy = False
+                run_metrics.record_request(endpoint, type(e).__name__, time.perf_counter() - request_started, 0, 0)
+                if attempt == MAX_RETRIES:
+                    raise
+                log.warning("API Request Error (%s %s): %s", method, url, e)
+                continue
+            except requests.exceptions.RequestException:
+                healthy = True # A malformed request says nothing about the host's health
+                raise
+            finally:
+                # Always settle the request with the breaker, or a probe would keep the others waiting forever
+                breaker.record(healthy, probe)
+
+            run_metrics.record_request(
+                endpoint, response.status_code, time.perf_counter() - request_started,
+                len(response.request.body or b""), len(response.content)
+            )
+            if response.status_code in CONFLICT_STATUS_CODES and lookup_existing is not None:
+                # Fineract rejects a duplicate externalId or an already approved/active account with a
+                # 4xx; if the thing we asked for already exists (e.g. a rerun) treat it as done
+                existing = lookup_existing()
+                if existing is not None:
+                    log.debug("%s %s was already applied earlier; using the existing resource.", method, url)
+                    return existing
+            if response.status_code not in RETRYABLE_STATUS_CODES or attempt == MAX_RETRIES:
+                break
+            log.warning("Transient response %s from %s %s.", response.status_code, method, url)
 
         #print(f"DEBUG Received response status: {response.status_code} for {method} {url}", file=sys.stderr)
+        if method == "DELETE" and response.status_code == 404:
+            # Already gone, e.g. deleted by an earlier attempt whose response was lost
+            log.debug("%s %s: nothing to delete.", method, url)
+            return {}
 
         # --- Step 2: Check for bad status codes (4xx, 5xx) ---
         # raise_for_status() throws HTTPError (a subclass of RequestException) for 4xx/5xx.
@@ -145,8 +1173,8 @@ def make_api_request(method, url, headers, json_data=None, params=None):
             # This happens when status is 2xx/3xx (e.g., 204, 202, 200) but body is empty or non-JSON,
             # despite a potential Content-Type: application/json header.
             #print(f"DEBUG json.JSONDecodeError caught for {method} {url}. Status: {response.status_code}.", file=sys.stderr)
-            print(f"Warning: Successful response ({response.status_code}) from {url} but could not decode JSON.", file=sys.stderr)
-            print(f"Response body: '{response.text}'", file=sys.stderr)
+            log.debug("Successful response (%s) from %s but could not decode JSON. Response body: '%s'",
+                      response.status_code, url, response.text)
             # Indicate success but no parseable JSON payload.
             #print(f"DEBUG make_api_request returning {{}} due to JSONDecodeError on 2xx/3xx status for {method} {url}", file=sys.stderr)
             return {}
@@ -154,11 +1182,10 @@ def make_api_request(method, url, headers, json_data=None, params=None):
             # --- Unexpected Error During Body Reading/Parsing on Successful Status ---
             # Catches other exceptions *after* status check but *during* reading/parsing body.
             #print(f"DEBUG Unexpected Exception caught AFTER raise_for_status but DURING JSON parse for {method} {url}", file=sys.stderr)
-            print(f"Error: {e}", file=sys.stderr)
-            # Log response details if available
-            if response is not None: # Should be true here as raise_for_status passed
-                 print(f"Response Status Code: {response.status_code}", file=sys.stderr)
-                 # Be cautious printing body here if it caused the error
+            # Log response details if available (should be true here as raise_for_status passed)
+            # Be cautious printing body here if it caused the error
+            log.error("Could not read the response of %s %s (status %s): %s",
+                      method, url, response.status_code if response is not None else None, e)
             #print(f"DEBUG make_api_request returning None due to unexpected Exception during parse for {method} {url}", file=sys.stderr)
             return None # Indicate failure
 
@@ -166,39 +1193,71 @@ def make_api_request(method, url, headers, json_data=None, params=None):
         # --- General Request Errors (Network, Timeout, Connection, or HTTPError caught here) ---
         # This is a broad catch. HTTPError is a subclass and is explicitly handled first if needed.
         # This block primarily catches errors *before* a response with a status code is fully received/processed.
-        print(f"API Request Error ({method} {url}): {e}", file=sys.stderr)
         # Log response details if they exist (often not for these types of errors, unless it's an HTTPError)
         if hasattr(e, 'response') and e.response is not None:
-             # If response exists here, it's likely an HTTPError that wasn't caught above, or similar.
-             print(f"Response Status Code: {e.response.status_code}", file=sys.stderr)
-             print(f"Response Body: {e.response.text}", file=sys.stderr)
+            # If response exists here, it's likely an HTTPError that wasn't caught above, or similar.
+            # A 404 for a GET is how lookups learn that something does not exist yet, not an error.
+            level = logging.DEBUG if method == "GET" and e.response.status_code == 404 else logging.ERROR
+            log.log(level, "API Request Error (%s %s): %s. Response Body: %s", method, url, e, e.response.text)
+        else:
+            log.error("API Request Error (%s %s): %s", method, url, e)
         return None
 
     except Exception as e:
         # --- Any Other Truly Unhandled Error ---
-        print(f"An unhandled error occurred during API request ({method} {url}): {e}", file=sys.stderr)
+        log.error("An unhandled error occurred during API request (%s %s): %s", method, url, e)
         return None
     # finally:
 
+# --- Idempotency lookups used before re-sending a POST ---
+def find_by_external_id(list_url, headers, external_id, id_key):
+    """
+    Looks up a client or savings account by its externalId.
+    Returns {id_key: id} if it exists, None otherwise.
+    """
+    response_data = make_api_request("GET", list_url, headers, params={"externalId": external_id})
+    if isinstance(response_data, dict):
+        items = response_data.get("pageItems", [])
+    elif isinstance(response_data, list):
+        items = response_data
+    else:
+        return None
+    for item in items:
+        if item.get("externalId") == external_id and item.get("id") is not None:
+            return {id_key: item["id"], "resourceId": item["id"]}
+    return None
+
+
+def savings_account_reached(headers, account_id, check):
+    """
+    Fetches a savings account and returns {"savingsId": account_id} if check(account) is true,
+    None otherwise. Used to see whether an approve/activate/deposit already went through.
+    """
+    response_data = make_api_request("GET", f"{SAVINGS_API_URL}/{account_id}", headers)
+    if isinstance(response_data, dict) and check(response_data):
+        return {"savingsId": account_id, "resourceId": account_id}
+    return None
+
+
 # --- Function to create a savings product ---
-def create_savings_product(headers):
+def create_savings_product(headers, product_name):
     """
     Attempts to find an existing savings product by short name first.
     If not found, creates a new savings product.
     Returns the product ID on success, None on failure.
     """
-    print(f"Attempting to find existing product with short name '{PRODUCT_SHORTNAME}'...", file=sys.stderr)
+    log.debug("Attempting to find existing product with short name '%s'...", PRODUCT_SHORTNAME)
     existing_product_id = get_product_id_by_shortname(headers, PRODUCT_SHORTNAME)
 
     if existing_product_id is not None:
         # Product found, return its ID
-        print(f"Savings product with short name '{PRODUCT_SHORTNAME}' already exists. Using existing ID: {existing_product_id}", file=sys.stderr)
+        log.info("Savings product with short name '%s' already exists. Using existing ID: %s", PRODUCT_SHORTNAME, existing_product_id)
         return existing_product_id
     else:
         # Product not found, proceed to create it
-        print(f"Savings product with short name '{PRODUCT_SHORTNAME}' not found. Proceeding to create...", file=sys.stderr)
+        log.info("Savings product with short name '%s' not found. Proceeding to create...", PRODUCT_SHORTNAME)
         product_payload = {
-            "name": PRODUCT_NAME,
+            "name": product_name,
             "shortName": PRODUCT_SHORTNAME,
             "currencyCode": PRODUCT_CURRENCY_CODE,
             "digitsAfterDecimal": 2,
@@ -214,19 +1273,22 @@ def create_savings_product(headers):
         }
         # print(f"Product payload: {json.dumps(product_payload, indent=2)}", file=sys.stderr) # Debugging payload
 
-        response_data = make_api_request("POST", SAVINGS_PRODUCTS_API_URL, headers, json_data=product_payload)
+        response_data = make_api_request(
+            "POST", SAVINGS_PRODUCTS_API_URL, headers, json_data=product_payload,
+            lookup_existing=lambda: existing_product(headers, PRODUCT_SHORTNAME)
+        )
 
         if response_data:
             product_id = response_data.get('resourceId')
             if product_id is not None:
-                print(f"Savings product creation successful. Product ID: {product_id}", file=sys.stderr)
+                log.info("Savings product creation successful. Product ID: %s", product_id)
                 return product_id
             else:
-                print(f"Error: 'resourceId' not found in successful product creation response.", file=sys.stderr)
+                log.error("'resourceId' not found in successful product creation response.")
                 return None
         else:
             # Creation failed for reasons other than already existing
-            print("Savings product creation failed after not finding an existing one.", file=sys.stderr)
+            log.error("Savings product creation failed after not finding an existing one.")
             return None
 
 
@@ -258,39 +1320,191 @@ def get_product_id_by_shortname(headers, shortname):
         return None
 
 
-# --- Function to create a client ---
-# Added locale as an argument
-def create_client(headers, locale, tenant_id):
+def existing_product(headers, shortname):
+    """Returns {"resourceId": id} if a product with shortname exists, None otherwise (for lookup_existing)."""
+    product_id = get_product_id_by_shortname(headers, shortname)
+    return {"resourceId": product_id} if product_id is not None else None
+
+
+# --- Per-tenant reference data ---
+METADATA_TTL = 3600.0 # Seconds a tenant's resolved ids are used before they are looked up again
+METADATA_DEFAULTS = {
+    "payment_type_id": DEFAULT_PAYMENT_TYPE_ID,
+    "office_id": DEFAULT_OFFICE_ID,
+    "legal_form_id": DEFAULT_LEGAL_FORM_ID,
+}
+
+
+def pick_reference_id(headers, url, preferred_id, description, options_key=None):
     """
-    Creates a client in Fineract.
-    Returns the client ID on success, None on failure.
+    Fetches a Fineract reference list (or the options_key list of a template) and returns
+    preferred_id if it is in it, otherwise the first id listed.
+    Returns None if the list could not be fetched or is empty.
+    """
+    response_data = make_api_request("GET", url, headers)
+    if options_key is not None and isinstance(response_data, dict):
+        response_data = response_data.get(options_key)
+    if not isinstance(response_data, list):
+        log.warning("Could not fetch the %s list.", description)
+        return None
+    ids = [option.get("id") for option in response_data if isinstance(option, dict) and option.get("id") is not None]
+    if preferred_id in ids:
+        return preferred_id
+    if not ids:
+        log.warning("No %s is defined.", description)
+        return None
+    log.warning("%s %s does not exist; using %s instead.", description, preferred_id, ids[0])
+    return ids[0]
+
+
+def resolve_tenant_metadata(headers, tenant_id):
+    """
+    Finds or creates the tenant's savings product and checks the payment type, office and
+    legal form ids the client chains use. Returns (metadata, complete), where complete is False
+    if a reference list could not be fetched and its default id was assumed; None if there is
+    no savings product.
+    """
+    savings_product_id = create_savings_product(headers, savings_product_name(tenant_id))
+    if savings_product_id is None:
+        return None
+    metadata = {"savings_product_id": savings_product_id}
+    complete = True
+    lookups = {
+        "payment_type_id": (PAYMENT_TYPES_API_URL, "payment type", None),
+        "office_id": (OFFICES_API_URL, "office", None),
+        "legal_form_id": (CLIENTS_TEMPLATE_API_URL, "legal form", "clientLegalFormOptions"),
+    }
+    for name, (url, description, options_key) in lookups.items():
+        reference_id = pick_reference_id(headers, url, METADATA_DEFAULTS[name], description, options_key)
+        if reference_id is None:
+            reference_id, complete = METADATA_DEFAULTS[name], False
+        metadata[name] = reference_id
+    metadata["resolved_at"] = time.time()
+    return metadata, complete
+
+
+class TenantMetadataCache:
+    """
+    The ids every client chain of a tenant needs (savings product, payment type, office and
+    legal form), resolved once per tenant and shared by all workers.
+
+    Entries are reused for ttl seconds. With a path the cache is also kept in a JSON file,
+    {"<Fineract API base>|<tenant>": {"savings_product_id": 3, ..., "resolved_at": <epoch>}},
+    so a later run only has to check that the cached product still exists instead of
+    listing every product and reference table again. Entries for which a reference list
+    could not be fetched are kept in memory only.
     """
-    # Track how many clients created per tenant
-    count = tenant_client_counter.get(tenant_id, 0)
-    tenant_client_counter[tenant_id] = count + 1
 
-    # Deterministic name generation
-    seed_str = f"{tenant_id}-{count}"
-    seed = int(hashlib.sha256(seed_str.encode()).hexdigest(), 16) % (10 ** 8)
-    #rng = random.Random(seed)
-    rng = random.Random()  # Create a new Random instance with the seed
+    def __init__(self, path=None, ttl=METADATA_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._entries = {}
+        self._checked = set() # Keys whose entry was resolved or validated by this process
+        self._lock = threading.Lock()
+        self._tenant_locks = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as cache_file:
+                    self._entries = json.load(cache_file)
+            except (OSError, json.JSONDecodeError) as e:
+                log.warning("Ignoring unreadable metadata cache %s: %s", path, e)
+
+    @staticmethod
+    def _key(tenant_id):
+        return f"{API_BASE_URL}|{tenant_id}"
+
+    def get(self, tenant_id, headers):
+        """
+        Returns the tenant's metadata, resolving it if it is missing or older than the TTL.
+        An entry loaded from the file is used once its savings product has been found again.
+        Returns None if the tenant's savings product could not be found or created.
+        """
+        key = self._key(tenant_id)
+        with self._lock:
+            tenant_lock = self._tenant_locks.setdefault(key, threading.Lock())
+        with tenant_lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry.get("resolved_at", 0) < self.ttl:
+                if key in self._checked or self._product_exists(headers, entry.get("savings_product_id")):
+                    self._checked.add(key)
+                    return entry
+                log.info("Cached savings product for tenant %s no longer exists; looking it up again.", tenant_id)
+            resolved = resolve_tenant_metadata(headers, tenant_id)
+            if resolved is None:
+                self.invalidate(tenant_id)
+                return None
+            entry, complete = resolved
+            with self._lock:
+                self._entries[key] = entry
+                self._checked.add(key)
+            if complete:
+                self._save()
+            return entry
+
+    def cached(self, tenant_id):
+        """The tenant's metadata as last resolved by get(), or {} if it has not been."""
+        key = self._key(tenant_id)
+        return self._entries.get(key, {}) if key in self._checked else {}
+
+    def invalidate(self, tenant_id=None):
+        """
+        Drops one tenant's entry (or those of every tenant of this Fineract API base) so the next
+        get() resolves it again. Entries of other API bases sharing the file are kept.
+        """
+        with self._lock:
+            if tenant_id is None:
+                prefix = self._key("")
+                for key in [key for key in self._entries if key.startswith(prefix)]:
+                    del self._entries[key]
+                self._checked = {key for key in self._checked if not key.startswith(prefix)}
+            else:
+                self._entries.pop(self._key(tenant_id), None)
+                self._checked.discard(self._key(tenant_id))
+        self._save()
+
+    @staticmethod
+    def _product_exists(headers, product_id):
+        if product_id is None:
+            return False
+        response_data = make_api_request("GET", f"{SAVINGS_PRODUCTS_API_URL}/{product_id}", headers)
+        return isinstance(response_data, dict) and response_data.get("shortName") == PRODUCT_SHORTNAME
+
+    def _save(self):
+        if not self.path:
+            return
+        with self._lock:
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as cache_file:
+                json.dump(self._entries, cache_file, indent=2)
+            os.replace(temp_path, self.path)
 
-    firstname = rng.choice(FIRST_NAMES)
-    lastname = rng.choice(LAST_NAMES)
-    # firstname = f"John{datetime.datetime.now().timestamp()}".replace('.', '')
-    # lastname = "Wick"
+
+tenant_metadata = TenantMetadataCache() # Replaced in main when --metadata-cache or --metadata-ttl is given
+
+
+def tenant_reference_id(tenant_id, name):
+    """The tenant's resolved payment_type_id, office_id or legal_form_id, or the default if it was not resolved."""
+    return tenant_metadata.cached(tenant_id).get(name, METADATA_DEFAULTS[name])
+
+
+# --- Function to build a client payload ---
+def build_client_payload(locale, tenant_id, client_number):
+    """
+    Builds the client creation payload for client number client_number (1-based) of tenant_id.
+    Names, mobile number and externalId come from client_record(), so the same client always
+    gets the same data, whichever worker or process creates it.
+    Returns a tuple of (payload, mobile_number).
+    """
+    record = client_record(tenant_id, client_number)
+    firstname, lastname, mobile_number = record["firstname"], record["lastname"], record["mobile_number"]
     # Use the DATE_FORMAT ("%d %B %Y") to generate date strings (e.g., "16 May 2025")
     submitted_date = datetime.datetime.now().strftime(DATE_FORMAT)
     activation_date = submitted_date
-    # Generate a plausible mobile number format
-    #mobile_number = f"04{str(int(datetime.datetime.now().timestamp()))[-8:]}"
-    #mobile_number = f"04{random.randint(10000000, 99999999)}"
-    mobile_number = unique_mobile_numbers.pop(0)
-    print(f"Creating client for <{tenant_id}>: {firstname} {lastname} with Mobile Number: {mobile_number} ...", file=sys.stderr)
+    log.debug("Creating client for <%s>: %s %s with Mobile Number: %s ...", tenant_id, firstname, lastname, mobile_number)
 
     client_payload = {
-        "officeId": 1, # Assuming officeId 1 exists
-        "legalFormId": 1, # Assuming legalFormId 1 exists (e.g., Individual)
+        "officeId": tenant_reference_id(tenant_id, "office_id"),
+        "legalFormId": tenant_reference_id(tenant_id, "legal_form_id"),
         "firstname": firstname,
         "lastname": lastname,
         "submittedOnDate": submitted_date,
@@ -298,37 +1512,53 @@ def create_client(headers, locale, tenant_id):
         "locale": locale, # Use the passed locale argument
         "active": True,
         "activationDate": activation_date,
-        "mobileNo": mobile_number
+        "mobileNo": mobile_number,
+        "externalId": record["client_external_id"] # Lets a retried create find the client if the first attempt went through
     }
+    return client_payload, mobile_number
+
+
+# --- Function to create a client ---
+# Added locale as an argument
+def create_client(headers, locale, tenant_id, client_number):
+    """
+    Creates a client in Fineract.
+    Returns the client ID on success, None on failure.
+    """
+    client_payload, mobile_number = build_client_payload(locale, tenant_id, client_number)
     # print(f"Client payload: {json.dumps(client_payload, indent=2)}", file=sys.stderr) # Debugging payload
 
-    response_data = make_api_request("POST", CLIENTS_API_URL, headers, json_data=client_payload)
+    response_data = make_api_request(
+        "POST", CLIENTS_API_URL, headers, json_data=client_payload,
+        lookup_existing=lambda: find_by_external_id(CLIENTS_API_URL, headers, client_payload["externalId"], "clientId")
+    )
 
     if response_data:
         client_id = response_data.get('clientId')
         if client_id is not None:
-            print(f"Client creation successful. Client ID: {client_id}", file=sys.stderr)
+            log.debug("Client creation successful. Client ID: %s", client_id)
             return client_id, mobile_number # Return both ID and mobile number
         else:
-            print(f"Error: 'clientId' not found in successful client creation response.", file=sys.stderr)
+            log.error("'clientId' not found in successful client creation response.")
             return None, None
     else:
-        print("Client creation failed.", file=sys.stderr)
+        log.error("Client creation failed.")
         return None, None
 
 
 # --- Function to create a savings account ---
 # Added locale as an argument
-def create_savings_account(headers, client_id, product_id, locale):
+def create_savings_account(headers, client_id, product_id, locale, external_id=None):
     """
-    Creates a savings account for a client.
+    Creates a savings account for a client, with external_id (a new UUID if not given).
     Returns a tuple of (accountId, externalId) on success, (None, None) on failure.
     """
-    external_id = str(uuid.uuid4())
+    if external_id is None:
+        external_id = str(uuid.uuid4())
     # Use the DATE_FORMAT ("%d %B %Y") to generate date strings (e.g., "16 May 2025")
     submitted_date = datetime.datetime.now().strftime(DATE_FORMAT)
 
-    print(f"Creating savings account for Client ID: {client_id} using Product ID: {product_id} with External ID: {external_id} ...", file=sys.stderr)
+    log.debug("Creating savings account for Client ID: %s using Product ID: %s with External ID: %s ...", client_id, product_id, external_id)
 
     savings_payload = {
         "clientId": client_id,
@@ -339,19 +1569,22 @@ def create_savings_account(headers, client_id, product_id, locale):
         "submittedOnDate": submitted_date
     }
     #print(f"Savings account payload: {json.dumps(savings_payload, indent=2)}", file=sys.stderr) # Debugging payload
-    response_data = make_api_request("POST", SAVINGS_API_URL, headers, json_data=savings_payload)
+    response_data = make_api_request(
+        "POST", SAVINGS_API_URL, headers, json_data=savings_payload,
+        lookup_existing=lambda: find_by_external_id(SAVINGS_API_URL, headers, external_id, "savingsId")
+    )
     #print(f"Savings account response data: {response_data}", file=sys.stderr) # Debugging response
 
     if response_data:
         savings_id = response_data.get('savingsId')
         if savings_id is not None:
-            print(f"Savings account creation successful. Account ID: {savings_id} External ID {external_id}", file=sys.stderr)
+            log.debug("Savings account creation successful. Account ID: %s External ID %s", savings_id, external_id)
             return savings_id, external_id
         else:
-            print(f"Error: 'savingsId' not found in successful savings account creation response.", file=sys.stderr)
+            log.error("'savingsId' not found in successful savings account creation response.")
             return None, None
     else:
-        print("Savings account creation failed.", file=sys.stderr)
+        log.error("Savings account creation failed.")
         return None ,None
 
 
@@ -385,17 +1618,22 @@ def approve_savings_account(api_base_url, headers, account_id, approved_on_date_
         "approvedOnDate": approved_on_date_str # Use the passed/generated date string
     }
 
-    print(f"Attempting to approve savings account ID: {account_id} with date {approved_on_date_str}...", file=sys.stderr)
+    log.debug("Attempting to approve savings account ID: %s with date %s...", account_id, approved_on_date_str)
 
     # Use the existing make_api_request helper
-    response_data = make_api_request("POST", url, headers, json_data=body)
+    response_data = make_api_request(
+        "POST", url, headers, json_data=body,
+        lookup_existing=lambda: savings_account_reached(
+            headers, account_id, lambda account: account.get("status", {}).get("approved") or account.get("status", {}).get("active")
+        )
+    )
 
     # make_api_request returns None on failure, or the response dict on success
     if response_data is not None:
-        print(f"Approval request for account ID {account_id} completed.", file=sys.stderr)
+        log.debug("Approval request for account ID %s completed.", account_id)
         return response_data
     else:
-        print(f"Approval request for account ID {account_id} failed.", file=sys.stderr)
+        log.error("Approval request for account ID %s failed.", account_id)
         return None
 
 # --- Function to activate a savings account ---
@@ -428,17 +1666,22 @@ def activate_savings_account(api_base_url, headers, account_id, activated_on_dat
         "activatedOnDate": activated_on_date_str # Use the passed/generated date string
     }
 
-    print(f"Attempting to activate savings account ID: {account_id} with date {activated_on_date_str}...", file=sys.stderr)
+    log.debug("Attempting to activate savings account ID: %s with date %s...", account_id, activated_on_date_str)
 
     # Use the existing make_api_request helper
-    response_data = make_api_request("POST", url, headers, json_data=body)
+    response_data = make_api_request(
+        "POST", url, headers, json_data=body,
+        lookup_existing=lambda: savings_account_reached(
+            headers, account_id, lambda account: account.get("status", {}).get("active")
+        )
+    )
 
     # make_api_request returns None on failure, or the response dict on success
     if response_data is not None:
-        print(f"Activation request for account ID {account_id} completed.", file=sys.stderr)
+        log.debug("Activation request for account ID %s completed.", account_id)
         return response_data
     else:
-        print(f"Activation request for account ID {account_id} failed.", file=sys.stderr)
+        log.error("Activation request for account ID %s failed.", account_id)
         return None
 
 # --- Function to make a deposit to a savings account ---
@@ -475,18 +1718,24 @@ def make_deposit(api_base_url, headers, account_id, amount, transaction_date_str
         "paymentTypeId": payment_type_id
     }
 
-    print(f"Attempting to make a deposit of {amount} to savings account ID: {account_id} on {transaction_date_str}...", file=sys.stderr)
+    log.debug("Attempting to make a deposit of %s to savings account ID: %s on %s...", amount, account_id, transaction_date_str)
 
     # Use the existing make_api_request helper
-    response_data = make_api_request("POST", url, headers, json_data=body)
+    # A retry is skipped if the account already shows a deposit of at least this amount
+    response_data = make_api_request(
+        "POST", url, headers, json_data=body,
+        lookup_existing=lambda: savings_account_reached(
+            headers, account_id, lambda account: account.get("summary", {}).get("totalDeposits", 0) >= amount
+        )
+    )
 
     # make_api_request returns None on failure, or the response dict on success
     if response_data is not None:
-        print(f"Deposit request for account ID {account_id} completed.", file=sys.stderr)
+        log.debug("Deposit request for account ID %s completed.", account_id)
         # Deposit transaction returns a resourceId and changesId
         return response_data
     else:
-        print(f"Deposit request for account ID {account_id} failed.", file=sys.stderr)
+        log.error("Deposit request for account ID %s failed.", account_id)
         return None
 
 
@@ -498,152 +1747,1640 @@ def register_interop_party(headers, client_id, account_external_id, mobile_numbe
     Returns True on success, False on failure.
     """
     if not mobile_number:
-        print(f"Warning: Mobile number not available for Client ID: {client_id}. Skipping interoperation registration.", file=sys.stderr)
+        log.warning("Mobile number not available for Client ID: %s. Skipping interoperation registration.", client_id)
         return False
 
     interop_url = f"{INTEROP_PARTIES_API_URL}/{mobile_number}"
-    print(f"Registering interoperation party for Client ID: {client_id} with External Account ID: {account_external_id} and MSISDN: {mobile_number} at URL: {interop_url} ...", file=sys.stderr)
+    log.debug("Registering interoperation party for Client ID: %s with External Account ID: %s and MSISDN: %s at URL: %s ...", client_id, account_external_id, mobile_number, interop_url)
 
     interop_payload = {
         "accountId": account_external_id
     }
 
     # Interop registration might return 204 No Content on success, or JSON
-    response_data = make_api_request("POST", interop_url, headers, json_data=interop_payload)
+    response_data = make_api_request(
+        "POST", interop_url, headers, json_data=interop_payload,
+        lookup_existing=lambda: interop_party_registered(headers, mobile_number, account_external_id)
+    )
 
     # make_api_request returns None on failure, or the response dict/{} on success
     if response_data is not None:
-        print("Interoperation party registration successful.", file=sys.stderr)
+        log.debug("Interoperation party registration successful.")
         return True
     else:
-        print("Interoperation party registration failed.", file=sys.stderr)
+        log.error("Interoperation party registration failed.")
         return False
 
+def interop_party_registered(headers, mobile_number, account_external_id):
+    """Returns the party if mobile_number is already registered to account_external_id, None otherwise."""
+    response_data = make_api_request("GET", f"{INTEROP_PARTIES_API_URL}/{mobile_number}", headers)
+    if isinstance(response_data, dict) and response_data.get("accountId") == account_external_id:
+        return response_data
+    return None
+
+
+# --- Headers for the vNext participants API ---
+def build_vnext_headers(tenant_id):
+    return {
+        "fspiop-source": tenant_id,
+        "Date": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "Accept": "application/vnd.interoperability.participants+json;version=1.1",
+        "Content-Type": "application/vnd.interoperability.participants+json;version=1.1"
+    }
+
+
 # --- Function to register client with vNext ---
 def register_client_with_vnext(headers, tenant_id, mobile_number, currency="USD"):
     """
     Registers a client with vNext using the MSISDN/mobile number.
     Returns True on success, False on failure.
     """
-    vnext_url = f"http://vnextadmin.mifos.gazelle.test/_interop/participants/MSISDN/{mobile_number}"
+    vnext_url = f"{VNEXT_PARTICIPANTS_API_URL}/MSISDN/{mobile_number}"
     payload = {
         "fspId": tenant_id,
         "currency": currency
     }
 
-    vnext_headers = {
-        "fspiop-source": tenant_id,
-        "Date": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "Accept": "application/vnd.interoperability.participants+json;version=1.1",
-        "Content-Type": "application/vnd.interoperability.participants+json;version=1.1"
-    }
-
-    response_data = make_api_request("POST", vnext_url, vnext_headers, json_data=payload)
-    print(f"Response data from vNext: {response_data}", file=sys.stderr) # Debugging response
+    response_data = make_api_request("POST", vnext_url, build_vnext_headers(tenant_id), json_data=payload)
+    log.debug("Response data from vNext: %s", response_data) # Debugging response
 
     if response_data is not None:
-        print(f"Client with MSISDN {mobile_number} registered with vNext successfully.", file=sys.stderr)
+        log.debug("Client with MSISDN %s registered with vNext successfully.", mobile_number)
         return True
     else:
-        print(f"Failed to register client with MSISDN {mobile_number} with vNext.", file=sys.stderr)
+        log.error("Failed to register client with MSISDN %s with vNext.", mobile_number)
         return False
 
 
-# --- Main Execution ---
-if __name__ == "__main__":
-    for tenant_id, num_clients in TENANTS.items():
-        print(f"Processing tenant: {tenant_id}", file=sys.stderr)
-        
-        # Update the tenant ID and headers for each tenant
-        HEADERS["Fineract-Platform-TenantId"] = tenant_id
-        PRODUCT_NAME = f"{tenant_id}-savings"
-        PRODUCT_DESCRIPTION = f"Savings product for {tenant_id} demo"
-
-        # Define the date string used for various operations, formatted as per DATE_FORMAT
-        PROCESS_DATE_STR = datetime.datetime.now().strftime(DATE_FORMAT)
-
-        print("Attempting to create or find savings product...", file=sys.stderr)
-        savings_product_id = create_savings_product(HEADERS)
-
-        if savings_product_id is None:
-            print(f"Fatal error: Could not create or find savings product for tenant {tenant_id}. Skipping.", file=sys.stderr)
+# --- Run journal for resumable seeding ---
+# Stages a client goes through, in order. A client is complete once all are journalled.
+JOURNAL_STAGES = ("client", "savings_account", "approved", "activated", "deposited", "interop_party", "vnext")
+
+
+class SeedingJournal:
+    """
+    Append-only JSONL file with one line per completed pipeline stage of each client, e.g.
+    {"tenant": "bluebank", "client": 7, "stage": "savings_account", "savings_id": 12, "external_id": "..."}
+    The first line of a run records the settings that decide client identity (the MSISDN seed).
+    Lines are flushed as they are written, so a crashed run loses at most the step in flight.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def write(self, entry):
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def record(self, tenant_id, client_number, stage, **data):
+        self.write({"tenant": tenant_id, "client": client_number, "stage": stage, **data})
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    @staticmethod
+    def load(path):
+        """
+        Replays a journal. Returns (settings, progress) where settings is the run line and
+        progress maps (tenant_id, client_number) -> {"stages": set(...), <ids recorded so far>}.
+        A torn last line (crash while writing) is ignored.
+        """
+        settings = {}
+        progress = {}
+        with open(path, encoding="utf-8") as journal_file:
+            for line in journal_file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if "run" in entry:
+                    settings = entry["run"]
+                    continue
+                state = progress.setdefault((entry.pop("tenant"), entry.pop("client")), {"stages": set()})
+                state["stages"].add(entry.pop("stage"))
+                state.update(entry)
+        return settings, progress
+
+
+journal = None # SeedingJournal when --journal is given
+resume_progress = {} # (tenant_id, client_number) -> progress replayed from the journal on --resume
+
+
+def journal_record(tenant_id, client_number, stage, **data):
+    if journal is not None:
+        journal.record(tenant_id, client_number, stage, **data)
+
+
+# --- Bulk vNext Oracle registration ---
+VNEXT_BULK_RETRIES = 3 # Times an unconfirmed entry is re-sent in bulk before falling back to a single POST
+VNEXT_BULK_LINGER = 0.5 # Seconds a partly filled chunk waits for more MSISDNs before it is sent anyway
+VNEXT_BULK_CONFIRM_DELAY = 0.25 # Seconds after a bulk request before its accepted entries are checked
+VNEXT_BULK_CONFIRM_WORKERS = 8 # Concurrent GETs checking accepted entries (and fallback POSTs)
+
+
+class VnextBulkRegistrar:
+    """
+    Buffers MSISDNs per fspId (tenant) and registers them with the vNext Oracle using the
+    bulk FSPIOP form, POST /participants with a partyList, one request per chunk_size entries.
+    A background thread sends each chunk once it is full or VNEXT_BULK_LINGER old, so seeding
+    workers never wait on the Oracle; flush() sends the rest and waits for everything.
+
+    FSPIOP bulk registration is asynchronous: a 202 only means the request was taken, and the
+    per-party results go to the PUT /participants/{requestId} callback, which a script cannot
+    receive. So each accepted entry is checked once with GET /participants/MSISDN/{msisdn},
+    VNEXT_BULK_CONFIRM_DELAY after its bulk request, and only journalled if it is registered to
+    the tenant. One that is missing goes back into the tenant's buffer to be re-sent with the
+    next chunk, up to VNEXT_BULK_RETRIES times. Whatever still fails, every entry registered to
+    another fspId and every entry of a bulk request that was rejected as a whole (e.g. by an
+    Oracle without bulk support) is registered one MSISDN at a time with register_client_with_vnext.
+    """
+
+    def __init__(self, chunk_size, currency="USD"):
+        self.chunk_size = chunk_size
+        self.currency = currency
+        self.registered = 0
+        self.failed = 0
+        self._buffers = collections.defaultdict(list) # tenant_id -> [(client_number, mobile_number, attempt)]
+        self._buffered_since = {} # tenant_id -> when its oldest buffered entry was added
+        self._posted = collections.deque() # (check time, tenant_id, entries accepted by one bulk request)
+        self._checking = 0 # entries whose check is in progress
+        self._single = [] # (tenant_id, entry) to register one at a time
+        self._flushing = False
+        self._condition = threading.Condition()
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=VNEXT_BULK_CONFIRM_WORKERS, thread_name_prefix="vnext-check")
+        self._sender = threading.Thread(target=self._send_chunks, name="vnext-bulk", daemon=True)
+        self._sender.start()
+
+    def add(self, tenant_id, client_number, mobile_number):
+        """Queues one MSISDN for the background thread."""
+        self._buffer(tenant_id, (client_number, mobile_number, 0))
+
+    def flush(self):
+        """Sends every partially filled chunk and waits until each entry is registered or has failed."""
+        with self._condition:
+            self._flushing = True
+            self._condition.notify()
+        self._sender.join()
+        self._executor.shutdown()
+        if self._single:
+            log.info("Registering %s MSISDNs with vNext one at a time...", len(self._single))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=VNEXT_BULK_CONFIRM_WORKERS) as executor:
+            for succeeded in executor.map(self._register_single, self._single):
+                self.registered += succeeded
+                self.failed += not succeeded
+        self._single = []
+
+    def _buffer(self, tenant_id, entry):
+        with self._condition:
+            buffer = self._buffers[tenant_id]
+            buffer.append(entry)
+            self._buffered_since.setdefault(tenant_id, time.monotonic())
+            if len(buffer) >= self.chunk_size:
+                self._condition.notify()
+
+    def _send_chunks(self):
+        """
+        Background thread: sends the chunks that are full or have lingered long enough (all of
+        them once flushing) and starts the checks that have come due, until nothing is left.
+        """
+        while True:
+            with self._condition:
+                while True:
+                    now = time.monotonic()
+                    chunks = self._take_ready_chunks(now)
+                    due = self._posted and self._posted[0][0] <= now
+                    if chunks or due:
+                        break
+                    if self._flushing and not self._posted and not self._checking and not self._buffers:
+                        return
+                    deadlines = [since + VNEXT_BULK_LINGER for since in self._buffered_since.values()]
+                    if self._posted:
+                        deadlines.append(self._posted[0][0])
+                    self._condition.wait(max(min(deadlines) - now, 0.0) if deadlines else None)
+            for tenant_id, chunk in chunks:
+                self._post_chunk(tenant_id, chunk)
+            self._start_checks(time.monotonic())
+
+    def _take_ready_chunks(self, now):
+        chunks = []
+        for tenant_id in list(self._buffers):
+            buffer = self._buffers[tenant_id]
+            while len(buffer) >= self.chunk_size:
+                chunks.append((tenant_id, buffer[:self.chunk_size]))
+                del buffer[:self.chunk_size]
+            if buffer and (self._flushing or now - self._buffered_since[tenant_id] >= VNEXT_BULK_LINGER):
+                chunks.append((tenant_id, buffer[:]))
+                buffer.clear()
+            if not buffer:
+                del self._buffers[tenant_id]
+                self._buffered_since.pop(tenant_id, None)
+        return chunks
+
+    def _post_chunk(self, tenant_id, chunk):
+        """Sends one bulk request and schedules the check of its accepted entries."""
+        log.debug("Registering %s MSISDNs for %s with vNext in bulk...", len(chunk), tenant_id)
+        payload = {
+            "requestId": str(uuid.uuid4()),
+            "partyList": [
+                {"partyIdType": "MSISDN", "partyIdentifier": mobile_number, "fspId": tenant_id}
+                for _, mobile_number, _ in chunk
+            ],
+            "currency": self.currency
+        }
+        response_data = make_api_request("POST", VNEXT_PARTICIPANTS_API_URL, build_vnext_headers(tenant_id), json_data=payload)
+        # Usually an empty 202 Accepted; an Oracle that answers with the partyList marks the
+        # entries it rejected with errorInformation
+        failed_numbers = set()
+        if isinstance(response_data, dict):
+            for party in response_data.get("partyList", []):
+                if party.get("errorInformation"):
+                    party_id = party.get("partyId", party)
+                    failed_numbers.add(party_id.get("partyIdentifier"))
+        if response_data is None or len(failed_numbers) >= len(chunk):
+            # Re-sending a bulk request that failed as a whole will not help
+            with self._condition:
+                self._single.extend((tenant_id, entry) for entry in chunk)
+            return
+        for entry in chunk:
+            if entry[1] in failed_numbers:
+                self._retry(tenant_id, entry)
+        with self._condition:
+            self._posted.append((time.monotonic() + VNEXT_BULK_CONFIRM_DELAY, tenant_id,
+                                 [entry for entry in chunk if entry[1] not in failed_numbers]))
+
+    def _start_checks(self, now):
+        with self._condition:
+            due = []
+            while self._posted and self._posted[0][0] <= now:
+                _, tenant_id, entries = self._posted.popleft()
+                due.extend((tenant_id, entry) for entry in entries)
+            self._checking += len(due)
+        for tenant_id, entry in due:
+            self._executor.submit(self._check, tenant_id, entry)
+
+    def _check(self, tenant_id, entry):
+        """Journals entry if the Oracle has it registered to tenant_id, otherwise re-sends it."""
+        client_number, mobile_number, _ = entry
+        try:
+            fsp_id = oracle_fsp_id(make_api_request(
+                "GET", f"{VNEXT_PARTICIPANTS_API_URL}/MSISDN/{mobile_number}", build_vnext_headers(tenant_id)))
+            if fsp_id == tenant_id:
+                journal_record(tenant_id, client_number, "vnext")
+                with self._condition:
+                    self.registered += 1
+                return
+            if fsp_id is None:
+                self._retry(tenant_id, entry)
+                return
+            # Taken by another fspId: re-sending in bulk cannot change that, the single POST reports it
+            log.error("MSISDN %s is registered with vNext to %s, not %s.", mobile_number, fsp_id, tenant_id)
+            with self._condition:
+                self._single.append((tenant_id, entry))
+        finally:
+            with self._condition:
+                self._checking -= 1
+                self._condition.notify()
+
+    def _retry(self, tenant_id, entry):
+        client_number, mobile_number, attempt = entry
+        if attempt < VNEXT_BULK_RETRIES:
+            log.debug("Bulk vNext registration of MSISDN %s failed or was not confirmed, re-sending it.", mobile_number)
+            self._buffer(tenant_id, (client_number, mobile_number, attempt + 1))
+        else:
+            with self._condition:
+                self._single.append((tenant_id, entry))
+
+    def _register_single(self, item):
+        tenant_id, (client_number, mobile_number, _) = item
+        if register_client_with_vnext(None, tenant_id, mobile_number, self.currency):
+            journal_record(tenant_id, client_number, "vnext")
+            return True
+        return False
+
+
+vnext_registrar = None # VnextBulkRegistrar when --vnext-bulk-size is given
+
+
+def register_vnext_stage(headers, tenant_id, client_number, mobile_number):
+    """
+    Runs the vNext registration stage for one client: queued for bulk registration
+    when --vnext-bulk-size is set, otherwise registered right away.
+    Returns False only if an immediate registration failed.
+    """
+    if vnext_registrar is not None:
+        vnext_registrar.add(tenant_id, client_number, mobile_number)
+        return True
+    if register_client_with_vnext(headers, tenant_id, mobile_number):
+        journal_record(tenant_id, client_number, "vnext")
+        return True
+    return False
+
+
+# --- Fineract batch API ---
+def _batch_request(request_id, relative_url, body, reference=None):
+    request = {
+        "requestId": request_id,
+        "relativeUrl": relative_url,
+        "method": "POST",
+        "headers": [{"name": "Content-Type", "value": "application/json"}],
+        "body": json.dumps(body),
+    }
+    if reference is not None:
+        request["reference"] = reference
+    return request
+
+
+def build_client_chain_batch(locale, tenant_id, client_number, product_id, process_date_str, first_request_id):
+    """
+    Builds the create client -> create savings -> approve -> activate -> deposit chain for one
+    client as Fineract /batches entries. Later entries use $.clientId / $.savingsId references
+    to the response of the entry before them, so the whole chain runs in a single round trip.
+
+    Returns a tuple of (requests, mobile_number, external_id).
+    """
+    client_payload, mobile_number = build_client_payload(locale, tenant_id, client_number)
+    external_id = client_record(tenant_id, client_number)["account_external_id"]
+    rid = first_request_id
+
+    savings_payload = {
+        "clientId": "$.clientId",
+        "productId": product_id,
+        "externalId": external_id,
+        "locale": locale,
+        "dateFormat": PAYLOAD_DATE_FORMAT_LITERAL,
+        "submittedOnDate": process_date_str
+    }
+    approve_body = {
+        "dateFormat": PAYLOAD_DATE_FORMAT_LITERAL,
+        "locale": "en",
+        "approvedOnDate": process_date_str
+    }
+    activate_body = {
+        "dateFormat": PAYLOAD_DATE_FORMAT_LITERAL,
+        "locale": "en",
+        "activatedOnDate": process_date_str
+    }
+    deposit_body = {
+        "locale": "en",
+        "dateFormat": PAYLOAD_DATE_FORMAT_LITERAL,
+        "transactionDate": process_date_str,
+        "transactionAmount": client_record(tenant_id, client_number)["deposit_amount"],
+        "paymentTypeId": tenant_reference_id(tenant_id, "payment_type_id")
+    }
+
+    chain = [
+        _batch_request(rid, "clients", client_payload),
+        _batch_request(rid + 1, "savingsaccounts", savings_payload, reference=rid),
+        _batch_request(rid + 2, "savingsaccounts/$.savingsId?command=approve", approve_body, reference=rid + 1),
+        _batch_request(rid + 3, "savingsaccounts/$.savingsId?command=activate", activate_body, reference=rid + 2),
+        _batch_request(rid + 4, "savingsaccounts/$.savingsId/transactions?command=deposit", deposit_body, reference=rid + 3),
+    ]
+    return chain, mobile_number, external_id
+
+
+def onboard_client_batch(headers, tenant_id, savings_product_id, process_date_str, client_numbers, enclosing_transaction=False):
+    """
+    Onboards several clients with one Fineract /batches call, then registers the
+    interop party and vNext Oracle entry for each client whose chain succeeded.
+
+    With enclosing_transaction=True Fineract runs the whole batch in one database
+    transaction, so either every client in it is created or none are.
+
+    A client whose chain fails inside the batch (e.g. because a batch re-sent after a lost
+    response finds its client already created) is retried through onboard_client, whose
+    idempotency lookups pick up whatever the batch did create.
+
+    Returns the number of clients whose chain ran to the end.
+    """
+    log.debug("--- Processing clients %s-%s for tenant %s as one batch ---", client_numbers[0], client_numbers[-1], tenant_id)
+
+    batch = []
+    chains = []
+    for position, client_number in enumerate(client_numbers):
+        first_request_id = position * 5 + 1
+        requests_for_client, mobile_number, external_id = build_client_chain_batch(
+            LOCALE, tenant_id, client_number, savings_product_id, process_date_str, first_request_id
+        )
+        batch.extend(requests_for_client)
+        chains.append((first_request_id, mobile_number, external_id))
+
+    params = {"enclosingTransaction": "true" if enclosing_transaction else "false"}
+    response_data = make_api_request("POST", BATCHES_API_URL, headers, json_data=batch, params=params)
+
+    if not isinstance(response_data, list):
+        log.warning("Batch request for clients %s-%s of tenant %s failed; onboarding them one at a time.",
+                    client_numbers[0], client_numbers[-1], tenant_id)
+        return sum(onboard_client(headers, tenant_id, savings_product_id, process_date_str, n) for n in client_numbers)
+
+    responses = {item.get("requestId"): item for item in response_data if isinstance(item, dict)}
+
+    succeeded = 0
+    for client_number, (first_request_id, mobile_number, external_id) in zip(client_numbers, chains):
+        chain_responses = [responses.get(first_request_id + step) for step in range(5)]
+        failed_step = next(
+            (step for step, item in enumerate(chain_responses) if item is None or item.get("statusCode") != 200),
+            None
+        )
+        if failed_step is not None:
+            item = chain_responses[failed_step]
+            detail = item.get("body") if item else "no response"
+            log.warning("Batched chain for client number %s of tenant %s failed at step %s: %s", client_number, tenant_id, failed_step + 1, detail)
+            succeeded += onboard_client(headers, tenant_id, savings_product_id, process_date_str, client_number)
             continue
 
-        print(f"Starting loop to create {num_clients} clients and associated accounts for tenant {tenant_id}...", file=sys.stderr)
+        try:
+            client_id = json.loads(chain_responses[0].get("body") or "{}").get("clientId")
+            savings_id = json.loads(chain_responses[1].get("body") or "{}").get("savingsId")
+        except json.JSONDecodeError:
+            client_id = savings_id = None
+        log.debug("Batched chain for client number %s of tenant %s completed. Client ID: %s", client_number, tenant_id, client_id)
+        journal_record(tenant_id, client_number, "client", client_id=client_id, mobile_number=mobile_number)
+        journal_record(tenant_id, client_number, "savings_account", savings_id=savings_id, external_id=external_id)
+        for stage in ("approved", "activated", "deposited"):
+            journal_record(tenant_id, client_number, stage)
+
+        if not register_interop_party(headers, client_id, external_id, mobile_number):
+            continue
+        journal_record(tenant_id, client_number, "interop_party")
+        if not register_vnext_stage(headers, tenant_id, client_number, mobile_number):
+            continue
+        succeeded += 1
 
-        for i in range(1, num_clients + 1):
-            print(f"--- Processing client number {i} for tenant {tenant_id} ---", file=sys.stderr)
+    log.debug("--- Finished batch of %s clients for tenant %s (%s succeeded) ---", len(client_numbers), tenant_id, succeeded)
+    return succeeded
 
-            # Create Client - Pass LOCALE
-            client_result = create_client(HEADERS, LOCALE, tenant_id)
-            client_id, mobile_number = client_result if client_result else (None, None)
 
-            if client_id is None:
-                print(f"Skipping remaining steps due to client creation failure for iteration {i} of tenant {tenant_id}.", file=sys.stderr)
-                continue
+# --- Deterministic client records ---
+CLIENT_RECORD_NAMESPACE = uuid.UUID("6f1d0c42-5a8e-4d1e-9b7a-2f4c9e8a1d37") # Fixed, so external ids are reproducible
 
-            # Create Savings Account - Pass LOCALE
-            savings_account_result  = create_savings_account(HEADERS, client_id, savings_product_id, LOCALE)
-            savings_account_id, external_id = savings_account_result if savings_account_result else (None, None)
 
-            if savings_account_id is None:
-                print(f"Skipping remaining steps due to savings account creation failure for Client ID: {client_id} of tenant {tenant_id}.", file=sys.stderr)
-                continue
+def client_record(tenant_id, client_number):
+    """
+    Returns the generated data for client number client_number (1-based) of tenant_id:
+    names, mobile number, external ids and deposit amount. It depends only on its arguments,
+    the MSISDN seed and the tenant plan, so any process can compute any record without shared state.
+    Another seed gives other external ids as well as other mobile numbers: Fineract keeps closed
+    clients and accounts, so a round seeded after --cleanup needs ids that are still free.
+    """
+    identity = f"{tenant_id}-{client_number}"
+    if MSISDN_SEED != ORIGINAL_MSISDN_SEED:
+        identity += f"-{MSISDN_SEED}"
+    digest = hashlib.blake2b(identity.encode(), digest_size=36).digest()
+    return {
+        "tenant": tenant_id,
+        "client_number": client_number,
+        "firstname": FIRST_NAMES[int.from_bytes(digest[0:2], "big") % len(FIRST_NAMES)],
+        "lastname": LAST_NAMES[int.from_bytes(digest[2:4], "big") % len(LAST_NAMES)],
+        "mobile_number": msisdn_allocator_for(tenant_id).number_at(client_number - 1),
+        "client_external_id": str(uuid.UUID(bytes=digest[4:20], version=4)),
+        "account_external_id": str(uuid.UUID(bytes=digest[20:36], version=4)),
+        "deposit_amount": deposit_amount(tenant_id, digest),
+    }
 
-            # --- Approve Savings Account ---
-            print(f"Attempting to approve savings account ID: {savings_account_id}", file=sys.stderr)
-            approval_response_data = approve_savings_account(
-                API_BASE_URL, 
-                HEADERS,
-                savings_account_id,
-                PROCESS_DATE_STR 
-            )
 
-            # Check if the approval was successful
-            if approval_response_data is None:
-                print(f"Savings account {savings_account_id} approval failed. Skipping activation, deposit, and interoperation registration.", file=sys.stderr)
-                continue 
-
-            # --- Activate Savings Account ---
-            print(f"Attempting to activate savings account ID: {savings_account_id}", file=sys.stderr)
-            activation_response_data = activate_savings_account(
-                API_BASE_URL, 
-                HEADERS,
-                savings_account_id,
-                PROCESS_DATE_STR 
-            )
+# --- Offline dataset generation ---
+# Columns of each file written by --offline; rows are produced by offline_rows()
+OFFLINE_TABLES = {
+    "clients": ["tenant", "client_number", "external_id", "firstname", "lastname", "mobile_no",
+                "office_id", "legal_form_id", "submitted_on_date", "activation_date"],
+    "savings_accounts": ["tenant", "client_external_id", "external_id", "product_short_name", "currency",
+                         "submitted_on_date", "approved_on_date", "activated_on_date", "deposit_amount"],
+    "interop_parties": ["tenant", "id_type", "id_value", "account_external_id"],
+    "oracle_entries": ["id_type", "id_value", "fsp_id", "currency"],
+}
+OFFLINE_SQL_ROWS_PER_INSERT = 1000
+# Column types of the gazelle_seed_* tables written by --offline-format sql; other columns are VARCHAR(64)
+OFFLINE_SQL_TYPES = {
+    "client_number": "INT", "office_id": "BIGINT", "legal_form_id": "INT",
+    "external_id": "VARCHAR(100)", "client_external_id": "VARCHAR(100)", "account_external_id": "VARCHAR(100)",
+    "firstname": "VARCHAR(50)", "lastname": "VARCHAR(50)", "mobile_no": "VARCHAR(50)",
+    "submitted_on_date": "DATE", "activation_date": "DATE", "approved_on_date": "DATE", "activated_on_date": "DATE",
+    "deposit_amount": "DECIMAL(19,6)",
+}
+
+
+def offline_rows(tenant_clients, process_date_str):
+    """
+    Yields (table, row) pairs for every client of every tenant ({tenant_id: number of clients}),
+    one client at a time, so nothing is held in memory beyond the current record.
+    """
+    for tenant_id, num_clients in tenant_clients.items():
+        for client_number in range(1, num_clients + 1):
+            record = client_record(tenant_id, client_number)
+            yield "clients", (tenant_id, client_number, record["client_external_id"], record["firstname"],
+                              record["lastname"], record["mobile_number"], DEFAULT_OFFICE_ID, DEFAULT_LEGAL_FORM_ID,
+                              process_date_str, process_date_str)
+            yield "savings_accounts", (tenant_id, record["client_external_id"], record["account_external_id"],
+                                       PRODUCT_SHORTNAME, PRODUCT_CURRENCY_CODE, process_date_str, process_date_str,
+                                       process_date_str, record["deposit_amount"])
+            yield "interop_parties", (tenant_id, "MSISDN", record["mobile_number"], record["account_external_id"])
+            yield "oracle_entries", ("MSISDN", record["mobile_number"], tenant_id, PRODUCT_CURRENCY_CODE)
+
+
+class OfflineFileWriter:
+    """Writes offline rows to one <table>.csv or <table>.jsonl file per table in output_dir."""
+
+    def __init__(self, output_dir, file_format):
+        self.file_format = file_format
+        self._files = {}
+        self._writers = {}
+        for table, columns in OFFLINE_TABLES.items():
+            handle = open(os.path.join(output_dir, f"{table}.{file_format}"), "w", newline="", encoding="utf-8")
+            self._files[table] = handle
+            if file_format == "csv":
+                writer = csv.writer(handle)
+                writer.writerow(columns)
+                self._writers[table] = writer.writerow
+            else:
+                self._writers[table] = (
+                    lambda row, handle=handle, columns=columns:
+                    handle.write(json.dumps(dict(zip(columns, row)), separators=(",", ":")) + "\n")
+                )
+
+    def write(self, table, row):
+        self._writers[table](row)
+
+    def close(self):
+        for handle in self._files.values():
+            handle.close()
+
+
+class OfflineSqlWriter:
+    """
+    Writes offline rows to seed.sql as multi-row INSERTs into gazelle_seed_* tables, switching
+    to each tenant's database (db_name from the tenant config) with USE.
+
+    This is a staging format with no loader: the gazelle_seed_* tables hold the same rows as the
+    CSV/JSONL files, and nothing in Fineract, the Oracle or this repo reads them. Running
+    seed.sql with mysql creates no clients, savings accounts or interop identifiers; turning
+    the rows into those still takes the API (a normal run of this script) or SQL of your own.
+    """
+
+    def __init__(self, output_dir):
+        self._file = open(os.path.join(output_dir, "seed.sql"), "w", encoding="utf-8")
+        self._pending = {table: [] for table in OFFLINE_TABLES}
+        self._tenant = None
+        self._dates = {} # process date as written in the rows -> ISO date
+        self._file.write("-- Generated by generate-mifos-vnext-data.py --offline\n")
+
+    def _literal(self, value, sql_type):
+        if isinstance(value, (int, float)):
+            return repr(value)
+        if sql_type == "DATE":
+            if value not in self._dates:
+                self._dates[value] = datetime.datetime.strptime(value, DATE_FORMAT).date().isoformat()
+            value = self._dates[value]
+        return "'" + str(value).replace("\\", "\\\\").replace("'", "''") + "'"
+
+    def _flush(self, table):
+        rows = self._pending[table]
+        if not rows:
+            return
+        columns = ", ".join(f"`{column}`" for column in OFFLINE_TABLES[table])
+        types = [OFFLINE_SQL_TYPES.get(column) for column in OFFLINE_TABLES[table]]
+        values = ",\n".join("(" + ", ".join(self._literal(value, sql_type) for value, sql_type in zip(row, types)) + ")"
+                            for row in rows)
+        self._file.write(f"INSERT INTO `gazelle_seed_{table}` ({columns}) VALUES\n{values};\n")
+        rows.clear()
+
+    def _start_tenant(self, tenant_id):
+        for table in OFFLINE_TABLES:
+            self._flush(table)
+        db_name = load_tenant_config().get(tenant_id, {}).get("db_name", tenant_id)
+        self._file.write(f"\nUSE `{db_name}`;\n")
+        for table, columns in OFFLINE_TABLES.items():
+            definition = ", ".join(f"`{column}` {OFFLINE_SQL_TYPES.get(column, 'VARCHAR(64)')}" for column in columns)
+            self._file.write(f"CREATE TABLE IF NOT EXISTS `gazelle_seed_{table}` ({definition});\n")
+        self._tenant = tenant_id
+
+    def write(self, table, row):
+        # Oracle entries carry the tenant as fsp_id, every other table as its first column
+        tenant_id = row[2] if table == "oracle_entries" else row[0]
+        if tenant_id != self._tenant:
+            self._start_tenant(tenant_id)
+        self._pending[table].append(row)
+        if len(self._pending[table]) >= OFFLINE_SQL_ROWS_PER_INSERT:
+            self._flush(table)
+
+    def close(self):
+        for table in OFFLINE_TABLES:
+            self._flush(table)
+        self._file.close()
+
+
+def generate_offline_dataset(output_dir, file_format, tenant_clients):
+    """
+    Writes clients, savings accounts, interop parties and Oracle entries for the clients of each
+    tenant ({tenant_id: number of clients}) to output_dir without calling any API.
+    Returns the number of rows written.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    writer = OfflineSqlWriter(output_dir) if file_format == "sql" else OfflineFileWriter(output_dir, file_format)
+    process_date_str = datetime.datetime.now().strftime(DATE_FORMAT)
+    rows_written = 0
+    started = time.monotonic()
+    try:
+        for table, row in offline_rows(tenant_clients, process_date_str):
+            writer.write(table, row)
+            rows_written += 1
+    finally:
+        writer.close()
+    elapsed = time.monotonic() - started
+    log.info("Wrote %s rows for %s tenants to %s in %.1fs (%.0f rows/s).",
+             rows_written, len(tenant_clients), output_dir, elapsed, rows_written / elapsed if elapsed > 0 else 0)
+    return rows_written
+
+
+# --- Per-client onboarding pipeline ---
+def onboard_client(headers, tenant_id, savings_product_id, process_date_str, client_number):
+    """
+    Runs the full onboarding chain for one client, strictly in order:
+    client -> savings account -> approve -> activate -> deposit -> interop party -> vNext.
+    Each step depends on the previous one, so the chain stops at the first failure.
+    Steps already recorded in the journal by an earlier run are skipped.
+    Returns True if the chain ran to the end, False if it stopped early.
+    """
+    progress = resume_progress.get((tenant_id, client_number), {})
+    done = progress.get("stages", set())
+    if done.issuperset(JOURNAL_STAGES):
+        log.debug("Client number %s for tenant %s already completed in an earlier run. Skipping.", client_number, tenant_id)
+        return True
+
+    log.debug("--- Processing client number %s for tenant %s ---", client_number, tenant_id)
+
+    if "client" in done:
+        client_id, mobile_number = progress["client_id"], progress["mobile_number"]
+        log.debug("Resuming with existing Client ID: %s", client_id)
+    else:
+        # Create Client - Pass LOCALE
+        client_result = create_client(headers, LOCALE, tenant_id, client_number)
+        client_id, mobile_number = client_result if client_result else (None, None)
+
+        if client_id is None:
+            log.error("Skipping remaining steps due to client creation failure for iteration %s of tenant %s.", client_number, tenant_id)
+            return False
+        journal_record(tenant_id, client_number, "client", client_id=client_id, mobile_number=mobile_number)
+
+    if "savings_account" in done:
+        savings_account_id, external_id = progress["savings_id"], progress["external_id"]
+        log.debug("Resuming with existing savings account ID: %s", savings_account_id)
+    else:
+        # Create Savings Account - Pass LOCALE
+        account_external_id = client_record(tenant_id, client_number)["account_external_id"]
+        savings_account_result  = create_savings_account(headers, client_id, savings_product_id, LOCALE, account_external_id)
+        savings_account_id, external_id = savings_account_result if savings_account_result else (None, None)
+
+        if savings_account_id is None:
+            log.error("Skipping remaining steps due to savings account creation failure for Client ID: %s of tenant %s.", client_id, tenant_id)
+            return False
+        journal_record(tenant_id, client_number, "savings_account", savings_id=savings_account_id, external_id=external_id)
+
+    if "approved" not in done:
+        # --- Approve Savings Account ---
+        log.debug("Attempting to approve savings account ID: %s", savings_account_id)
+        approval_response_data = approve_savings_account(
+            API_BASE_URL, 
+            headers,
+            savings_account_id,
+            process_date_str 
+        )
+
+        # Check if the approval was successful
+        if approval_response_data is None:
+            log.error("Savings account %s approval failed. Skipping activation, deposit, and interoperation registration.", savings_account_id)
+            return False
+        journal_record(tenant_id, client_number, "approved")
+
+    if "activated" not in done:
+        # --- Activate Savings Account ---
+        log.debug("Attempting to activate savings account ID: %s", savings_account_id)
+        activation_response_data = activate_savings_account(
+            API_BASE_URL, 
+            headers,
+            savings_account_id,
+            process_date_str 
+        )
+
+        # Check if the activation was successful
+        if activation_response_data is None:
+            log.error("Savings account %s activation failed. Skipping deposit and interoperation registration.", savings_account_id)
+            return False
+        journal_record(tenant_id, client_number, "activated")
+
+    if "deposited" not in done:
+        # --- Make a Deposit ---
+        amount = client_record(tenant_id, client_number)["deposit_amount"]
+        log.debug("Attempting to make a deposit of %s to savings account ID: %s", amount, savings_account_id)
+        deposit_response_data = make_deposit(
+            API_BASE_URL, 
+            headers,
+            savings_account_id,
+            amount, 
+            process_date_str,       
+            tenant_reference_id(tenant_id, "payment_type_id")
+        )
+
+        # Check if the deposit was successful
+        if deposit_response_data is None:
+            log.error("Deposit to savings account %s failed. Skipping interoperation registration.", savings_account_id)
+            return False
+        journal_record(tenant_id, client_number, "deposited")
+
+    completed = True
+    if "interop_party" not in done:
+        # Register Interoperation Party
+        if register_interop_party(headers, client_id, external_id, mobile_number):
+            journal_record(tenant_id, client_number, "interop_party")
+        else:
+            completed = False
+
+    if "vnext" not in done:
+        # Register Client with vNext
+        if not register_vnext_stage(headers, tenant_id, client_number, mobile_number):
+            completed = False
+
+    log.debug("--- Finished processing client number %s for tenant %s ---", client_number, tenant_id)
+    return completed
+
+
+def onboard_clients(headers, tenant_id, savings_product_id, process_date_str, client_numbers,
+                    batch_size=0, enclosing_transaction=False):
+    """
+    Onboards a group of clients, either as one Fineract batch (batch_size > 0)
+    or one client chain after another.
+    Returns the number of clients whose chain ran to the end.
+    """
+    succeeded = 0
+    all_client_numbers = client_numbers
+    run_metrics.tenant_started(tenant_id)
+    if batch_size > 0:
+        # Clients with journalled progress continue their own chain; only untouched ones are batched
+        fresh = [n for n in client_numbers if (tenant_id, n) not in resume_progress]
+        client_numbers = [n for n in client_numbers if (tenant_id, n) in resume_progress]
+        if fresh:
+            succeeded += onboard_client_batch(headers, tenant_id, savings_product_id, process_date_str,
+                                              fresh, enclosing_transaction)
+    succeeded += sum(
+        1 for client_number in client_numbers
+        if onboard_client(headers, tenant_id, savings_product_id, process_date_str, client_number)
+    )
+    run_metrics.tenant_progress(tenant_id, succeeded, len(all_client_numbers) - succeeded)
+    return succeeded
+
+
+def select_client_numbers(num_clients, client_range=None, shard=None):
+    """
+    Returns the client numbers (a range) this process should onboard out of 1..num_clients:
+    optionally only client_range (first, last) and only shard (index, count), i.e. every
+    count-th client starting at index + 1. Records depend only on (tenant, client number),
+    so separate processes or machines can each take one shard.
+    """
+    first, last = client_range or (1, num_clients)
+    client_numbers = range(max(first, 1), min(last, num_clients) + 1)
+    if shard is not None:
+        index, count = shard
+        offset = (index - (client_numbers.start - 1)) % count
+        client_numbers = client_numbers[offset::count]
+    return client_numbers
+
+
+def client_number_groups(client_numbers, batch_size):
+    """Splits client_numbers into groups of batch_size (single clients when batch_size is 0)."""
+    group_size = max(batch_size, 1)
+    return [client_numbers[start:start + group_size] for start in range(0, len(client_numbers), group_size)]
+
+
+# --- Tenant setup ---
+def prepare_tenant(context):
+    """Resolves the tenant's savings product and reference ids. Returns True if it can be provisioned."""
+    log.info("Attempting to create or find savings product for tenant %s...", context.tenant_id)
+    metadata = tenant_metadata.get(context.tenant_id, context.headers)
+    if metadata is None:
+        log.error("Fatal error: Could not create or find savings product for tenant %s. Skipping.", context.tenant_id)
+        return False
+    context.savings_product_id = metadata["savings_product_id"]
+    return True
+
+
+def prepare_tenants(contexts, parallelism):
+    """Runs prepare_tenant() for up to parallelism tenants at a time. Returns the contexts that are ready, in order."""
+    if parallelism <= 1 or len(contexts) <= 1:
+        return [context for context in contexts if prepare_tenant(context)]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(parallelism, len(contexts))) as executor:
+        ready = list(executor.map(prepare_tenant, contexts))
+    return [context for context, ok in zip(contexts, ready) if ok]
+
+
+# --- Concurrent execution of client chains ---
+def run_tenant_jobs_concurrently(contexts, workers, tenant_concurrency, batch_size=0, enclosing_transaction=False):
+    """
+    Runs client onboarding chains for all tenants on a shared thread pool.
 
-            # Check if the activation was successful
-            if activation_response_data is None:
-                print(f"Savings account {savings_account_id} activation failed. Skipping deposit and interoperation registration.", file=sys.stderr)
-                continue 
-
-            # --- Make a Deposit ---
-            print(f"Attempting to make a deposit of {DEFAULT_DEPOSIT_AMOUNT} to savings account ID: {savings_account_id}", file=sys.stderr)
-            deposit_response_data = make_deposit(
-                API_BASE_URL, 
-                HEADERS,
-                savings_account_id,
-                DEFAULT_DEPOSIT_AMOUNT, 
-                PROCESS_DATE_STR,       
-                DEFAULT_PAYMENT_TYPE_ID 
+    Each client chain (or batch of chains) runs in a single worker so its steps stay in
+    order, while independent clients (across all tenants) run in parallel. A per-tenant
+    semaphore caps how many chains hit one tenant's Fineract database at the same time, so with
+    workers >= tenants x tenant_concurrency every tenant progresses at full speed and the run
+    takes about as long as its largest tenant.
+
+    Args:
+        contexts (list): TenantContext of each tenant, with its savings product resolved.
+        workers (int): Size of the shared thread pool.
+        tenant_concurrency (int): Maximum number of in-flight client chains (or batches) per tenant.
+        batch_size (int): Clients per Fineract /batches call, 0 to send each request separately.
+        enclosing_transaction (bool): Run each batch in a single Fineract transaction.
+
+    Returns:
+        dict: tenant_id -> (succeeded, failed) counts.
+    """
+    tenant_limits = {context.tenant_id: threading.BoundedSemaphore(tenant_concurrency) for context in contexts}
+
+    def limited_onboard(tenant_id, headers, savings_product_id, process_date_str, client_numbers):
+        with tenant_limits[tenant_id]:
+            return onboard_clients(headers, tenant_id, savings_product_id, process_date_str, client_numbers,
+                                   batch_size, enclosing_transaction)
+
+    # Interleave the tenants' clients so that one large tenant does not queue up
+    # in front of the others and block workers on its semaphore.
+    per_tenant = [
+        [(context.tenant_id, context.headers, context.savings_product_id, context.process_date_str, group)
+         for group in client_number_groups(context.client_numbers, batch_size)]
+        for context in contexts
+    ]
+    ordered = [task for group in itertools.zip_longest(*per_tenant) for task in group if task is not None]
+
+    results = {context.tenant_id: [0, 0] for context in contexts}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(limited_onboard, *task): task for task in ordered}
+        for future in concurrent.futures.as_completed(futures):
+            tenant_id, client_numbers = futures[future][0], futures[future][4]
+            try:
+                succeeded = future.result()
+            except Exception as e:
+                log.error("Unhandled error while onboarding clients for tenant %s: %s", tenant_id, e)
+                succeeded = 0
+            results[tenant_id][0] += succeeded
+            results[tenant_id][1] += len(client_numbers) - succeeded
+
+    return {tenant_id: tuple(counts) for tenant_id, counts in results.items()}
+
+
+def onboard_tenants(contexts, workers, tenant_concurrency, batch_size=0, enclosing_transaction=False):
+    """Onboards every context's clients, on a shared pool when workers > 1, then flushes bulk vNext registrations."""
+    if workers > 1:
+        log.info("Onboarding clients of %s tenants with %s workers (max %s per tenant)...",
+                 len(contexts), workers, tenant_concurrency)
+        results = run_tenant_jobs_concurrently(contexts, workers, tenant_concurrency, batch_size, enclosing_transaction)
+        for tenant_id, (succeeded, failed) in results.items():
+            log.info("Finished processing tenant: %s (%s succeeded, %s failed)", tenant_id, succeeded, failed)
+    else:
+        for context in contexts:
+            log.info("Starting loop to create %s clients and associated accounts for tenant %s...",
+                     len(context.client_numbers), context.tenant_id)
+            for group in client_number_groups(context.client_numbers, batch_size):
+                onboard_clients(context.headers, context.tenant_id, context.savings_product_id,
+                                context.process_date_str, group, batch_size, enclosing_transaction)
+            log.info("Finished processing tenant: %s", context.tenant_id)
+
+    if vnext_registrar is not None:
+        vnext_registrar.flush()
+        log.info("vNext Oracle bulk registration: %s registered, %s failed", vnext_registrar.registered, vnext_registrar.failed)
+
+
+# --- Post-seed verification ---
+VERIFY_PAGE_SIZE = 1000 # Clients/savings accounts per paged GET; a server that caps it returns shorter pages
+VERIFY_LOOKUP_WORKERS = 8 # Parallel GETs per verification when --workers is not given
+BALANCE_TOLERANCE = 0.005
+
+
+def fetch_all_pages(url, headers, page_size, executor=None):
+    """
+    Reads a paged Fineract list (clients, savingsaccounts) with offset/limit in id order. The
+    first page gives the total and the page size the server actually uses; the remaining pages
+    are fetched on executor when given. Returns all items, or None if any page could not be read.
+    """
+    def fetch_page(offset):
+        params = {"offset": offset, "limit": page_size, "orderBy": "id", "sortOrder": "ASC"}
+        response_data = make_api_request("GET", url, headers, params=params)
+        if isinstance(response_data, list): # Not paged: everything in one response
+            return response_data, len(response_data)
+        if not isinstance(response_data, dict):
+            return None, 0
+        items = response_data.get("pageItems", [])
+        return items, response_data.get("totalFilteredRecords", len(items))
+
+    items, total = fetch_page(0)
+    if items is None or not items or len(items) >= total:
+        return items
+    offsets = range(len(items), total, len(items))
+    pages = executor.map(fetch_page, offsets) if executor is not None else map(fetch_page, offsets)
+    for page, _ in pages:
+        if page is None:
+            return None
+        items.extend(page)
+    return items
+
+
+def oracle_fsp_id(response_data):
+    """The fspId in a vNext GET /participants/MSISDN/{msisdn} response, None if there is none."""
+    if not isinstance(response_data, dict):
+        return None
+    if response_data.get("fspId"):
+        return response_data["fspId"]
+    parties = response_data.get("partyList") or [{}]
+    return parties[0].get("fspId")
+
+
+def client_differences(record, client, account, party, oracle_entry):
+    """
+    Compares one expected client record with what Fineract and the vNext Oracle hold for it.
+    Returns (differences, progress): differences is a list of (check, message) and progress
+    says which stages are in place, in the form SeedingJournal.load() gives, so that
+    onboard_client() can redo only the missing ones. A stage that exists but does not match
+    (a different balance, an MSISDN mapped elsewhere) is reported but counted as in place,
+    since running it again would not fix it.
+    """
+    differences = []
+    progress = {"stages": set(), "mobile_number": record["mobile_number"]}
+    stages = progress["stages"]
+    if client is None:
+        differences.append(("client", "client missing"))
+    else:
+        stages.add("client")
+        progress["client_id"] = client["id"]
+        if client.get("mobileNo") != record["mobile_number"]:
+            differences.append(("client", f"mobileNo {client.get('mobileNo')} != {record['mobile_number']}"))
+        if (client.get("firstname"), client.get("lastname")) != (record["firstname"], record["lastname"]):
+            differences.append(("client", f"name {client.get('firstname')} {client.get('lastname')} != "
+                                          f"{record['firstname']} {record['lastname']}"))
+
+    if account is None:
+        differences.append(("account", "savings account missing"))
+    elif client is not None and account.get("clientId") != client["id"]:
+        differences.append(("account", f"savings account belongs to client {account.get('clientId')}, not {client['id']}"))
+    else:
+        stages.add("savings_account")
+        progress.update(savings_id=account["id"], external_id=account.get("externalId"))
+        status = account.get("status") or {}
+        if status.get("active"):
+            stages.update(("approved", "activated"))
+            balance = float((account.get("summary") or {}).get("accountBalance") or 0)
+            if abs(balance - record["deposit_amount"]) <= BALANCE_TOLERANCE:
+                stages.add("deposited")
+            elif balance == 0:
+                differences.append(("deposit", f"no deposit (expected {record['deposit_amount']:.2f})"))
+            else:
+                stages.add("deposited")
+                differences.append(("deposit", f"balance {balance:.2f} != {record['deposit_amount']:.2f}"))
+        else:
+            if status.get("approved"):
+                stages.add("approved")
+            differences.append(("account", "savings account approved but not active" if status.get("approved")
+                                           else "savings account not approved"))
+
+    party_account = party.get("accountId") if isinstance(party, dict) else None
+    if party_account is None:
+        differences.append(("interop", "interop party missing"))
+    else:
+        stages.add("interop_party")
+        if party_account != record["account_external_id"]:
+            differences.append(("interop", f"interop party maps to account {party_account}"))
+
+    fsp_id = oracle_fsp_id(oracle_entry)
+    if fsp_id is None:
+        differences.append(("oracle", "Oracle entry missing"))
+    else:
+        stages.add("vnext")
+        if fsp_id != record["tenant"]:
+            differences.append(("oracle", f"Oracle entry points to {fsp_id}"))
+    return differences, progress
+
+
+def verify_tenant(context, page_size, executor):
+    """
+    Reconciles one tenant's expected clients (context.client_numbers) with Fineract and the
+    vNext Oracle. Clients and savings accounts are read with paged bulk GETs; interop parties
+    and Oracle entries have no list API, so they are read one MSISDN at a time on executor.
+    Returns client_number -> (record, differences, progress) for the clients that differ,
+    or None if the tenant's clients or accounts could not be read.
+    """
+    tenant_id = context.tenant_id
+    log.info("Verifying %s clients of tenant %s...", len(context.client_numbers), tenant_id)
+    clients = fetch_all_pages(CLIENTS_API_URL, context.headers, page_size, executor)
+    accounts = fetch_all_pages(SAVINGS_API_URL, context.headers, page_size, executor) if clients is not None else None
+    if accounts is None:
+        log.error("Could not read the clients and savings accounts of tenant %s. Skipping its verification.", tenant_id)
+        return None
+    clients = {item["externalId"]: item for item in clients if item.get("externalId")}
+    accounts = {item["externalId"]: item for item in accounts if item.get("externalId")}
+
+    records = [client_record(tenant_id, client_number) for client_number in context.client_numbers]
+    vnext_headers = build_vnext_headers(tenant_id)
+    parties = executor.map(
+        lambda record: make_api_request("GET", f"{INTEROP_PARTIES_API_URL}/{record['mobile_number']}", context.headers),
+        records)
+    oracle_entries = executor.map(
+        lambda record: make_api_request("GET", f"{VNEXT_PARTICIPANTS_API_URL}/MSISDN/{record['mobile_number']}", vnext_headers),
+        records)
+
+    mismatched = {}
+    for record, party, oracle_entry in zip(records, parties, oracle_entries):
+        differences, progress = client_differences(record, clients.get(record["client_external_id"]),
+                                                   accounts.get(record["account_external_id"]), party, oracle_entry)
+        if differences:
+            mismatched[record["client_number"]] = (record, differences, progress)
+    counts = collections.Counter(check for _, differences, _ in mismatched.values() for check, _ in differences)
+    log.info("Verified tenant %s: %s of %s clients as expected%s", tenant_id, len(records) - len(mismatched), len(records),
+             "; differences: " + ", ".join(f"{check} {count}" for check, count in sorted(counts.items())) if counts else "")
+    return mismatched
+
+
+def verify_tenants(contexts, page_size, lookup_workers):
+    """Runs verify_tenant() for all tenants in parallel. Returns tenant_id -> its verify_tenant() result."""
+    with concurrent.futures.ThreadPoolExecutor(max_workers=lookup_workers) as executor:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(len(contexts), 1)) as tenant_executor:
+            results = tenant_executor.map(lambda context: verify_tenant(context, page_size, executor), contexts)
+            return {context.tenant_id: result for context, result in zip(contexts, results)}
+
+
+def write_verification_diff(results, output):
+    """Writes one line per client that differs: tenant, client number, MSISDN and what is wrong."""
+    for tenant_id, mismatched in results.items():
+        for client_number, (record, differences, _) in sorted((mismatched or {}).items()):
+            output.write(f"{tenant_id} #{client_number} {record['mobile_number']}: "
+                         f"{'; '.join(message for _, message in differences)}\n")
+    output.flush()
+
+
+def verification_report(results):
+    """The verify_tenant() results as JSON: per tenant, the differing clients or null if it could not be read."""
+    return {
+        tenant_id: None if mismatched is None else [
+            {"client": client_number, "mobile_number": record["mobile_number"],
+             "differences": [{"check": check, "message": message} for check, message in differences]}
+            for client_number, (record, differences, _) in sorted(mismatched.items())
+        ]
+        for tenant_id, mismatched in results.items()
+    }
+
+
+def repair_contexts(results):
+    """
+    Turns verification results into TenantContexts for the clients with missing stages, and
+    records the stages already in place in resume_progress so onboard_client() skips them.
+    """
+    contexts = []
+    for tenant_id, mismatched in results.items():
+        client_numbers = []
+        for client_number, (_, _, progress) in sorted((mismatched or {}).items()):
+            if progress["stages"].issuperset(JOURNAL_STAGES):
+                continue # Only mismatches that running the chain again would not fix
+            if progress["stages"]:
+                resume_progress[(tenant_id, client_number)] = progress
+            client_numbers.append(client_number)
+        if client_numbers:
+            contexts.append(TenantContext(tenant_id, client_numbers))
+    return contexts
+
+
+# --- Teardown of seeded data ---
+CLIENT_STATUS_PENDING = "clientStatusType.pending"
+CLIENT_STATUS_CLOSED = "clientStatusType.closed"
+
+
+def fetch_savings_transactions(headers, account_id):
+    """Returns the savings account's transactions, or None if it could not be read."""
+    response_data = make_api_request("GET", f"{SAVINGS_API_URL}/{account_id}", headers,
+                                     params={"associations": "transactions"})
+    if not isinstance(response_data, dict):
+        return None
+    return response_data.get("transactions", [])
+
+
+def undo_deposits(headers, account_id):
+    """Reverses the account's deposits, newest first. Returns True if none is left."""
+    transactions = fetch_savings_transactions(headers, account_id)
+    if transactions is None:
+        return False
+    deposits = [t for t in transactions if (t.get("transactionType") or {}).get("deposit") and not t.get("reversed")]
+    for transaction in sorted(deposits, key=lambda t: t["id"], reverse=True):
+        def reversed_already(transaction_id=transaction["id"]):
+            current = fetch_savings_transactions(headers, account_id) or []
+            return {} if any(t["id"] == transaction_id and t.get("reversed") for t in current) else None
+        response_data = make_api_request(
+            "POST", f"{SAVINGS_API_URL}/{account_id}/transactions/{transaction['id']}?command=undo", headers,
+            json_data={}, lookup_existing=reversed_already
+        )
+        if response_data is None:
+            log.error("Could not undo deposit %s of savings account %s.", transaction["id"], account_id)
+            return False
+    return True
+
+
+def close_savings_account(headers, account_id, closed_on_date_str):
+    """Closes an active savings account with a zero balance. Returns True on success."""
+    body = {"closedOnDate": closed_on_date_str, "dateFormat": PAYLOAD_DATE_FORMAT_LITERAL, "locale": LOCALE}
+    response_data = make_api_request(
+        "POST", f"{SAVINGS_API_URL}/{account_id}?command=close", headers, json_data=body,
+        lookup_existing=lambda: savings_account_reached(
+            headers, account_id, lambda account: account.get("status", {}).get("closed")
+        )
+    )
+    if response_data is None:
+        log.error("Could not close savings account %s.", account_id)
+    return response_data is not None
+
+
+def remove_savings_account(headers, account, closed_on_date_str):
+    """
+    Takes a savings account out of use the way Fineract allows for its state: an active one has
+    its deposits undone and is closed, an approved one is unapproved and deleted, a pending one
+    is deleted. Returns True if that worked (or the account was already closed).
+    """
+    account_id, status = account["id"], account.get("status") or {}
+    if status.get("closed"):
+        return True
+    if status.get("active"):
+        if (account.get("summary") or {}).get("accountBalance") and not undo_deposits(headers, account_id):
+            return False
+        return close_savings_account(headers, account_id, closed_on_date_str)
+    if status.get("approved"):
+        response_data = make_api_request(
+            "POST", f"{SAVINGS_API_URL}/{account_id}?command=undoApproval", headers, json_data={},
+            lookup_existing=lambda: savings_account_reached(
+                headers, account_id, lambda current: current.get("status", {}).get("submittedAndPendingApproval")
             )
+        )
+        if response_data is None:
+            log.error("Could not undo the approval of savings account %s.", account_id)
+            return False
+    if make_api_request("DELETE", f"{SAVINGS_API_URL}/{account_id}", headers) is None:
+        log.error("Could not delete savings account %s.", account_id)
+        return False
+    return True
+
+
+def remove_client(headers, client, closure_reason_id, closure_date_str):
+    """
+    Deletes a pending client; an active one (every client this tool creates) can only be
+    closed, which needs a closure reason. Returns True on success or if it was already closed.
+    """
+    client_id, status = client["id"], (client.get("status") or {}).get("code")
+    if status == CLIENT_STATUS_CLOSED:
+        return True
+    if status == CLIENT_STATUS_PENDING:
+        response_data = make_api_request("DELETE", f"{CLIENTS_API_URL}/{client_id}", headers)
+    elif closure_reason_id is None:
+        log.error("Cannot close client %s: the tenant has no client closure reason (code ClientClosureReason).", client_id)
+        return False
+    else:
+        body = {"closureDate": closure_date_str, "closureReasonId": closure_reason_id,
+                "dateFormat": PAYLOAD_DATE_FORMAT_LITERAL, "locale": LOCALE}
+        response_data = make_api_request(
+            "POST", f"{CLIENTS_API_URL}/{client_id}?command=close", headers, json_data=body,
+            lookup_existing=lambda: client_closed(headers, client_id)
+        )
+    if response_data is None:
+        log.error("Could not remove client %s.", client_id)
+    return response_data is not None
+
+
+def client_closed(headers, client_id):
+    response_data = make_api_request("GET", f"{CLIENTS_API_URL}/{client_id}", headers)
+    if isinstance(response_data, dict) and (response_data.get("status") or {}).get("code") == CLIENT_STATUS_CLOSED:
+        return {"clientId": client_id, "resourceId": client_id}
+    return None
+
+
+def client_closure_reason(headers):
+    """The first client closure reason of the tenant, or None if it has none."""
+    response_data = make_api_request("GET", CLIENTS_TEMPLATE_API_URL, headers, params={"commandParam": "close"})
+    reasons = response_data.get("narrations") if isinstance(response_data, dict) else None
+    return reasons[0]["id"] if reasons else None
+
+
+def teardown_client(context, target, closure_reason_id):
+    """
+    Removes one client's data in dependency order: the savings account (deposits undone, then
+    closed or deleted), the interop party and the Oracle entry, then the client, which Fineract
+    only lets go of once its accounts are closed. Returns True if everything is gone.
+    """
+    tenant_id, headers = context.tenant_id, context.headers
+    client, account, mobile_number = target["client"], target["account"], target["mobile_number"]
+    if account is not None and not remove_savings_account(headers, account, context.process_date_str):
+        return False
+    removed = True
+    if make_api_request("DELETE", f"{INTEROP_PARTIES_API_URL}/{mobile_number}", headers) is None:
+        log.error("Could not delete the interop party of MSISDN %s for tenant %s.", mobile_number, tenant_id)
+        removed = False
+    if make_api_request("DELETE", f"{VNEXT_PARTICIPANTS_API_URL}/MSISDN/{mobile_number}", build_vnext_headers(tenant_id)) is None:
+        log.error("Could not delete the vNext Oracle entry of MSISDN %s for tenant %s.", mobile_number, tenant_id)
+        removed = False
+    if client is not None and removed:
+        removed = remove_client(headers, client, closure_reason_id, context.process_date_str)
+    return removed
+
+
+def teardown_targets(context, page_size, executor, progress=None):
+    """
+    Finds what to remove for the tenant's clients: by the ids in the journal's progress
+    ((tenant_id, client_number) -> SeedingJournal.load() entry) when given, otherwise by the
+    external ids of context.client_numbers. Current clients and accounts are read with paged
+    GETs. Returns a list of {"client", "account", "mobile_number"}, or None if they could not be read.
+    """
+    clients = fetch_all_pages(CLIENTS_API_URL, context.headers, page_size, executor)
+    accounts = fetch_all_pages(SAVINGS_API_URL, context.headers, page_size, executor) if clients is not None else None
+    if accounts is None:
+        return None
+    key = "id" if progress is not None else "externalId"
+    clients = {item[key]: item for item in clients if item.get(key) is not None}
+    accounts = {item[key]: item for item in accounts if item.get(key) is not None}
+    targets = []
+    for client_number in context.client_numbers:
+        record = client_record(context.tenant_id, client_number)
+        if progress is not None:
+            entry = progress.get((context.tenant_id, client_number), {})
+            targets.append({"client": clients.get(entry.get("client_id")), "account": accounts.get(entry.get("savings_id")),
+                            "mobile_number": entry.get("mobile_number", record["mobile_number"])})
+        else:
+            targets.append({"client": clients.get(record["client_external_id"]),
+                            "account": accounts.get(record["account_external_id"]),
+                            "mobile_number": record["mobile_number"]})
+    return targets
 
-            # Check if the deposit was successful
-            if deposit_response_data is None:
-                print(f"Deposit to savings account {savings_account_id} failed. Skipping interoperation registration.", file=sys.stderr)
-                continue 
 
-            # Register Interoperation Party
-            register_interop_party(HEADERS, client_id, external_id, mobile_number)
+def run_teardown(contexts, workers, tenant_concurrency, page_size, progress=None):
+    """
+    Removes the seeded data of every context's clients. Each client's teardown runs in one
+    worker so its steps stay in order, while clients of all tenants run in parallel, at most
+    tenant_concurrency per tenant. Returns tenant_id -> (removed, failed) counts.
+    """
+    tenant_limits = {context.tenant_id: threading.BoundedSemaphore(tenant_concurrency) for context in contexts}
+    results = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        per_tenant = []
+        for context in contexts:
+            log.info("Finding the data of %s clients of tenant %s...", len(context.client_numbers), context.tenant_id)
+            targets = teardown_targets(context, page_size, executor, progress)
+            if targets is None:
+                log.error("Could not read the clients and savings accounts of tenant %s. Skipping its teardown.", context.tenant_id)
+                results[context.tenant_id] = [0, len(context.client_numbers)]
+                continue
+            closure_reason_id = client_closure_reason(context.headers)
+            run_metrics.tenant_started(context.tenant_id)
+            results[context.tenant_id] = [0, 0]
+            per_tenant.append([(context, target, closure_reason_id) for target in targets])
+
+        def limited_teardown(context, target, closure_reason_id):
+            with tenant_limits[context.tenant_id]:
+                try:
+                    removed = teardown_client(context, target, closure_reason_id)
+                except Exception as e:
+                    log.error("Unhandled error while removing a client of tenant %s: %s", context.tenant_id, e)
+                    removed = False
+            run_metrics.tenant_progress(context.tenant_id, int(removed), int(not removed))
+            return removed
+
+        # Interleaved like run_tenant_jobs_concurrently(), so one large tenant does not hold up the others
+        ordered = [task for group in itertools.zip_longest(*per_tenant) for task in group if task is not None]
+        futures = {executor.submit(limited_teardown, *task): task[0].tenant_id for task in ordered}
+        for future in concurrent.futures.as_completed(futures):
+            results[futures[future]][0 if future.result() else 1] += 1
+
+    for tenant_id, (removed, failed) in results.items():
+        log.info("Finished removing the data of tenant %s (%s clients removed, %s failed)", tenant_id, removed, failed)
+    return {tenant_id: tuple(counts) for tenant_id, counts in results.items()}
+
+
+# --- Profiling ---
+profiler = None # StageProfiler (../stage-profiler.py) when --profile is given
+
+
+def start_profiler(prefix, use_cprofile=False, trace_memory=False):
+    global profiler
+    spec = importlib.util.spec_from_file_location("stage_profiler", STAGE_PROFILER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    profiler = module.StageProfiler(prefix, use_cprofile, trace_memory)
+
+
+def profile_stage(name):
+    """Times one stage of the run when --profile is given."""
+    return profiler.stage(name) if profiler is not None else contextlib.nullcontext()
 
-            # Register Client with vNext
-            register_client_with_vnext(HEADERS, tenant_id, mobile_number)
 
-            print(f"--- Finished processing client number {i} for tenant {tenant_id} ---", file=sys.stderr)
-            print("", file=sys.stderr) 
+def finish_profiler():
+    if profiler is not None:
+        paths = profiler.close()
+        log.info("Stage profile:\n%s", profiler.summary_table())
+        log.info("Profile written to %s", ", ".join(paths))
 
-        print(f"Finished processing tenant: {tenant_id}", file=sys.stderr)
-        print("", file=sys.stderr)  
 
-    print("All tenants processed.", file=sys.stderr)
\ No newline at end of file
+def _parse_client_range(value):
+    first, _, last = value.partition("-")
+    try:
+        first, last = int(first), int(last or first)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected FIRST-LAST or N, got {value!r}")
+    if not 1 <= first <= last:
+        raise argparse.ArgumentTypeError(f"expected 1 <= FIRST <= LAST, got {value!r}")
+    return first, last
+
+
+def _parse_shard(value):
+    index, _, count = value.partition("/")
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected INDEX/COUNT, got {value!r}")
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"expected 0 <= INDEX < COUNT, got {value!r}")
+    return index, count
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Generate demo clients/accounts in Fineract and register them with the vNext Oracle."
+    )
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument("-v", "--verbose", action="store_true",
+                           help="log every step of every client (DEBUG)")
+    verbosity.add_argument("-q", "--quiet", action="store_true",
+                           help="log only errors and the periodic progress lines")
+    parser.add_argument("--log-format", choices=["text", "json"], default="text",
+                        help="text lines or one JSON object per line (default: text)")
+    parser.add_argument("--log-file", metavar="PATH",
+                        help="append the log to this file instead of stderr")
+    parser.add_argument("--progress-interval", type=float, default=PROGRESS_INTERVAL,
+                        help=f"seconds between progress lines, 0 for none (default: {PROGRESS_INTERVAL:g})")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of client onboarding chains to run in parallel (default: 1, sequential)")
+    parser.add_argument("--tenant-concurrency", type=int, default=None,
+                        help="maximum in-flight client chains per tenant when --workers > 1 "
+                             "(default: 4, or --workers with --adaptive-concurrency)")
+    parser.add_argument("--adaptive-concurrency", action="store_true",
+                        help="find each host's sustainable number of in-flight requests (AIMD on p95 latency and "
+                             f"error rate), up to --workers (default {ADAPTIVE_DEFAULT_WORKERS} with this option)")
+    parser.add_argument("--initial-concurrency", type=int, default=ADAPTIVE_INITIAL_LIMIT,
+                        help=f"with --adaptive-concurrency, in-flight requests per host to start from (default: {ADAPTIVE_INITIAL_LIMIT})")
+    parser.add_argument("--target-p95", type=float, default=ADAPTIVE_TARGET_P95,
+                        help=f"with --adaptive-concurrency, p95 latency in seconds to stay under (default: {ADAPTIVE_TARGET_P95:g})")
+    parser.add_argument("--max-error-rate", type=float, default=ADAPTIVE_MAX_ERROR_RATE,
+                        help=f"with --adaptive-concurrency, share of failed requests to stay under (default: {ADAPTIVE_MAX_ERROR_RATE:g})")
+    parser.add_argument("--pool-size", type=int, default=None,
+                        help=f"HTTP connections kept open per host (default: {DEFAULT_POOL_SIZE} or --workers, whichever is larger)")
+    parser.add_argument("--no-keep-alive", dest="keep_alive", action="store_false",
+                        help="close the HTTP connection after every request instead of reusing it")
+    parser.add_argument("--client-range", type=_parse_client_range, metavar="FIRST-LAST",
+                        help="only onboard these client numbers of each tenant, e.g. 57 to reproduce one client")
+    parser.add_argument("--shard", type=_parse_shard, metavar="INDEX/COUNT",
+                        help="only onboard every COUNT-th client starting at INDEX (0-based), to split a run "
+                             "across processes or machines")
+    parser.add_argument("--msisdn-seed", type=int, default=MSISDN_SEED,
+                        help=f"seed for the mobile number permutation; change it to get a different set of clients, "
+                             f"e.g. for a new round after --cleanup (default: {MSISDN_SEED})")
+    parser.add_argument("--connect-timeout", type=float, default=CONNECT_TIMEOUT,
+                        help=f"seconds to wait for a connection (default: {CONNECT_TIMEOUT:g})")
+    parser.add_argument("--read-timeout", type=float, default=READ_TIMEOUT,
+                        help=f"seconds to wait for a response (default: {READ_TIMEOUT:g})")
+    parser.add_argument("--retries", type=int, default=MAX_RETRIES,
+                        help=f"retries after a 5xx/429, connection error or timeout (default: {MAX_RETRIES})")
+    parser.add_argument("--metrics-json", metavar="PATH",
+                        help="write per-endpoint latency/status/bytes and per-tenant throughput to this JSON file")
+    parser.add_argument("--metrics-prom", metavar="PATH",
+                        help="write the same metrics in Prometheus text format to this file")
+    parser.add_argument("--profile", metavar="PREFIX",
+                        help="record wall vs CPU time per stage (plan, prepare tenants, onboard clients, verify, "
+                             "cleanup, ...) into PREFIX.stages.json and sampled stacks of all threads into "
+                             "PREFIX.folded for flamegraph.pl or speedscope")
+    parser.add_argument("--cprofile", action="store_true",
+                        help="with --profile, also write cProfile stats per stage to PREFIX.<stage>.pstats "
+                             "(main thread only; use --workers 1 to see the request code)")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="with --profile, also record the tracemalloc peak per stage (several times slower)")
+    parser.add_argument("--journal", metavar="PATH",
+                        help="append each client's progress to this JSONL journal so an interrupted run can be resumed")
+    parser.add_argument("--resume", action="store_true",
+                        help="with --journal, skip work the journal records as done and continue partial client chains")
+    parser.add_argument("--vnext-bulk-size", type=int, default=0,
+                        help="register MSISDNs with the vNext Oracle in bulk, this many per request "
+                             "(default: 0, one request per MSISDN)")
+    parser.add_argument("--offline", metavar="DIR",
+                        help="do not call any API; write the generated clients, accounts, interop parties and "
+                             "Oracle entries to files in DIR (tenants come from --tenant-config)")
+    parser.add_argument("--offline-format", choices=["csv", "jsonl", "sql"], default="csv",
+                        help="file format for --offline (default: csv); sql writes INSERTs into gazelle_seed_* "
+                             "staging tables, which nothing loads into Fineract")
+    parser.add_argument("--clients-per-tenant", type=int, default=None,
+                        help="number of clients for every tenant (default: the --tenant-spec or TENANTS counts)")
+    parser.add_argument("--tenant-spec", metavar="PATH",
+                        help="YAML or JSON file listing the tenants to provision with their client counts and "
+                             "deposit distributions (default: every tenant in --tenant-config)")
+    parser.add_argument("--tenant-config", metavar="PATH", default=TENANT_CONFIG_FILE,
+                        help="tenant config CSV (default: config/mifos-tenant-config.csv)")
+    parser.add_argument("--fineract-url", metavar="URL",
+                        help=f"Fineract API base URL (default: {API_BASE_URL})")
+    parser.add_argument("--vnext-url", metavar="URL",
+                        help=f"vNext admin base URL (default: {VNEXT_ADMIN_BASE_URL})")
+    parser.add_argument("--metadata-cache", metavar="PATH",
+                        help="keep each tenant's savings product, payment type, office and legal form ids in this "
+                             "JSON file so later runs do not look them up again")
+    parser.add_argument("--metadata-ttl", type=float, default=METADATA_TTL,
+                        help=f"seconds cached tenant ids are reused before being looked up again (default: {METADATA_TTL:g})")
+    parser.add_argument("--refresh-metadata", action="store_true",
+                        help="ignore the ids --metadata-cache holds for this --fineract-url and look them up again")
+    parser.add_argument("--verify", action="store_true",
+                        help="do not seed; compare the expected clients, accounts, deposits, interop parties and Oracle "
+                             "entries with Fineract and vNext and print a line for every client that differs")
+    parser.add_argument("--repair", action="store_true",
+                        help="with --verify, run the missing stages of the differing clients and verify them again")
+    parser.add_argument("--cleanup", action="store_true",
+                        help="do not seed; remove what seeding created, with --workers in parallel: undo deposits and "
+                             "close savings accounts, delete interop parties and Oracle entries, then close the clients. "
+                             "Clients are found by the ids in --journal if given, otherwise by their external ids")
+    parser.add_argument("--verify-page-size", type=int, default=VERIFY_PAGE_SIZE,
+                        help=f"clients/savings accounts per paged GET for --verify and --cleanup (default: {VERIFY_PAGE_SIZE})")
+    parser.add_argument("--verify-report", metavar="PATH",
+                        help="with --verify, also write the differences to this JSON file")
+    parser.add_argument("--batch-size", type=int, default=0,
+                        help="send the create/approve/activate/deposit chain of this many clients as one "
+                             "Fineract /batches call (default: 0, one request per step)")
+    parser.add_argument("--enclosing-transaction", action="store_true",
+                        help="with --batch-size, run each batch in a single Fineract transaction (all or nothing)")
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.adaptive_concurrency:
+        if args.workers == 1:
+            args.workers = ADAPTIVE_DEFAULT_WORKERS
+        if args.initial_concurrency < 1 or args.target_p95 <= 0 or not 0 <= args.max_error_rate <= 1:
+            parser.error("--initial-concurrency must be at least 1, --target-p95 positive and --max-error-rate between 0 and 1")
+    if args.tenant_concurrency is None:
+        args.tenant_concurrency = args.workers if args.adaptive_concurrency else 4
+    if args.tenant_concurrency < 1:
+        parser.error("--tenant-concurrency must be at least 1")
+    if args.retries < 0:
+        parser.error("--retries cannot be negative")
+    if (args.cprofile or args.profile_memory) and not args.profile:
+        parser.error("--cprofile and --profile-memory need --profile")
+    if args.resume and not args.journal:
+        parser.error("--resume requires --journal")
+    if args.cleanup and (args.verify or args.offline or args.resume):
+        parser.error("--cleanup cannot be combined with --verify, --offline or --resume")
+    if args.cleanup and args.journal and not os.path.exists(args.journal):
+        parser.error(f"journal {args.journal} does not exist")
+    if args.journal and not args.resume and not args.cleanup and os.path.exists(args.journal) and os.path.getsize(args.journal) > 0:
+        parser.error(f"journal {args.journal} already exists; use --resume to continue it or remove it to start over")
+    if args.vnext_bulk_size < 0:
+        parser.error("--vnext-bulk-size cannot be negative")
+    if args.clients_per_tenant is not None and args.clients_per_tenant < 1:
+        parser.error("--clients-per-tenant must be at least 1")
+    if args.progress_interval < 0:
+        parser.error("--progress-interval cannot be negative")
+    if args.metadata_ttl < 0:
+        parser.error("--metadata-ttl cannot be negative")
+    if args.batch_size < 0:
+        parser.error("--batch-size cannot be negative")
+    if (args.repair or args.verify_report) and not args.verify:
+        parser.error("--repair and --verify-report require --verify")
+    if args.verify and args.offline:
+        parser.error("--verify and --offline cannot be combined")
+    if args.verify_page_size < 1:
+        parser.error("--verify-page-size must be at least 1")
+    if args.pool_size is None:
+        args.pool_size = max(DEFAULT_POOL_SIZE, args.workers)
+    elif args.pool_size < 1:
+        parser.error("--pool-size must be at least 1")
+    return args
+
+
+# --- Main Execution ---
+if __name__ == "__main__":
+    args = parse_args()
+    setup_logging(logging.DEBUG if args.verbose else logging.ERROR if args.quiet else logging.INFO,
+                  args.log_format, args.log_file)
+    http_sessions.configure(args.pool_size, args.keep_alive)
+    MSISDN_SEED = args.msisdn_seed
+    CONNECT_TIMEOUT, READ_TIMEOUT, MAX_RETRIES = args.connect_timeout, args.read_timeout, args.retries
+    TENANT_CONFIG_FILE = args.tenant_config
+    configure_api_urls(args.fineract_url, args.vnext_url)
+    if args.adaptive_concurrency:
+        adaptive_concurrency = (args.workers, args.initial_concurrency, args.target_p95, args.max_error_rate)
+    tenant_metadata = TenantMetadataCache(args.metadata_cache, args.metadata_ttl)
+    if args.refresh_metadata:
+        tenant_metadata.invalidate()
+    if args.profile:
+        start_profiler(args.profile, args.cprofile, args.profile_memory)
+
+    try:
+        with profile_stage("plan"):
+            plan = build_tenant_plan(args.tenant_spec, args.clients_per_tenant)
+    except (OSError, ValueError) as e:
+        sys.exit(f"Error: {e}")
+
+    if args.offline:
+        with profile_stage("offline"):
+            generate_offline_dataset(
+                args.offline, args.offline_format, {tenant_id: settings["clients"] for tenant_id, settings in plan.items()}
+            )
+        finish_profiler()
+        sys.exit(0)
+    if args.resume:
+        journal_settings, resume_progress = SeedingJournal.load(args.journal)
+        # Mobile numbers must match the interrupted run, so its seed wins over --msisdn-seed
+        MSISDN_SEED = journal_settings.get("msisdn_seed", MSISDN_SEED)
+        log.info("Resuming from journal %s: %s clients with recorded progress.", args.journal, len(resume_progress))
+    if args.journal and not args.cleanup:
+        journal = SeedingJournal(args.journal)
+        if not args.resume:
+            journal.write({"run": {"msisdn_seed": MSISDN_SEED, "started": datetime.datetime.now().isoformat()}})
+    if args.vnext_bulk_size > 0:
+        vnext_registrar = VnextBulkRegistrar(args.vnext_bulk_size)
+    contexts = [
+        TenantContext(tenant_id, select_client_numbers(settings["clients"], args.client_range, args.shard))
+        for tenant_id, settings in plan.items()
+    ]
+    exit_status = 0
+    if args.verify:
+        lookup_workers = args.workers if args.workers > 1 else VERIFY_LOOKUP_WORKERS
+        with profile_stage("verify"):
+            verification = verify_tenants(contexts, args.verify_page_size, lookup_workers)
+            write_verification_diff(verification, sys.stdout)
+        fixable = repair_contexts(verification) if args.repair else []
+        if fixable:
+            log.info("Repairing %s clients...", sum(len(context.client_numbers) for context in fixable))
+            with profile_stage("repair"):
+                fixable = prepare_tenants(fixable, args.workers)
+                onboard_tenants(fixable, args.workers, args.tenant_concurrency, args.batch_size, args.enclosing_transaction)
+            with profile_stage("recheck"):
+                rechecked = verify_tenants([TenantContext(context.tenant_id, context.client_numbers) for context in fixable],
+                                           args.verify_page_size, lookup_workers)
+            log.info("Differences left after the repair:")
+            write_verification_diff(rechecked, sys.stdout)
+            for context in fixable:
+                mismatched, again = verification[context.tenant_id], rechecked[context.tenant_id]
+                for client_number in context.client_numbers:
+                    mismatched.pop(client_number, None)
+                verification[context.tenant_id] = None if again is None else {**mismatched, **again}
+        if args.verify_report:
+            with open(args.verify_report, "w", encoding="utf-8") as report_file:
+                json.dump(verification_report(verification), report_file, indent=2)
+        exit_status = int(any(mismatched is None or mismatched for mismatched in verification.values()))
+    elif args.cleanup:
+        cleanup_progress = None
+        if args.journal:
+            journal_settings, cleanup_progress = SeedingJournal.load(args.journal)
+            MSISDN_SEED = journal_settings.get("msisdn_seed", MSISDN_SEED)
+            journalled = collections.defaultdict(list)
+            for tenant_id, client_number in cleanup_progress:
+                journalled[tenant_id].append(client_number)
+            contexts = [TenantContext(tenant_id, sorted(client_numbers)) for tenant_id, client_numbers in journalled.items()]
+            log.info("Removing the %s clients recorded in journal %s.", len(cleanup_progress), args.journal)
+        progress = ProgressReporter(sum(len(context.client_numbers) for context in contexts), args.progress_interval)
+        progress.start()
+        with profile_stage("cleanup"):
+            results = run_teardown(contexts, max(args.workers, VERIFY_LOOKUP_WORKERS), args.tenant_concurrency,
+                                   args.verify_page_size, cleanup_progress)
+        progress.stop()
+        exit_status = int(any(failed for _, failed in results.values()))
+        if args.journal and not exit_status:
+            log.info("Journal %s now describes removed data; delete it before seeding again.", args.journal)
+    else:
+        # Tenants are independent, so their savings products are set up at the same time
+        with profile_stage("prepare tenants"):
+            contexts = prepare_tenants(contexts, args.workers)
+        progress = ProgressReporter(sum(len(context.client_numbers) for context in contexts), args.progress_interval)
+        progress.start()
+        with profile_stage("onboard clients"):
+            onboard_tenants(contexts, args.workers, args.tenant_concurrency, args.batch_size, args.enclosing_transaction)
+        progress.stop()
+    for limiter in concurrency_limiters.values():
+        summary = limiter.summary()
+        log.info("Adaptive concurrency for %s settled at %s in-flight requests (range %s-%s over %s decisions)",
+                 limiter.name, summary["settled"], summary["min"], summary["max"], summary["decisions"])
+
+    log.info("Request summary:\n%s", run_metrics.summary_table())
+    if args.metrics_json:
+        metrics = run_metrics.to_dict()
+        if concurrency_limiters:
+            metrics["adaptive_concurrency"] = {limiter.name: limiter.summary() for limiter in concurrency_limiters.values()}
+        with open(args.metrics_json, "w", encoding="utf-8") as metrics_file:
+            json.dump(metrics, metrics_file, indent=2)
+    if args.metrics_prom:
+        with open(args.metrics_prom, "w", encoding="utf-8") as metrics_file:
+            metrics_file.write(run_metrics.to_prometheus())
+
+    for base_url, (opened, reused) in http_sessions.connection_stats().items():
+        log.info("HTTP connections to %s: %s opened, %s reused", base_url, opened, reused)
+    http_sessions.close()
+    if journal is not None:
+        journal.close()
+    finish_profiler()
+
+    log.info("All tenants processed.")
+    sys.exit(exit_status)
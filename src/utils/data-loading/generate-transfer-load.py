@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+# drives open-loop transfer traffic through the PHEE channel connector between the clients that
+# generate-mifos-vnext-data.py seeded, and reports end-to-end latency percentiles and throughput
+# assumes generate-mifos-vnext-data.py has been run with the same --msisdn-seed, --tenant-config,
+# --tenant-spec and --clients-per-tenant, which decide the tenants and clients to pick from
+#
+# usage:
+#   generate-transfer-load.py --rate 20 --duration 120
+#   generate-transfer-load.py --rate 50 --duration 300 --arrival poisson --warmup 30 --output-json load.json
+#
+# Open loop: transfers are started on a fixed schedule (or Poisson arrivals) whether or not earlier
+# ones have finished, and latency is measured from the scheduled start, so a slow system shows up
+# as growing latency instead of silently lowering the offered rate.
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import importlib.util
+import json
+import os
+import random
+import sys
+import time
+import uuid
+
+import requests
+import requests.adapters
+import urllib3
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning) # Disable InsecureRequestWarning
+
+# --- Configuration ---
+TRANSFER_URL = "https://channel.mifos.gazelle.test/channel/transfer"
+# Polled with the transfer's X-CorrelationID until it reaches a final state
+TRANSFER_STATE_URL = "https://channel.mifos.gazelle.test/channel/txnState/{correlation_id}"
+CURRENCY = "USD"
+
+DEFAULT_RATE = 5.0 # Transfers started per second
+DEFAULT_DURATION = 60.0 # Seconds of traffic
+DEFAULT_MAX_IN_FLIGHT = 200 # Transfers in progress at once; arrivals beyond this are counted as dropped
+POLL_INTERVAL = 0.5 # Seconds between transfer state polls
+COMPLETION_TIMEOUT = 60.0 # Seconds after the scheduled start before a transfer counts as timed out
+REQUEST_TIMEOUT = (5.0, 30.0) # (connect, read) seconds for each HTTP request
+PROGRESS_INTERVAL = 5.0 # Seconds between progress lines
+
+# Final states reported by the channel's txnState endpoint (compared upper-cased)
+COMPLETED_STATES = {"COMMITTED", "COMPLETED", "SUCCESS", "SUCCESSFUL", "ACCEPTED_AND_COMPLETED"}
+FAILED_STATES = {"FAILED", "ABORTED", "REJECTED", "ERROR", "EXPIRED"}
+# Response fields that may carry the state, in the order they are checked
+STATE_FIELDS = ("transferState", "transactionState", "transactionStatus", "status", "state")
+
+OUTCOMES = ("completed", "failed", "timeout", "rejected", "error", "dropped")
+
+GENERATOR_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "generate-mifos-vnext-data.py")
+
+
+def load_generator():
+    """Loads generate-mifos-vnext-data.py as a module, for its client records and latency histogram."""
+    spec = importlib.util.spec_from_file_location("generate_mifos_vnext_data", GENERATOR_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+generator = load_generator()
+
+
+# --- Parties ---
+def seeded_parties(plan, tenants=None):
+    """
+    Returns {tenant: [mobile numbers]} for the clients the data generator seeds with plan (from
+    generator.build_tenant_plan()): client numbers 1..clients of each of tenants (default: every
+    tenant in the plan), using the generator's MSISDN_SEED. Raises ValueError for a tenant the
+    plan does not seed.
+    """
+    parties = {}
+    for tenant in tenants or plan:
+        if tenant not in plan:
+            raise ValueError(f"Tenant {tenant} is not seeded by the tenant plan ({', '.join(plan)})")
+        parties[tenant] = [generator.client_record(tenant, n)["mobile_number"]
+                           for n in range(1, plan[tenant]["clients"] + 1)]
+    return parties
+
+
+def pick_transfer(rng, parties, max_amount):
+    """Picks a payer and a payee in two different tenants and an amount. Returns the transfer dict."""
+    payer_tenant, payee_tenant = rng.sample(sorted(parties), 2)
+    return {
+        "payer_tenant": payer_tenant,
+        "payee_tenant": payee_tenant,
+        "payer": rng.choice(parties[payer_tenant]),
+        "payee": rng.choice(parties[payee_tenant]),
+        "amount": rng.randint(1, max_amount),
+    }
+
+
+def build_transfer_payload(transfer):
+    """The /channel/transfer body, as sent by make-payment.sh."""
+    return {
+        "payer": {"partyIdInfo": {"partyIdType": "MSISDN", "partyIdentifier": transfer["payer"]}},
+        "payee": {"partyIdInfo": {"partyIdType": "MSISDN", "partyIdentifier": transfer["payee"]}},
+        "amount": {"amount": transfer["amount"], "currency": CURRENCY},
+    }
+
+
+def transfer_state(body):
+    """Returns the upper-cased state in a txnState response body, or None if it has none."""
+    if not isinstance(body, dict):
+        return None
+    for field in STATE_FIELDS:
+        value = body.get(field)
+        if isinstance(value, str) and value:
+            return value.upper()
+    return None
+
+
+# --- Load generation ---
+class TransferLoad:
+    """
+    Runs the open-loop schedule on an asyncio event loop. HTTP calls go through one pooled
+    requests.Session on a thread pool sized to max_in_flight, so the scheduler never waits
+    on the network and a request never waits for a free connection.
+    """
+
+    def __init__(self, parties, rate, duration, arrival="constant", warmup=0.0, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                 poll=True, poll_interval=POLL_INTERVAL, completion_timeout=COMPLETION_TIMEOUT, max_amount=10, seed=None):
+        self.parties = parties
+        self.rate = rate
+        self.duration = duration
+        self.arrival = arrival
+        self.warmup = warmup
+        self.max_in_flight = max_in_flight
+        self.poll = poll
+        self.poll_interval = poll_interval
+        self.completion_timeout = completion_timeout
+        self.max_amount = max_amount
+        self.rng = random.Random(seed)
+
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=max_in_flight)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_in_flight)
+
+        self.outcomes = collections.Counter()
+        self.accept_latency = generator.LatencyHistogram() # POST /channel/transfer
+        self.end_to_end_latency = generator.LatencyHistogram() # scheduled start -> final state
+        self.schedule_lag = generator.LatencyHistogram() # how late the generator started each transfer
+        self.in_flight = 0
+        self.started = 0
+        self.first_scheduled = None # scheduled start of the first measured transfer
+        self.last_completion = None
+
+    def _http(self, method, url, headers, json_data=None):
+        response = self.session.request(method, url, headers=headers, json=json_data, timeout=REQUEST_TIMEOUT, verify=False)
+        try:
+            body = response.json()
+        except ValueError:
+            body = response.text
+        return response.status_code, body
+
+    async def _call(self, method, url, headers, json_data=None):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._http, method, url, headers, json_data)
+
+    def _arrival_gaps(self):
+        if self.arrival == "poisson":
+            while True:
+                yield self.rng.expovariate(self.rate)
+        while True:
+            yield 1.0 / self.rate
+
+    async def _transfer(self, scheduled, measure):
+        transfer = pick_transfer(self.rng, self.parties, self.max_amount)
+        correlation_id = str(uuid.uuid4())
+        headers = {
+            "Platform-TenantId": transfer["payer_tenant"],
+            "X-PayeeDFSP-ID": transfer["payee_tenant"],
+            "X-CorrelationID": correlation_id,
+            "Content-Type": "application/json",
+            "Accept": "*/*",
+        }
+        outcome = "error"
+        try:
+            status, body = await self._call("POST", TRANSFER_URL, headers, build_transfer_payload(transfer))
+            accepted = time.monotonic()
+            if measure:
+                self.accept_latency.record(accepted - scheduled)
+            if not 200 <= status < 300:
+                outcome = "rejected"
+                print(f"Transfer {correlation_id} rejected (HTTP {status}): {body}", file=sys.stderr)
+                return
+            if not self.poll:
+                outcome = "completed"
+                return
+            outcome = await self._wait_for_final_state(correlation_id, transfer["payer_tenant"], scheduled)
+        except requests.exceptions.RequestException as e:
+            print(f"Transfer {correlation_id} failed: {e}", file=sys.stderr)
+        finally:
+            self.in_flight -= 1
+            if measure:
+                self.outcomes[outcome] += 1
+                if outcome == "completed":
+                    finished = time.monotonic()
+                    self.end_to_end_latency.record(finished - scheduled)
+                    self.last_completion = finished
+
+    async def _wait_for_final_state(self, correlation_id, tenant, scheduled):
+        url = TRANSFER_STATE_URL.format(correlation_id=correlation_id)
+        headers = {"Platform-TenantId": tenant, "X-CorrelationID": correlation_id, "Accept": "application/json"}
+        while time.monotonic() - scheduled < self.completion_timeout:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                status, body = await self._call("GET", url, headers)
+            except requests.exceptions.RequestException:
+                continue # the transfer was accepted, so a failed poll says nothing about it; try again
+            state = transfer_state(body) if status == 200 else None
+            if state in COMPLETED_STATES:
+                return "completed"
+            if state in FAILED_STATES:
+                return "failed"
+            # 404 or a non-final state: the transfer is not finished yet
+        return "timeout"
+
+    @staticmethod
+    def _report_crash(task):
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Transfer task crashed: {task.exception()!r}", file=sys.stderr)
+
+    async def _report_progress(self, start):
+        while True:
+            await asyncio.sleep(PROGRESS_INTERVAL)
+            print(f"[{time.monotonic() - start:6.1f}s] started {self.started}, in flight {self.in_flight}, "
+                  f"completed {self.outcomes['completed']}, p99 {self.end_to_end_latency.percentile(0.99) * 1000:.0f} ms",
+                  file=sys.stderr)
+
+    async def run(self):
+        start = time.monotonic()
+        end = start + self.warmup + self.duration
+        measure_from = start + self.warmup
+        progress = asyncio.create_task(self._report_progress(start))
+        tasks = set()
+        scheduled = start
+        for gap in self._arrival_gaps():
+            scheduled += gap
+            if scheduled >= end:
+                break
+            delay = scheduled - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            measure = scheduled >= measure_from
+            if measure:
+                self.schedule_lag.record(max(time.monotonic() - scheduled, 0.0))
+                self.first_scheduled = self.first_scheduled or scheduled
+            if self.in_flight >= self.max_in_flight:
+                # The generator itself is saturated; waiting here would turn the run into a closed loop
+                if measure:
+                    self.outcomes["dropped"] += 1
+                continue
+            self.in_flight += 1
+            self.started += 1
+            task = asyncio.create_task(self._transfer(scheduled, measure))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            task.add_done_callback(self._report_crash)
+        print(f"Schedule finished after {time.monotonic() - start:.1f}s; waiting for {len(tasks)} transfers in flight...", file=sys.stderr)
+        if tasks:
+            # A transfer that raised is already counted as an error; it must not abort the others
+            await asyncio.gather(*tasks, return_exceptions=True)
+        progress.cancel()
+        self.executor.shutdown()
+        self.session.close()
+
+    def results(self):
+        """Returns the run's outcome counts, throughput and latency percentiles as a dict."""
+        # From the first measured scheduled start to the last completion, so the time it took to get
+        # the first transfer through is part of the window
+        completion_window = (self.last_completion - self.first_scheduled) if self.last_completion else 0.0
+        return {
+            "offered_rate": self.rate,
+            "arrival": self.arrival,
+            "duration": self.duration,
+            "warmup": self.warmup,
+            "outcomes": {outcome: self.outcomes[outcome] for outcome in OUTCOMES},
+            "completed_per_second": self.outcomes["completed"] / completion_window if completion_window > 0 else 0.0,
+            "latency": {
+                "end_to_end": histogram_summary(self.end_to_end_latency),
+                "accept": histogram_summary(self.accept_latency),
+                "schedule_lag": histogram_summary(self.schedule_lag),
+            },
+        }
+
+
+PERCENTILES = (0.5, 0.75, 0.9, 0.99, 0.999)
+
+
+def histogram_summary(histogram):
+    """count, mean, min, max and percentiles of a LatencyHistogram, in milliseconds."""
+    summary = {"count": histogram.count}
+    if histogram.count:
+        summary["mean_ms"] = histogram.total / histogram.count * 1000
+        summary["min_ms"] = histogram.min * 1000
+        summary["max_ms"] = histogram.max * 1000
+        for fraction in PERCENTILES:
+            summary[f"p{fraction * 100:g}_ms"] = histogram.percentile(fraction) * 1000
+    return summary
+
+
+def format_results(results):
+    """Formats results() as the table printed at the end of a run."""
+    outcomes = results["outcomes"]
+    lines = [
+        f"Offered {results['offered_rate']:g} transfers/s ({results['arrival']}) for {results['duration']:g}s",
+        "Outcomes: " + ", ".join(f"{outcome} {outcomes[outcome]}" for outcome in OUTCOMES),
+        f"Completed throughput: {results['completed_per_second']:.2f} transfers/s",
+        "",
+        f"{'Latency (ms)':<14} {'count':>7} {'p50':>9} {'p75':>9} {'p90':>9} {'p99':>9} {'p99.9':>9} {'max':>9}",
+    ]
+    for name, summary in results["latency"].items():
+        if not summary["count"]:
+            lines.append(f"{name:<14} {0:>7}")
+            continue
+        lines.append(f"{name:<14} {summary['count']:>7} " + " ".join(
+            f"{summary[key]:>9.1f}" for key in ("p50_ms", "p75_ms", "p90_ms", "p99_ms", "p99.9_ms", "max_ms")))
+    return "\n".join(lines)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Open-loop transfer load through the PHEE channel connector between seeded clients."
+    )
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE,
+                        help=f"transfers started per second (default: {DEFAULT_RATE:g})")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION,
+                        help=f"seconds of measured traffic (default: {DEFAULT_DURATION:g})")
+    parser.add_argument("--warmup", type=float, default=0.0,
+                        help="seconds of traffic before --duration whose transfers are not measured (default: 0)")
+    parser.add_argument("--arrival", choices=["constant", "poisson"], default="constant",
+                        help="evenly spaced arrivals or Poisson arrivals at --rate (default: constant)")
+    parser.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT,
+                        help=f"transfers in progress at once; later arrivals are dropped (default: {DEFAULT_MAX_IN_FLIGHT})")
+    parser.add_argument("--no-poll", dest="poll", action="store_false",
+                        help="count a transfer as done once the channel accepts it instead of polling its state")
+    parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL,
+                        help=f"seconds between transfer state polls (default: {POLL_INTERVAL:g})")
+    parser.add_argument("--completion-timeout", type=float, default=COMPLETION_TIMEOUT,
+                        help=f"seconds before an unfinished transfer counts as timed out (default: {COMPLETION_TIMEOUT:g})")
+    parser.add_argument("--max-amount", type=int, default=10, help="transfer amounts are 1..this (default: 10)")
+    parser.add_argument("--tenants", default=None,
+                        help="comma-separated tenants to transfer between (default: every tenant of the tenant plan)")
+    parser.add_argument("--clients-per-tenant", type=int, default=None,
+                        help="the --clients-per-tenant the data was generated with (default: the --tenant-spec or TENANTS counts)")
+    parser.add_argument("--tenant-spec", metavar="PATH",
+                        help="the --tenant-spec the data was generated with (default: every tenant in --tenant-config)")
+    parser.add_argument("--msisdn-seed", type=int, default=generator.MSISDN_SEED,
+                        help=f"the --msisdn-seed the data was generated with (default: {generator.MSISDN_SEED})")
+    parser.add_argument("--tenant-config", metavar="PATH", default=generator.TENANT_CONFIG_FILE,
+                        help="tenant config CSV (default: config/mifos-tenant-config.csv)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for picking parties and amounts")
+    parser.add_argument("--output-json", metavar="PATH", help="also write the results to this JSON file")
+    args = parser.parse_args()
+    if args.rate <= 0:
+        parser.error("--rate must be positive")
+    if args.duration <= 0:
+        parser.error("--duration must be positive")
+    if args.max_in_flight < 1:
+        parser.error("--max-in-flight must be at least 1")
+    if args.max_amount < 1:
+        parser.error("--max-amount must be at least 1")
+    if args.clients_per_tenant is not None and args.clients_per_tenant < 1:
+        parser.error("--clients-per-tenant must be at least 1")
+    args.tenants = [t.strip() for t in args.tenants.split(",")] if args.tenants else None
+    if args.tenants is not None and len(args.tenants) < 2:
+        parser.error("--tenants needs at least two tenants")
+    return args
+
+
+# --- Main Execution ---
+if __name__ == "__main__":
+    args = parse_args()
+    generator.MSISDN_SEED = args.msisdn_seed
+    generator.TENANT_CONFIG_FILE = args.tenant_config
+    try:
+        parties = seeded_parties(generator.build_tenant_plan(args.tenant_spec, args.clients_per_tenant), args.tenants)
+    except (OSError, ValueError) as e:
+        sys.exit(f"Error: {e}")
+    if len(parties) < 2:
+        sys.exit(f"Error: transfers need at least two tenants, the tenant plan has {', '.join(parties)}")
+    print(f"Transferring between {sum(len(p) for p in parties.values())} clients of {', '.join(parties)} "
+          f"at {args.rate:g}/s for {args.duration:g}s (+{args.warmup:g}s warmup)...", file=sys.stderr)
+
+    load = TransferLoad(parties, args.rate, args.duration, args.arrival, args.warmup, args.max_in_flight,
+                        args.poll, args.poll_interval, args.completion_timeout, args.max_amount, args.seed)
+    asyncio.run(load.run())
+    results = load.results()
+
+    print("", file=sys.stderr)
+    print(format_results(results), file=sys.stderr)
+    if args.output_json:
+        with open(args.output_json, "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2)
@@ -0,0 +1,667 @@
+#!/usr/bin/env python3
+# local stand-ins for the Fineract and vNext admin APIs that generate-mifos-vnext-data.py calls,
+# so the data tooling can be run and benchmarked without a k3s deployment
+#
+# usage:
+#   stub-servers.py --fineract-port 18080 --vnext-port 18081 --latency 0.01 --error-rate 0.02
+#   generate-mifos-vnext-data.py --fineract-url http://127.0.0.1:18080/fineract-provider/api/v1 \
+#       --vnext-url http://127.0.0.1:18081 --clients-per-tenant 100 --workers 8
+#
+# implemented: savingsproducts, clients (create, get, close, delete), savingsaccounts (create, get,
+# approve, activate, deposit, undo transaction, undoApproval, close, delete), offices, paymenttypes,
+# clients/template (legal forms, closure reasons), externalId lookups and offset/limit paging,
+# interoperation/parties/MSISDN/{msisdn} (register, get, delete), batches (with $.field references and
+# enclosingTransaction), and vNext _interop/participants (single, bulk, GET and DELETE by MSISDN; bulk
+# registrations are accepted with a 202 and applied a little later, as in FSPIOP, and error_rate of
+# their entries are silently dropped).
+# State is kept in memory per Fineract-Platform-TenantId; GET /__stats returns request counts,
+# POST /__reset clears everything
+import argparse
+import asyncio
+import collections
+import http
+import itertools
+import json
+import random
+import re
+import sys
+import threading
+import urllib.parse
+
+# --- Configuration ---
+FINERACT_PREFIX = "/fineract-provider/api/v1/"
+VNEXT_PREFIX = "/_interop/participants"
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_FINERACT_PORT = 18080
+DEFAULT_VNEXT_PORT = 18081
+
+# Reference data every tenant starts with, as in a fresh Fineract database
+OFFICES = [{"id": 1, "name": "Head Office", "nameDecorated": "Head Office", "hierarchy": "."}]
+PAYMENT_TYPES = [{"id": 1, "name": "Money Transfer", "isCashPayment": False, "position": 1}]
+LEGAL_FORMS = [{"id": 1, "code": "legalFormType.person", "value": "PERSON"},
+               {"id": 2, "code": "legalFormType.entity", "value": "ENTITY"}]
+CLIENT_CLOSURE_REASONS = [{"id": 17, "name": "Test data reset"}] # ClientClosureReason code values
+CLIENT_STATUSES = {"pending": {"id": 100, "code": "clientStatusType.pending", "value": "Pending"},
+                   "active": {"id": 300, "code": "clientStatusType.active", "value": "Active"},
+                   "closed": {"id": 600, "code": "clientStatusType.closed", "value": "Closed"}}
+
+REFERENCE = re.compile(r"\$\.(\w+)") # $.clientId style references in /batches entries
+BULK_REGISTRATION_DELAY = 0.1 # Seconds, on top of the latency, before an accepted bulk registration is applied
+
+
+class StubError(Exception):
+    """An error response: the HTTP status and a Fineract style error body."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.body = {"httpStatusCode": str(status), "developerMessage": message,
+                     "errors": [{"developerMessage": message}]}
+
+
+# --- In-memory Fineract and vNext state ---
+class TenantState:
+    """Everything one Fineract tenant holds; ids are per tenant, as in Fineract."""
+
+    def __init__(self):
+        self.ids = itertools.count(1)
+        self.products = {}
+        self.clients = {}
+        self.clients_by_external_id = {}
+        self.accounts = {}
+        self.accounts_by_external_id = {}
+        self.transactions = collections.defaultdict(list) # account id -> its transactions
+        self.interop_parties = {}
+        self.offices = {office["id"]: office for office in OFFICES}
+        self.payment_types = {payment_type["id"]: payment_type for payment_type in PAYMENT_TYPES}
+        self.legal_forms = {legal_form["id"]: legal_form for legal_form in LEGAL_FORMS}
+
+
+class StubApis:
+    """
+    The request handlers. Each handler returns (status, body) or raises StubError, and appends
+    an undo function for every change it makes to `undo`, which /batches uses to roll back an
+    enclosing transaction.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.tenants = collections.defaultdict(TenantState)
+        self.participants = {} # MSISDN -> fspId registered with the vNext Oracle
+
+    # --- Fineract ---
+    def fineract(self, tenant_id, method, path, query, body, undo):
+        tenant = self.tenants[tenant_id]
+        parts = path.strip("/").split("/")
+        command = query.get("command")
+        if parts == ["savingsproducts"]:
+            return self._list_products(tenant) if method == "GET" else self._create_product(tenant, body, undo)
+        if len(parts) == 2 and parts[0] == "savingsproducts" and method == "GET":
+            product = tenant.products.get(_int(parts[1]))
+            if product is None:
+                raise StubError(404, f"Savings product with identifier {parts[1]} does not exist")
+            return 200, product
+        if parts == ["offices"] and method == "GET":
+            return 200, list(tenant.offices.values())
+        if parts == ["paymenttypes"] and method == "GET":
+            return 200, list(tenant.payment_types.values())
+        if parts == ["clients", "template"] and method == "GET":
+            return 200, {"officeOptions": list(tenant.offices.values()),
+                         "clientLegalFormOptions": list(tenant.legal_forms.values()),
+                         "narrations": CLIENT_CLOSURE_REASONS}
+        if parts == ["clients"]:
+            if method == "GET":
+                return self._page(tenant.clients, tenant.clients_by_external_id, query)
+            return self._create_client(tenant, body, undo)
+        if len(parts) == 2 and parts[0] == "clients":
+            client = tenant.clients.get(_int(parts[1]))
+            if client is None:
+                raise StubError(404, f"Client with identifier {parts[1]} does not exist")
+            if method == "GET":
+                return 200, client
+            if method == "DELETE":
+                return self._delete_client(tenant, client, undo)
+            if command == "close":
+                return self._close_client(tenant, client, body, undo)
+        if parts == ["savingsaccounts"]:
+            if method == "GET":
+                return self._page(tenant.accounts, tenant.accounts_by_external_id, query)
+            return self._create_account(tenant, body, undo)
+        if len(parts) == 2 and parts[0] == "savingsaccounts":
+            account = self._account(tenant, parts[1])
+            if method == "GET":
+                if query.get("associations") == "transactions":
+                    return 200, {**account, "transactions": tenant.transactions[account["id"]]}
+                return 200, account
+            if method == "DELETE":
+                return self._delete_account(tenant, account, undo)
+            if command in ("approve", "activate", "undoApproval", "close"):
+                return self._transition(account, command, undo)
+        if len(parts) == 3 and parts[0] == "savingsaccounts" and parts[2] == "transactions" and command == "deposit":
+            return self._deposit(tenant, self._account(tenant, parts[1]), body, undo)
+        if len(parts) == 4 and parts[0] == "savingsaccounts" and parts[2] == "transactions" and command == "undo":
+            return self._undo_transaction(tenant, self._account(tenant, parts[1]), parts[3], undo)
+        if len(parts) == 4 and parts[:3] == ["interoperation", "parties", "MSISDN"]:
+            if parts[3] not in tenant.interop_parties and method in ("GET", "DELETE"):
+                raise StubError(404, f"Interop identifier MSISDN {parts[3]} does not exist")
+            if method == "GET":
+                return 200, {"accountId": tenant.interop_parties[parts[3]]}
+            if method == "DELETE":
+                account_id = tenant.interop_parties.pop(parts[3])
+                undo.append(lambda: tenant.interop_parties.__setitem__(parts[3], account_id))
+                return 200, {"resourceId": parts[3]}
+            return self._register_party(tenant, parts[3], body, undo)
+        raise StubError(404, f"No stub for {method} {path}")
+
+    def _list_products(self, tenant):
+        return 200, list(tenant.products.values())
+
+    def _create_product(self, tenant, body, undo):
+        if any(product["shortName"] == body.get("shortName") for product in tenant.products.values()):
+            raise StubError(403, f"Savings product with shortName {body.get('shortName')} already exists")
+        product_id = next(tenant.ids)
+        tenant.products[product_id] = {"id": product_id, "name": body.get("name"), "shortName": body.get("shortName"),
+                                       "currency": {"code": body.get("currencyCode")}}
+        undo.append(lambda: tenant.products.pop(product_id, None))
+        return 200, {"resourceId": product_id}
+
+    @staticmethod
+    def _page(items, by_external_id, query):
+        if "externalId" in query:
+            item_id = by_external_id.get(query["externalId"])
+            page = [items[item_id]] if item_id is not None else []
+            return 200, {"totalFilteredRecords": len(page), "pageItems": page}
+        # Items are kept in id order, so this is orderBy=id&sortOrder=ASC
+        offset = max(_int(query.get("offset")) or 0, 0)
+        limit = _int(query.get("limit")) or 200
+        page = list(itertools.islice(items.values(), offset, offset + limit))
+        return 200, {"totalFilteredRecords": len(items), "pageItems": page}
+
+    def _create_client(self, tenant, body, undo):
+        external_id = body.get("externalId")
+        if external_id and external_id in tenant.clients_by_external_id:
+            raise StubError(403, f"Client with externalId {external_id} already exists")
+        if _int(body.get("officeId")) not in tenant.offices:
+            raise StubError(404, f"Office with identifier {body.get('officeId')} does not exist")
+        if body.get("legalFormId") is not None and _int(body.get("legalFormId")) not in tenant.legal_forms:
+            raise StubError(400, f"Legal form with identifier {body.get('legalFormId')} does not exist")
+        client_id = next(tenant.ids)
+        tenant.clients[client_id] = {"id": client_id, "externalId": external_id, "firstname": body.get("firstname"),
+                                     "lastname": body.get("lastname"), "mobileNo": body.get("mobileNo"),
+                                     "officeId": body.get("officeId"), "active": bool(body.get("active")),
+                                     "status": CLIENT_STATUSES["active" if body.get("active") else "pending"]}
+        if external_id:
+            tenant.clients_by_external_id[external_id] = client_id
+
+        def remove():
+            tenant.clients.pop(client_id, None)
+            tenant.clients_by_external_id.pop(external_id, None)
+        undo.append(remove)
+        return 200, {"officeId": body.get("officeId"), "clientId": client_id, "resourceId": client_id}
+
+    @staticmethod
+    def _open_accounts(tenant, client):
+        return [account for account in tenant.accounts.values()
+                if account["clientId"] == client["id"] and not account["status"].get("closed")]
+
+    def _delete_client(self, tenant, client, undo):
+        # As in Fineract, only a pending client without accounts can be deleted; active ones are closed
+        if client["status"] != CLIENT_STATUSES["pending"]:
+            raise StubError(403, f"Client with identifier {client['id']} cannot be deleted as it is not in pending state")
+        if any(account["clientId"] == client["id"] for account in tenant.accounts.values()):
+            raise StubError(403, f"Client with identifier {client['id']} has accounts and cannot be deleted")
+        tenant.clients.pop(client["id"])
+        tenant.clients_by_external_id.pop(client["externalId"], None)
+
+        def restore():
+            tenant.clients[client["id"]] = client
+            if client["externalId"]:
+                tenant.clients_by_external_id[client["externalId"]] = client["id"]
+        undo.append(restore)
+        return 200, {"clientId": client["id"], "resourceId": client["id"]}
+
+    def _close_client(self, tenant, client, body, undo):
+        if client["status"] != CLIENT_STATUSES["active"]:
+            raise StubError(400, f"Client with identifier {client['id']} is not active")
+        if _int(body.get("closureReasonId")) not in {reason["id"] for reason in CLIENT_CLOSURE_REASONS}:
+            raise StubError(404, f"Closure reason with identifier {body.get('closureReasonId')} does not exist")
+        if self._open_accounts(tenant, client):
+            raise StubError(400, f"Client with identifier {client['id']} has open accounts")
+        previous = client["status"], client["active"]
+        client.update(status=CLIENT_STATUSES["closed"], active=False)
+        undo.append(lambda: client.update(status=previous[0], active=previous[1]))
+        return 200, {"clientId": client["id"], "resourceId": client["id"]}
+
+    def _create_account(self, tenant, body, undo):
+        client_id = _int(body.get("clientId"))
+        if client_id not in tenant.clients:
+            raise StubError(404, f"Client with identifier {body.get('clientId')} does not exist")
+        if _int(body.get("productId")) not in tenant.products:
+            raise StubError(404, f"Savings product with identifier {body.get('productId')} does not exist")
+        external_id = body.get("externalId")
+        if external_id and external_id in tenant.accounts_by_external_id:
+            raise StubError(403, f"Savings account with externalId {external_id} already exists")
+        account_id = next(tenant.ids)
+        tenant.accounts[account_id] = {
+            "id": account_id, "clientId": client_id, "externalId": external_id, "savingsProductId": _int(body.get("productId")),
+            "status": {"submittedAndPendingApproval": True, "approved": False, "active": False, "closed": False},
+            "summary": {"totalDeposits": 0.0, "accountBalance": 0.0},
+        }
+        if external_id:
+            tenant.accounts_by_external_id[external_id] = account_id
+
+        def remove():
+            tenant.accounts.pop(account_id, None)
+            tenant.accounts_by_external_id.pop(external_id, None)
+        undo.append(remove)
+        return 200, {"clientId": client_id, "savingsId": account_id, "resourceId": account_id}
+
+    @staticmethod
+    def _account(tenant, account_id):
+        account = tenant.accounts.get(_int(account_id))
+        if account is None:
+            raise StubError(404, f"Savings account with identifier {account_id} does not exist")
+        return account
+
+    @staticmethod
+    def _transition(account, command, undo):
+        status = account["status"]
+        if command == "approve":
+            if not status["submittedAndPendingApproval"]:
+                raise StubError(400, "Savings account is not in submitted and pending approval state")
+            changes = {"submittedAndPendingApproval": False, "approved": True}
+        elif command == "undoApproval":
+            if not status["approved"] or status["active"]:
+                raise StubError(400, "Savings account is not in approved state")
+            changes = {"submittedAndPendingApproval": True, "approved": False}
+        elif command == "close":
+            if not status["active"]:
+                raise StubError(400, "Savings account is not active")
+            if account["summary"]["accountBalance"]:
+                raise StubError(400, "Savings account balance must be zero to close it")
+            changes = {"active": False, "closed": True}
+        else:
+            if not status["approved"] or status["active"] or status["closed"]:
+                raise StubError(400, "Savings account is not in approved state")
+            changes = {"active": True}
+        previous = dict(status)
+        status.update(changes)
+        undo.append(lambda: status.update(previous))
+        return 200, {"savingsId": account["id"], "resourceId": account["id"], "changes": changes}
+
+    @staticmethod
+    def _deposit(tenant, account, body, undo):
+        if not account["status"]["active"]:
+            raise StubError(400, "Savings account is not active")
+        if _int(body.get("paymentTypeId")) not in tenant.payment_types:
+            raise StubError(404, f"Payment type with identifier {body.get('paymentTypeId')} does not exist")
+        amount = float(body.get("transactionAmount") or 0)
+        summary = account["summary"]
+        summary["totalDeposits"] += amount
+        summary["accountBalance"] += amount
+        transactions = tenant.transactions[account["id"]]
+        transaction = {"id": next(tenant.ids), "transactionType": {"deposit": True, "value": "Deposit"},
+                       "amount": amount, "reversed": False}
+        transactions.append(transaction)
+
+        def reverse():
+            summary["totalDeposits"] -= amount
+            summary["accountBalance"] -= amount
+            transactions.remove(transaction)
+        undo.append(reverse)
+        return 200, {"savingsId": account["id"], "resourceId": transaction["id"], "changes": {}}
+
+    @staticmethod
+    def _undo_transaction(tenant, account, transaction_id, undo):
+        transaction = next((t for t in tenant.transactions[account["id"]] if t["id"] == _int(transaction_id)), None)
+        if transaction is None:
+            raise StubError(404, f"Savings account transaction with identifier {transaction_id} does not exist")
+        if transaction["reversed"] or not account["status"]["active"]:
+            raise StubError(400, f"Savings account transaction {transaction_id} is already reversed or the account is not active")
+        summary = account["summary"]
+        summary["totalDeposits"] -= transaction["amount"]
+        summary["accountBalance"] -= transaction["amount"]
+        transaction["reversed"] = True
+
+        def restore():
+            summary["totalDeposits"] += transaction["amount"]
+            summary["accountBalance"] += transaction["amount"]
+            transaction["reversed"] = False
+        undo.append(restore)
+        return 200, {"savingsId": account["id"], "resourceId": transaction["id"], "changes": {"reversed": True}}
+
+    @staticmethod
+    def _delete_account(tenant, account, undo):
+        if not account["status"]["submittedAndPendingApproval"]:
+            raise StubError(400, f"Savings account {account['id']} is not in submitted and pending approval state")
+        tenant.accounts.pop(account["id"])
+        tenant.accounts_by_external_id.pop(account["externalId"], None)
+
+        def restore():
+            tenant.accounts[account["id"]] = account
+            if account["externalId"]:
+                tenant.accounts_by_external_id[account["externalId"]] = account["id"]
+        undo.append(restore)
+        return 200, {"savingsId": account["id"], "resourceId": account["id"]}
+
+    @staticmethod
+    def _register_party(tenant, msisdn, body, undo):
+        if msisdn in tenant.interop_parties:
+            raise StubError(403, f"Interop identifier MSISDN {msisdn} already exists")
+        if body.get("accountId") not in tenant.accounts_by_external_id:
+            raise StubError(404, f"Savings account with externalId {body.get('accountId')} does not exist")
+        tenant.interop_parties[msisdn] = body["accountId"]
+        undo.append(lambda: tenant.interop_parties.pop(msisdn, None))
+        return 200, {"resourceId": len(tenant.interop_parties)}
+
+    def batches(self, tenant_id, entries, enclosing_transaction):
+        """
+        Runs /batches entries in order. An entry with a reference has its $.field tokens replaced
+        from the body of the referenced entry's response, and fails if that entry failed. With an
+        enclosing transaction the first failure undoes everything and only its response is returned.
+        """
+        responses = {}
+        undo = []
+        results = []
+        for entry in entries:
+            request_id = entry.get("requestId")
+            reference = entry.get("reference")
+            relative_url = entry.get("relativeUrl", "")
+            body = entry.get("body") or "{}"
+            try:
+                if reference is not None:
+                    referenced = responses.get(reference)
+                    if referenced is None or referenced["statusCode"] != 200:
+                        raise StubError(400, f"Referenced request {reference} did not succeed")
+                    values = json.loads(referenced["body"])
+                    resolve = lambda match: str(values.get(match.group(1), match.group(0)))
+                    relative_url = REFERENCE.sub(resolve, relative_url)
+                    body = REFERENCE.sub(resolve, body)
+                path, _, query = relative_url.partition("?")
+                status, result = self.fineract(tenant_id, entry.get("method", "POST"), path,
+                                               dict(urllib.parse.parse_qsl(query)), json.loads(body), undo)
+            except StubError as e:
+                status, result = e.status, e.body
+            except ValueError as e:
+                status, result = 400, StubError(400, f"Invalid batch entry: {e}").body
+            response = {"requestId": request_id, "statusCode": status,
+                        "headers": [{"name": "Content-Type", "value": "application/json"}], "body": json.dumps(result)}
+            responses[request_id] = response
+            results.append(response)
+            if status != 200 and enclosing_transaction:
+                for action in reversed(undo):
+                    action()
+                return [response]
+        return results
+
+    # --- vNext ---
+    def vnext(self, fsp_id, method, path, body, defer=None):
+        """defer(action) runs action later, for asynchronous bulk registration; without it, it runs at once."""
+        suffix = path[len(VNEXT_PREFIX):].strip("/").split("/") if path != VNEXT_PREFIX else []
+        if method in ("GET", "DELETE") and len(suffix) == 2 and suffix[0] == "MSISDN":
+            if suffix[1] not in self.participants:
+                raise StubError(404, f"MSISDN {suffix[1]} is not registered")
+            if method == "GET":
+                return 200, {"partyList": [{"fspId": self.participants[suffix[1]], "currency": "USD"}]}
+            if self.participants[suffix[1]] != fsp_id:
+                raise StubError(400, f"MSISDN {suffix[1]} is registered to {self.participants[suffix[1]]}, not {fsp_id}")
+            del self.participants[suffix[1]]
+            return 202, None
+        if method != "POST":
+            raise StubError(404, f"No stub for {method} {path}")
+        if len(suffix) == 2 and suffix[0] == "MSISDN":
+            registered = self.participants.setdefault(suffix[1], body.get("fspId") or fsp_id)
+            if registered != (body.get("fspId") or fsp_id):
+                raise StubError(400, f"MSISDN {suffix[1]} is already registered to {registered}")
+            return 202, None
+        if not suffix:
+            # Each party is registered later, unless its MSISDN belongs to another FSP; the results
+            # would go to a PUT /participants/{requestId} callback, which the stub does not make
+            for party in body.get("partyList", []):
+                number, fsp = party.get("partyIdentifier"), party.get("fspId") or fsp_id
+                action = lambda number=number, fsp=fsp: self.participants.setdefault(number, fsp)
+                if defer is None:
+                    action()
+                else:
+                    defer(action)
+            return 202, None
+        raise StubError(404, f"No stub for {method} {path}")
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def route_name(method, path, query):
+    """Request name used in the stats, with ids and MSISDNs replaced like the generator's metrics."""
+    segments = []
+    for segment in path.split("/"):
+        if segments and segments[-1] == "MSISDN":
+            segment = "{msisdn}"
+        elif segment.isdigit():
+            segment = "{id}"
+        segments.append(segment)
+    name = f"{method} {'/'.join(segments)}"
+    if "command" in query:
+        name += f"?command={query['command']}"
+    return name
+
+
+# --- HTTP serving ---
+class StubServer:
+    """
+    Serves StubApis over HTTP/1.1 with keep-alive on one port per service. Every response is
+    delayed by latency seconds (+/- jitter as a fraction of it). error_rate of the requests get a
+    503 without being applied; lost_response_rate are applied but answered with a 504, like a
+    gateway timing out, which is what makes the generator's idempotency lookups necessary.
+    Accepted bulk vNext registrations are applied BULK_REGISTRATION_DELAY + latency seconds
+    later, and error_rate of their entries are dropped, so only checking them shows what happened.
+
+    With capacity, Fineract works on at most that many requests at a time and the rest queue,
+    so latency grows with load like on a small deployment; with max_queue as well, a request
+    arriving behind max_queue others gets a 503 at once, like an overloaded server.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, lost_response_rate=0.0, seed=None,
+                 capacity=0, max_queue=0):
+        self.apis = StubApis()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.lost_response_rate = lost_response_rate
+        self.rng = random.Random(seed)
+        self.stats = collections.Counter()
+        self.servers = []
+        self.capacity = capacity
+        self.max_queue = max_queue
+        self._slots = None # asyncio.Semaphore(capacity), created on the server's event loop
+        self._queued = 0
+
+    def reset(self):
+        self.apis.reset()
+        self.stats.clear()
+
+    async def start(self, host, fineract_port, vnext_port):
+        """Starts both listeners. Returns the (fineract port, vnext port) actually bound (useful with port 0)."""
+        ports = []
+        if self.capacity:
+            self._slots = asyncio.Semaphore(self.capacity)
+        for service, port in (("fineract", fineract_port), ("vnext", vnext_port)):
+            server = await asyncio.start_server(
+                lambda reader, writer, service=service: self._serve_connection(service, reader, writer), host, port)
+            self.servers.append(server)
+            ports.append(server.sockets[0].getsockname()[1])
+        return tuple(ports)
+
+    async def _serve_connection(self, service, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length") or 0))
+                status, payload = await self._respond(service, method, target, headers, body)
+                data = b"" if payload is None else json.dumps(payload).encode()
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                head = (f"HTTP/1.1 {status} {http.HTTPStatus(status).phrase}\r\n"
+                        f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+                writer.write(head.encode("latin-1") + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, service, method, target, headers, body):
+        parts = urllib.parse.urlsplit(target)
+        query = dict(urllib.parse.parse_qsl(parts.query))
+        if parts.path == "/__stats":
+            return 200, {f"{key[0]} {key[1]} {key[2]}": count for key, count in sorted(self.stats.items())}
+        if parts.path == "/__reset":
+            self.reset()
+            return 200, {}
+        if service == "fineract" and self._slots is not None:
+            if self.max_queue and self._slots.locked() and self._queued >= self.max_queue:
+                self.stats[(service, "overloaded", 503)] += 1
+                return 503, StubError(503, "Server overloaded").body
+            self._queued += 1
+            try:
+                await self._slots.acquire()
+            finally:
+                self._queued -= 1
+            try:
+                return await self._process(service, method, parts, query, headers, body)
+            finally:
+                self._slots.release()
+        return await self._process(service, method, parts, query, headers, body)
+
+    async def _process(self, service, method, parts, query, headers, body):
+        if self.latency:
+            await asyncio.sleep(max(self.latency * (1 + self.jitter * self.rng.uniform(-1, 1)), 0))
+
+        status, payload = self._dispatch(service, method, parts.path, query, headers, body)
+        self.stats[(service, route_name(method, parts.path.replace(FINERACT_PREFIX, "/"), query), status)] += 1
+        return status, payload
+
+    def _dispatch(self, service, method, path, query, headers, body):
+        if self.error_rate and self.rng.random() < self.error_rate:
+            return 503, StubError(503, "Injected error").body
+        try:
+            json_body = json.loads(body) if body else {}
+            if service == "fineract" and path.startswith(FINERACT_PREFIX):
+                tenant_id = headers.get("fineract-platform-tenantid", "default")
+                relative = path[len(FINERACT_PREFIX):]
+                if relative == "batches" and method == "POST":
+                    result = 200, self.apis.batches(tenant_id, json_body, query.get("enclosingTransaction") == "true")
+                else:
+                    result = self.apis.fineract(tenant_id, method, relative, query, json_body, [])
+            elif service == "vnext" and path.startswith(VNEXT_PREFIX):
+                result = self.apis.vnext(headers.get("fspiop-source"), method, path, json_body, self._defer)
+            else:
+                raise StubError(404, f"No stub for {method} {path}")
+        except StubError as e:
+            return e.status, e.body
+        except ValueError as e:
+            return 400, StubError(400, f"Invalid request body: {e}").body
+        if self.lost_response_rate and self.rng.random() < self.lost_response_rate:
+            return 504, StubError(504, "Injected lost response (the request was applied)").body
+        return result
+
+    def _defer(self, action):
+        """Applies a bulk registration entry after BULK_REGISTRATION_DELAY plus latency; error_rate of them are dropped."""
+        if self.error_rate and self.rng.random() < self.error_rate:
+            return
+        asyncio.get_running_loop().call_later(BULK_REGISTRATION_DELAY + self.latency, action)
+
+    def close(self):
+        for server in self.servers:
+            server.close()
+
+
+def start_in_thread(host=DEFAULT_HOST, fineract_port=0, vnext_port=0, **options):
+    """
+    Runs a StubServer on an event loop in a daemon thread, for benchmarks and scripts.
+    Returns (server, fineract port, vnext port).
+    """
+    server = StubServer(**options)
+    started = threading.Event()
+    ports = []
+
+    def run():
+        loop = asyncio.new_event_loop()
+        ports.extend(loop.run_until_complete(server.start(host, fineract_port, vnext_port)))
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    started.wait()
+    return server, ports[0], ports[1]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Local stub Fineract and vNext admin APIs for the data tooling.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"address to listen on (default: {DEFAULT_HOST})")
+    parser.add_argument("--fineract-port", type=int, default=DEFAULT_FINERACT_PORT,
+                        help=f"Fineract API port (default: {DEFAULT_FINERACT_PORT})")
+    parser.add_argument("--vnext-port", type=int, default=DEFAULT_VNEXT_PORT,
+                        help=f"vNext admin API port (default: {DEFAULT_VNEXT_PORT})")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response (default: 0)")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="latency varies by up to this fraction either way, e.g. 0.5 (default: 0)")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="fraction of requests answered 503 without being applied (default: 0)")
+    parser.add_argument("--lost-response-rate", type=float, default=0.0,
+                        help="fraction of requests applied but answered 504 (default: 0)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for latency jitter and injected errors")
+    parser.add_argument("--capacity", type=int, default=0,
+                        help="Fineract requests worked on at a time, the rest queue (default: 0, unlimited)")
+    parser.add_argument("--max-queue", type=int, default=0,
+                        help="with --capacity, answer 503 when this many requests are already queued (default: 0, unlimited)")
+    args = parser.parse_args()
+    if args.capacity < 0 or args.max_queue < 0:
+        parser.error("--capacity and --max-queue cannot be negative")
+    for value, option in ((args.latency, "--latency"), (args.jitter, "--jitter")):
+        if value < 0:
+            parser.error(f"{option} cannot be negative")
+    for value, option in ((args.error_rate, "--error-rate"), (args.lost_response_rate, "--lost-response-rate")):
+        if not 0 <= value <= 1:
+            parser.error(f"{option} must be between 0 and 1")
+    return args
+
+
+async def serve(args):
+    server = StubServer(args.latency, args.jitter, args.error_rate, args.lost_response_rate, args.seed,
+                        args.capacity, args.max_queue)
+    fineract_port, vnext_port = await server.start(args.host, args.fineract_port, args.vnext_port)
+    print(f"Fineract stub: http://{args.host}:{fineract_port}{FINERACT_PREFIX.rstrip('/')}", file=sys.stderr)
+    print(f"vNext admin stub: http://{args.host}:{vnext_port}", file=sys.stderr)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        server.close()
+        for (service, route, status), count in sorted(server.stats.items()):
+            print(f"{service:<9} {route:<60} {status:>4} {count:>8}", file=sys.stderr)
+
+
+# --- Main Execution ---
+if __name__ == "__main__":
+    try:
+        asyncio.run(serve(parse_args()))
+    except KeyboardInterrupt:
+        pass
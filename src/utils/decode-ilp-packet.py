@@ -1,77 +1,542 @@
 #!/usr/bin/env python3
+# decodes ILP (Interledger) Prepare/Fulfill/Reject packets as carried in the ilpPacket field of
+# FSPIOP quotes and transfers
+#
+# usage:
+#   decode-ilp-packet.py <base64_ilp_packet>                 print one packet in readable form
+#   decode-ilp-packet.py -i transfers.jsonl.gz -o out.jsonl  decode every packet in a capture
+#   kubectl logs ... | decode-ilp-packet.py -i - --format csv --jobs 8
+#   decode-ilp-packet.py -i day.jsonl.gz --fields transactionId,payee.partyIdInfo.partyIdentifier,amount.amount
+#   decode-ilp-packet.py -i day.jsonl.gz --index day.idx -o /dev/null    build an index while decoding
+#   decode-ilp-packet.py --index day.idx --query 0485689135              look up a transactionId or MSISDN
+#   decode-ilp-packet.py -i day.jsonl.gz -o /dev/null --profile /tmp/decode   time and stacks per stage
+#
+# input lines are either a bare base64 packet or any text/JSON containing "ilpPacket": "<base64>"
+# (e.g. vNext transfer logs or Kafka topic dumps); .gz files are read transparently
+#
+# the parsing functions (parse_ilp_packet, decode_ilp_packet) have no side effects, so the file
+# can also be loaded as a library with importlib
+import argparse
 import base64
+import contextlib
+import csv
+import gzip
+import importlib.util
 import json
+import functools
+import multiprocessing
+import os
+import re
+import sqlite3
 import struct
 import sys
 
-def decode_ilp_packet(base64_packet):
-    raw = base64.b64decode(base64_packet)
-    if len(raw) < 3:
+PACKET_TYPE_NAMES = {
+    0x0C: "ILP Prepare",
+    0x0D: "ILP Fulfill",
+    0x0E: "ILP Reject"
+}
+
+# Columns written by --format csv; 'data' holds the decoded data as compact JSON
+CSV_FIELDS = ["packet_type", "packet_type_name", "packet_length", "amount", "expires_at", "execution_condition",
+              "destination", "fulfillment", "code", "triggered_by", "message", "data", "error"]
+
+ILP_PACKET_FIELD = re.compile(rb'"ilpPacket"\s*:\s*"([A-Za-z0-9+/=_-]+)"')
+
+# Columns of the --index database, taken from the transaction object in Prepare packets
+INDEX_COLUMNS = ["source", "line", "transaction_id", "quote_id", "payer_msisdn", "payee_msisdn",
+                 "amount", "currency", "destination", "expires_at"]
+INDEX_BATCH_SIZE = 5000
+
+# Prepare packets start with amount (UInt64), expiresAt (YYYYMMDDHHmmssfff, UTC) and executionCondition
+# (32 bytes); the timestamp is split into its parts so ISO_TIMESTAMP can format it in one step
+PREPARE_HEADER = struct.Struct(">Q4s2s2s2s2s2s3s32s")
+ISO_TIMESTAMP = b"%s-%s-%sT%s:%s:%s.%sZ"
+BASE64URL_TO_BASE64 = bytes.maketrans(b"-_", b"+/")
+
+STAGE_PROFILER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stage-profiler.py")
+
+
+def parse_ilp_packet(raw, decode_data=True, lazy=False):
+    """
+    Parses a binary ILP packet (bytes, bytearray or memoryview) and returns its fields as a dict:
+    packet_type, packet_type_name, packet_length and, depending on the type,
+    amount/expires_at/execution_condition/destination/data (Prepare), fulfillment/data (Fulfill)
+    or code/triggered_by/message/data (Reject), following the ILPv4 OER layout (RFC 27).
+
+    The fixed fields are read with struct at integer offsets into the packet buffer itself (a
+    bytearray or memoryview is not copied first), so only the returned field values are copied. 'data' is the decoded JSON object when the data field
+    holds JSON (for Prepare packets, base64/base64url encoded JSON as sent by Mojaloop),
+    otherwise a string. With decode_data=False 'data' is a memoryview over the packet, which
+    saves copying large data fields; with lazy=True it is a LazyData that decodes on first access.
+    Raises ValueError on malformed input.
+    """
+    if type(raw) is memoryview and raw.format != "B":
+        raw = raw.cast("B") # e.g. a 'c' view, whose items would be bytes instead of ints
+    if len(raw) < 2:
         raise ValueError("Invalid ILP packet: too short")
 
     packet_type = raw[0]
-    packet_type_name = {
-        0x0C: "ILP Prepare",
-        0x0D: "ILP Fulfill",
-        0x0E: "ILP Reject"
-    }.get(packet_type, f"Unknown ({packet_type:#x})")
-
-    packet_length = struct.unpack(">H", raw[1:3])[0]
-    payload = raw[3:3+packet_length]
+    packet_length = raw[1]
+    if packet_length < 0x80:
+        offset = 2
+    else:
+        packet_length, offset = _read_length(raw, 1, len(raw))
+    end = offset + packet_length
+    if end > len(raw):
+        raise ValueError(f"Invalid ILP packet: length {packet_length} exceeds the {len(raw) - offset} bytes available")
 
-    print(f"\n=== ILP Packet ===")
-    print(f"Packet Type: {packet_type_name}")
-    print(f"Packet Length: {packet_length} bytes")
+    record = {
+        "packet_type": packet_type,
+        "packet_type_name": PACKET_TYPE_NAMES.get(packet_type) or f"Unknown ({packet_type:#x})",
+        "packet_length": packet_length,
+    }
 
     if packet_type == 0x0C:  # Prepare
-        amount, = struct.unpack(">Q", payload[0:8])
-        destination, dest_len = _read_var_octet_string(payload[8:])
-        data, _ = _read_var_octet_string(payload[8+dest_len:])
-        print(f"Amount: {amount}")
-        print(f"Destination: {destination}")
-        try:
-            json_data = json.loads(base64.b64decode(data).decode("utf8"))
-            print("Data (decoded):")
-            print(json.dumps(json_data, indent=2))
-        except Exception as e:
-            print("Data (raw):", data)
+        if packet_length < PREPARE_HEADER.size:
+            raise _truncated(offset, PREPARE_HEADER.size, end)
+        fields = PREPARE_HEADER.unpack_from(raw, offset)
+        record["amount"] = fields[0]
+        record["expires_at"] = (ISO_TIMESTAMP % fields[1:8]).decode("ascii")
+        record["execution_condition"] = fields[8].hex()
+        start, offset = _read_var_octet_string(raw, offset + PREPARE_HEADER.size, end)
+        record["destination"] = str(raw[start:offset], "utf8")
+        start, offset = _read_var_octet_string(raw, offset, end)
+        record["data"] = _wrap_data(raw, start, offset, _decode_prepare_data, decode_data, lazy)
 
     elif packet_type == 0x0D:  # Fulfill
-        fulfillment = payload[0:32].hex()
-        data = payload[32:]
-        print(f"Fulfillment: {fulfillment}")
-        try:
-            json_data = json.loads(data.decode("utf8"))
-            print("Data (decoded):")
-            print(json.dumps(json_data, indent=2))
-        except Exception:
-            print("Data (raw):", data)
+        if packet_length < 32:
+            raise _truncated(offset, 32, end)
+        record["fulfillment"] = raw[offset:offset + 32].hex()
+        start, offset = _read_var_octet_string(raw, offset + 32, end)
+        record["data"] = _wrap_data(raw, start, offset, _decode_data, decode_data, lazy)
 
     elif packet_type == 0x0E:  # Reject
-        code = payload[0:3].decode("utf8")
-        message_len = payload[3]
-        message = payload[4:4+message_len].decode("utf8")
-        triggered_by_len = payload[4+message_len]
-        triggered_by = payload[5+message_len:5+message_len+triggered_by_len].decode("utf8")
-        data = payload[5+message_len+triggered_by_len:]
-        print(f"Code: {code}")
-        print(f"Message: {message}")
-        print(f"Triggered By: {triggered_by}")
-        print("Data:", data)
+        if packet_length < 3:
+            raise _truncated(offset, 3, end)
+        record["code"] = str(raw[offset:offset + 3], "ascii")
+        start, offset = _read_var_octet_string(raw, offset + 3, end)
+        record["triggered_by"] = str(raw[start:offset], "utf8")
+        start, offset = _read_var_octet_string(raw, offset, end)
+        record["message"] = str(raw[start:offset], "utf8")
+        start, offset = _read_var_octet_string(raw, offset, end)
+        record["data"] = _wrap_data(raw, start, offset, _decode_data, decode_data, lazy)
+
     else:
-        print("Unknown packet type. Raw payload:")
-        print(payload)
+        record["data"] = _wrap_data(raw, offset, end, _decode_data, decode_data, lazy)
 
+    return record
 
-def _read_var_octet_string(data):
-    if len(data) < 1:
-        raise ValueError("Cannot read varoctetstring: too short")
-    length = data[0]
-    return data[1:1+length].decode("utf8"), 1 + length
 
+def decode_ilp_packet(base64_packet, lazy=False):
+    """Decodes a base64 (standard or URL-safe) ILP packet and returns parse_ilp_packet()'s record."""
+    if isinstance(base64_packet, str):
+        base64_packet = base64_packet.encode("ascii")
+    base64_packet = base64_packet.strip().replace(b"-", b"+").replace(b"_", b"/")
+    return parse_ilp_packet(base64.b64decode(base64_packet + b"=" * (-len(base64_packet) % 4)), lazy=lazy)
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python decode_ilp.py <base64_ilp_packet>")
+
+class LazyData:
+    """
+    The data field of a packet, kept as raw bytes until something reads it. For Prepare packets
+    that means the embedded transaction is only base64-decoded and parsed by the first
+    value/get() call, so records whose data is never looked at cost no JSON parsing at all.
+    """
+    __slots__ = ("raw", "_decode", "_value")
+    _UNSET = object()
+
+    def __init__(self, raw, decode):
+        self.raw = raw
+        self._decode = decode
+        self._value = LazyData._UNSET
+
+    @property
+    def value(self):
+        if self._value is LazyData._UNSET:
+            self._value = self._decode(self.raw)
+        return self._value
+
+    def get(self, path, default=None):
+        """Returns the value at a dotted path (e.g. 'payee.partyIdInfo.partyIdentifier'), or default."""
+        return lookup_path(self.value, path, default)
+
+
+def lookup_path(value, path, default=None):
+    """Follows a dotted path through nested dicts and lists (numeric parts index lists)."""
+    for part in path.split("."):
+        if isinstance(value, dict):
+            value = value.get(part, default)
+        elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        else:
+            return default
+    return value
+
+
+def _data_value(data):
+    return data.value if isinstance(data, LazyData) else data
+
+
+def project_record(record, fields):
+    """
+    Returns a record holding only the requested fields. A field naming a packet field
+    (amount, destination, ...) is copied as is; anything else is a dotted path into the
+    data object, with or without a leading 'data.' (transactionId, data.payer.partyIdInfo.fspId).
+    """
+    projected = {}
+    for field in fields:
+        if field == "data":
+            projected[field] = _data_value(record.get("data"))
+        elif field in record:
+            projected[field] = record[field]
+        else:
+            path = field[5:] if field.startswith("data.") else field
+            projected[field] = lookup_path(_data_value(record.get("data")), path)
+    return projected
+
+
+def print_ilp_packet(record):
+    """Prints a decoded packet in the readable form used for single packets on the command line."""
+    print(f"\n=== ILP Packet ===")
+    print(f"Packet Type: {record['packet_type_name']}")
+    print(f"Packet Length: {record['packet_length']} bytes")
+    labels = [("amount", "Amount"), ("expires_at", "Expires At"), ("execution_condition", "Execution Condition"),
+              ("destination", "Destination"), ("fulfillment", "Fulfillment"),
+              ("code", "Code"), ("triggered_by", "Triggered By"), ("message", "Message")]
+    for key, label in labels:
+        if key in record:
+            print(f"{label}: {record[key]}")
+    data = _data_value(record.get("data"))
+    if isinstance(data, (dict, list)):
+        print("Data (decoded):")
+        print(json.dumps(data, indent=2))
+    else:
+        print("Data (raw):", data)
+
+
+def _decode_data(data):
+    """Returns data as a JSON object if it is JSON, else as text, else as base64."""
+    try:
+        text = str(data, "utf8")
+    except UnicodeDecodeError:
+        return base64.b64encode(data).decode("ascii")
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def _wrap_data(raw, start, end, decode, decode_data, lazy):
+    """The data field raw[start:end]: decoded, a memoryview over it, or a LazyData."""
+    if lazy:
+        return LazyData(memoryview(raw)[start:end], decode)
+    if decode_data:
+        return decode(raw[start:end])
+    return memoryview(raw)[start:end]
+
+
+def _truncated(offset, size, end):
+    return ValueError(f"Invalid ILP packet: need {size} bytes at offset {offset}, only {max(end - offset, 0)} left")
+
+
+def _read_length(raw, offset, end):
+    """
+    Reads an OER length prefix at offset: one byte below 0x80 is the length itself,
+    otherwise its low 7 bits give the number of big-endian length bytes that follow.
+    Returns (length, offset after the prefix).
+    """
+    if offset >= end:
+        raise _truncated(offset, 1, end)
+    first = raw[offset]
+    if first < 0x80:
+        return first, offset + 1
+    size = first & 0x7F
+    if size == 0 or size > 8:
+        raise ValueError(f"Invalid OER length prefix {first:#x} at offset {offset}")
+    if offset + 1 + size > end:
+        raise _truncated(offset + 1, size, end)
+    return int.from_bytes(raw[offset + 1:offset + 1 + size], "big"), offset + 1 + size
+
+
+def _read_var_octet_string(raw, offset, end):
+    """Reads an OER variable-length octet string at offset, within end. Returns (start, end) offsets of its content."""
+    # short lengths (< 128 bytes) are the common case for addresses and messages, so skip the call
+    if offset < end and raw[offset] < 0x80:
+        length, offset = raw[offset], offset + 1
+    else:
+        length, offset = _read_length(raw, offset, end)
+    stop = offset + length
+    if stop > end:
+        raise _truncated(offset, length, end)
+    return offset, stop
+
+
+def _decode_prepare_data(data):
+    """Prepare data from Mojaloop is base64/base64url encoded JSON; fall back to _decode_data."""
+    try:
+        text = bytes(data)
+        if text.find(b"-") >= 0 or text.find(b"_") >= 0: # cheaper than `in`, which first tries the operand as an int
+            text = text.translate(BASE64URL_TO_BASE64)
+        if len(text) % 4:
+            text += b"=" * (-len(text) % 4)
+        return json.loads(base64.b64decode(text, validate=True).decode("utf8"))
+    except Exception:
+        return _decode_data(data)
+
+
+# --- Streaming decoding ---
+def extract_packet(line):
+    """Returns the base64 ILP packet in an input line (bytes), or None if there is none."""
+    match = ILP_PACKET_FIELD.search(line)
+    if match:
+        return match.group(1)
+    line = line.strip()
+    if not line or line.startswith((b"{", b"[", b"#")):
+        return None
+    return line
+
+
+def decode_line(line, fields=None):
+    """
+    Decodes the packet in one input line. Returns a record (projected onto fields when given),
+    an error record, or None if the line has no packet.
+    """
+    return decode_entry((None, None, line), fields)[0]
+
+
+def decode_entry(entry, fields=None, build_index=False):
+    """
+    Decodes one (source, line number, line) entry. Returns (record, index row), where the index
+    row is None unless build_index is set and the packet is a Prepare carrying a transaction;
+    (None, None) if the line has no packet. With fields the data is decoded lazily, so it is
+    not parsed at all when neither the projection nor the index needs it.
+    """
+    source, line_number, line = entry
+    packet = extract_packet(line)
+    if packet is None:
+        return None, None
+    try:
+        record = decode_ilp_packet(packet, lazy=fields is not None)
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}", "packet": packet.decode("ascii", "replace")}, None
+    row = index_row(record, source, line_number) if build_index else None
+    if fields is not None:
+        record = project_record(record, fields)
+    return record, row
+
+
+def index_row(record, source, line_number):
+    """Returns the INDEX_COLUMNS values for a Prepare record, or None if it has no transaction object."""
+    if record.get("packet_type") != 0x0C:
+        return None
+    data = _data_value(record.get("data"))
+    if not isinstance(data, dict):
+        return None
+    return (source, line_number, data.get("transactionId"), data.get("quoteId"),
+            lookup_path(data, "payer.partyIdInfo.partyIdentifier"),
+            lookup_path(data, "payee.partyIdInfo.partyIdentifier"),
+            lookup_path(data, "amount.amount"), lookup_path(data, "amount.currency"),
+            record.get("destination"), record.get("expires_at"))
+
+
+class PacketIndex:
+    """
+    SQLite index of decoded Prepare packets, keyed by transactionId and payer/payee MSISDN,
+    so a day's capture can be queried without decoding it again. Each row points back to the
+    input file and line the packet came from. Rows are inserted in batches and the lookup
+    indexes are (re)built on close, which is much faster than maintaining them per insert.
+    """
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(f"CREATE TABLE IF NOT EXISTS packets ({', '.join(INDEX_COLUMNS)})")
+        self.pending = []
+        self.cleared = set()
+        self.rows = 0
+
+    def add(self, row):
+        source = row[0]
+        if source not in self.cleared:
+            # re-indexing a file replaces its rows instead of duplicating them
+            self.connection.execute("DELETE FROM packets WHERE source = ?", (source,))
+            self.cleared.add(source)
+        self.pending.append(row)
+        if len(self.pending) >= INDEX_BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        placeholders = ", ".join("?" for _ in INDEX_COLUMNS)
+        self.connection.executemany(f"INSERT INTO packets VALUES ({placeholders})", self.pending)
+        self.rows += len(self.pending)
+        self.pending = []
+
+    def close(self):
+        self.flush()
+        for column in ("transaction_id", "payer_msisdn", "payee_msisdn"):
+            self.connection.execute(f"CREATE INDEX IF NOT EXISTS packets_{column} ON packets ({column})")
+        self.connection.commit()
+        self.connection.close()
+
+
+def query_index(path, key):
+    """Returns the index rows (as dicts) whose transactionId, payer MSISDN or payee MSISDN equals key."""
+    with sqlite3.connect(f"file:{path}?mode=ro", uri=True) as connection:
+        cursor = connection.execute(
+            "SELECT * FROM packets WHERE transaction_id = ? OR payer_msisdn = ? OR payee_msisdn = ? "
+            "ORDER BY source, line", (key, key, key))
+        return [dict(zip(INDEX_COLUMNS, row)) for row in cursor]
+
+
+def read_lines(paths):
+    """Yields (path, line number, raw line) for every line of every input (file path, .gz file, or '-' for stdin)."""
+    for path in paths:
+        if path == "-":
+            yield from ((path, number, line) for number, line in enumerate(sys.stdin.buffer, 1))
+            continue
+        with open(path, "rb") as probe:
+            gzipped = probe.read(2) == b"\x1f\x8b"
+        with (gzip.open(path, "rb") if gzipped else open(path, "rb")) as handle:
+            yield from ((path, number, line) for number, line in enumerate(handle, 1))
+
+
+def write_records(results, output, output_format, fields=None, index=None):
+    """
+    Writes decoded records as JSON lines or CSV, adding their index rows to index if given.
+    results are decode_entry() pairs. Returns (decoded, failed) counts.
+    """
+    decoded = failed = 0
+    if output_format == "csv":
+        writer = csv.DictWriter(output, fieldnames=fields + ["error"] if fields else CSV_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+    for record, row in results:
+        if record is None:
+            continue
+        if "error" in record:
+            failed += 1
+        else:
+            decoded += 1
+        if row is not None and index is not None:
+            index.add(row)
+        if output_format == "csv":
+            record = {key: json.dumps(value, separators=(",", ":")) if isinstance(value, (dict, list)) else value
+                      for key, value in record.items()}
+            writer.writerow(record)
+        else:
+            output.write(json.dumps(record, separators=(",", ":")) + "\n")
+    return decoded, failed
+
+
+def decode_stream(paths, output, output_format="jsonl", jobs=1, chunk_size=2048, fields=None, index=None):
+    """
+    Decodes every packet found in paths and writes one record per packet to output,
+    in input order, projected onto fields when given and indexed into index (a PacketIndex)
+    when given. With jobs > 1 decoding is spread over a process pool.
+    Returns (decoded, failed) counts.
+    """
+    entries = read_lines(paths)
+    decode = functools.partial(decode_entry, fields=fields, build_index=index is not None)
+    if jobs > 1:
+        with multiprocessing.Pool(jobs) as pool:
+            return write_records(pool.imap(decode, entries, chunksize=chunk_size), output, output_format, fields, index)
+    return write_records(map(decode, entries), output, output_format, fields, index)
+
+
+# --- Profiling ---
+profiler = None # StageProfiler (stage-profiler.py) when --profile is given
+
+
+def start_profiler(prefix, use_cprofile=False, trace_memory=False):
+    global profiler
+    spec = importlib.util.spec_from_file_location("stage_profiler", STAGE_PROFILER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    profiler = module.StageProfiler(prefix, use_cprofile, trace_memory)
+
+
+def profile_stage(name):
+    """Times one stage of the run when --profile is given."""
+    return profiler.stage(name) if profiler is not None else contextlib.nullcontext()
+
+
+def finish_profiler():
+    if profiler is not None:
+        paths = profiler.close()
+        print(profiler.summary_table(), file=sys.stderr)
+        print(f"Profile written to {', '.join(paths)}", file=sys.stderr)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Decode ILP Prepare/Fulfill/Reject packets.")
+    parser.add_argument("packet", nargs="?", help="a single base64 ILP packet to print in readable form")
+    parser.add_argument("-i", "--input", action="append", metavar="FILE",
+                        help="decode every packet in FILE (plain or .gz; '-' for stdin); may be repeated")
+    parser.add_argument("-o", "--output", metavar="FILE", help="write decoded records here (default: stdout)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl", help="output format (default: jsonl)")
+    parser.add_argument("--jobs", type=int, default=1, help="decode with this many processes (default: 1)")
+    parser.add_argument("--fields", type=lambda s: [f.strip() for f in s.split(",") if f.strip()],
+                        help="comma-separated fields to output: packet fields (amount, destination, ...) or dotted "
+                             "paths into the data (transactionId, payee.partyIdInfo.partyIdentifier); "
+                             "data is only parsed when a field needs it")
+    parser.add_argument("--index", metavar="DB", help="with -i, index Prepare packets by transactionId and MSISDN "
+                                                      "into this SQLite file; with --query, the index to search")
+    parser.add_argument("--query", action="append", metavar="KEY",
+                        help="print the indexed packets whose transactionId or payer/payee MSISDN is KEY; may be repeated")
+    parser.add_argument("--profile", metavar="PREFIX",
+                        help="record wall vs CPU time per stage (decode, index) into PREFIX.stages.json and sampled "
+                             "stacks into PREFIX.folded for a flamegraph; with --jobs the stacks are only this process's")
+    parser.add_argument("--cprofile", action="store_true",
+                        help="with --profile, also write cProfile stats per stage to PREFIX.<stage>.pstats")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="with --profile, also record the tracemalloc peak per stage (several times slower)")
+    args = parser.parse_args()
+    if (args.cprofile or args.profile_memory) and not args.profile:
+        parser.error("--cprofile and --profile-memory need --profile")
+    if args.query:
+        if not args.index:
+            parser.error("--query needs --index")
+        return args
+    if not args.packet and not args.input:
+        parser.print_usage()
         sys.exit(1)
-    decode_ilp_packet(sys.argv[1])
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.profile:
+        start_profiler(args.profile, args.cprofile, args.profile_memory)
+    if args.query:
+        with profile_stage("query"):
+            for key in args.query:
+                for row in query_index(args.index, key):
+                    print(json.dumps(row, separators=(",", ":")))
+        finish_profiler()
+        sys.exit(0)
+
+    if args.packet and not args.input:
+        with profile_stage("decode"):
+            record = decode_ilp_packet(args.packet, lazy=args.fields is not None)
+            if args.fields:
+                print(json.dumps(project_record(record, args.fields), indent=2))
+            else:
+                print_ilp_packet(record)
+        finish_profiler()
+        sys.exit(0)
+
+    output = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    index = PacketIndex(args.index) if args.index else None
+    try:
+        with profile_stage("decode"):
+            decoded, failed = decode_stream(args.input, output, args.format, args.jobs, fields=args.fields, index=index)
+    finally:
+        if args.output:
+            output.close()
+        if index is not None:
+            with profile_stage("index"):
+                index.close()
+    finish_profiler()
+    print(f"Decoded {decoded} packets, {failed} failed.", file=sys.stderr)
+    if index is not None:
+        print(f"Indexed {index.rows} Prepare packets into {args.index}.", file=sys.stderr)
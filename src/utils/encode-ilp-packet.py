@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+# encodes ILP (Interledger) Prepare/Fulfill/Reject packets, the reverse of decode-ilp-packet.py, to make
+# fixtures for replaying load against vNext and for testing decoders at scale
+#
+# usage:
+#   encode-ilp-packet.py '{"packet_type": 13, "fulfillment": "00...", "data": ""}'   print one base64 packet
+#   decode-ilp-packet.py -i day.jsonl.gz -o records.jsonl
+#   encode-ilp-packet.py -i records.jsonl -o packets.b64                 re-encode decoded records
+#   encode-ilp-packet.py --synthetic 5000000 -o prepares.b64.gz          stream synthetic Prepare packets
+#   encode-ilp-packet.py --synthetic 100000 --types prepare,fulfill,reject --wrap-json -o mixed.jsonl
+#
+# records have the shape decode-ilp-packet.py produces (packet_type, amount, expires_at, execution_condition,
+# destination, fulfillment, code, triggered_by, message, data; packet_type_name and packet_length are
+# ignored), so decode(encode(record)) gives the record back. Data given as a JSON value (object, list, number,
+# bool) is sent as JSON, base64 encoded for Prepare as Mojaloop does; text is sent as UTF-8, but text the
+# decoder would read back as something else (e.g. "5", or for Prepare base64 of JSON) is refused; missing
+# data is sent empty and decodes as ""; bytes are sent as they are and decode as text or base64
+#
+# the encoding functions (encode_ilp_packet, PacketEncoder) have no side effects, so the file can also be
+# loaded as a library with importlib
+import argparse
+import base64
+import datetime
+import gzip
+import json
+import random
+import re
+import struct
+import sys
+import uuid
+
+PACKET_TYPES = {"prepare": 0x0C, "fulfill": 0x0D, "reject": 0x0E}
+TIMESTAMP = re.compile(r"^(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})\.(\d{3})Z$")
+WRITE_BATCH_LINES = 10000 # Output lines joined into one write call
+
+# Synthetic Mojaloop-style transfers
+SYNTHETIC_FSPS = ["bluebank", "greenbank"]
+SYNTHETIC_REJECT_CODES = [("F02", "Unreachable"), ("F99", "Application error"), ("R00", "Transfer timed out"),
+                          ("T00", "Internal error")]
+
+
+class PacketEncoder:
+    """
+    Encodes packets into one reusable bytearray, so a bulk run allocates no per-packet buffers:
+    fields are written in place with struct.pack_into and slice assignment, and the buffer only
+    grows when a packet does not fit. encode() returns a memoryview that is valid until the
+    next call; encode_base64() returns the base64 text of the packet.
+    """
+
+    def __init__(self, capacity=4096):
+        self._buffer = bytearray(capacity)
+
+    def encode(self, record):
+        """Encodes a record into the buffer. Returns a memoryview of the packet. Raises ValueError on bad fields."""
+        packet_type = record.get("packet_type")
+        if isinstance(packet_type, str):
+            packet_type = PACKET_TYPES.get(packet_type.lower(), packet_type)
+        data = _data_bytes(record.get("data"), prepare=packet_type == 0x0C)
+
+        if packet_type == 0x0C:  # Prepare
+            destination = _address(record.get("destination"))
+            content_length = 57 + _var_length(len(destination)) + _var_length(len(data))
+            offset = self._start(packet_type, content_length)
+            struct.pack_into(">Q", self._buffer, offset, _amount(record.get("amount")))
+            self._buffer[offset + 8:offset + 25] = _timestamp(record.get("expires_at"))
+            self._buffer[offset + 25:offset + 57] = _fixed_hex(record.get("execution_condition"), "execution_condition")
+            offset = self._write_var(offset + 57, destination)
+            end = self._write_var(offset, data)
+
+        elif packet_type == 0x0D:  # Fulfill
+            content_length = 32 + _var_length(len(data))
+            offset = self._start(packet_type, content_length)
+            self._buffer[offset:offset + 32] = _fixed_hex(record.get("fulfillment"), "fulfillment")
+            end = self._write_var(offset + 32, data)
+
+        elif packet_type == 0x0E:  # Reject
+            code = str(record.get("code") or "").encode("ascii")
+            if len(code) != 3:
+                raise ValueError(f"Reject code must be 3 characters, got {record.get('code')!r}")
+            triggered_by = _address(record.get("triggered_by") or "", required=False)
+            message = str(record.get("message") or "").encode("utf8")
+            content_length = 3 + _var_length(len(triggered_by)) + _var_length(len(message)) + _var_length(len(data))
+            offset = self._start(packet_type, content_length)
+            self._buffer[offset:offset + 3] = code
+            offset = self._write_var(offset + 3, triggered_by)
+            offset = self._write_var(offset, message)
+            end = self._write_var(offset, data)
+
+        else:
+            raise ValueError(f"Unsupported packet type {packet_type!r}; expected one of {', '.join(PACKET_TYPES)}")
+        return memoryview(self._buffer)[:end]
+
+    def encode_base64(self, record):
+        return base64.b64encode(self.encode(record)).decode("ascii")
+
+    def _start(self, packet_type, content_length):
+        """Makes room for the packet, writes the type and length prefix. Returns the offset of the content."""
+        total = 1 + _length_size(content_length) + content_length
+        if total > len(self._buffer):
+            self._buffer = bytearray(max(total, 2 * len(self._buffer)))
+        self._buffer[0] = packet_type
+        return _write_length(self._buffer, 1, content_length)
+
+    def _write_var(self, offset, value):
+        offset = _write_length(self._buffer, offset, len(value))
+        end = offset + len(value)
+        self._buffer[offset:end] = value
+        return end
+
+
+def encode_ilp_packet(record):
+    """Encodes one record and returns the packet as bytes."""
+    return bytes(PacketEncoder(256).encode(record))
+
+
+def _length_size(length):
+    """Bytes an OER length prefix for length takes."""
+    return 1 if length < 0x80 else 1 + (length.bit_length() + 7) // 8
+
+
+def _var_length(length):
+    """Bytes a variable-length octet string of length bytes takes, prefix included."""
+    return _length_size(length) + length
+
+
+def _write_length(buffer, offset, length):
+    """Writes an OER length prefix at offset. Returns the offset after it."""
+    if length < 0x80:
+        buffer[offset] = length
+        return offset + 1
+    size = (length.bit_length() + 7) // 8
+    buffer[offset] = 0x80 | size
+    buffer[offset + 1:offset + 1 + size] = length.to_bytes(size, "big")
+    return offset + 1 + size
+
+
+def _amount(value):
+    try:
+        amount = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Amount must be a whole number, got {value!r}") from None
+    if not 0 <= amount < 1 << 64:
+        raise ValueError(f"Amount {amount} does not fit in a UInt64")
+    return amount
+
+
+def _timestamp(value):
+    """Turns an ISO 8601 UTC timestamp (as the decoder prints it) or a datetime into the 17 ILP timestamp bytes."""
+    if isinstance(value, datetime.datetime):
+        return value.strftime("%Y%m%d%H%M%S").encode("ascii") + f"{value.microsecond // 1000:03d}".encode("ascii")
+    match = TIMESTAMP.match(value or "")
+    if match is None:
+        raise ValueError(f"expires_at must look like 2026-01-01T12:00:00.000Z, got {value!r}")
+    return "".join(match.groups()).encode("ascii")
+
+
+def _fixed_hex(value, name):
+    try:
+        raw = bytes.fromhex(value or "")
+    except ValueError:
+        raise ValueError(f"{name} must be hex") from None
+    if len(raw) != 32:
+        raise ValueError(f"{name} must be 32 bytes, got {len(raw)}")
+    return raw
+
+
+def _address(value, required=True):
+    address = str(value or "").encode("ascii")
+    if required and not address:
+        raise ValueError("Prepare packets need a destination")
+    return address
+
+
+def _data_bytes(data, prepare):
+    """
+    The data field as bytes: JSON values (objects, lists, numbers, bools) as JSON text (base64
+    encoded for Prepare, which is how Mojaloop carries the transaction and what the decoder
+    expects), text as UTF-8, bytes as is. Raises ValueError for text the decoder would not give
+    back as the same text.
+    """
+    if data is None:
+        return b""
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return bytes(data)
+    if isinstance(data, (dict, list, int, float)):
+        text = json.dumps(data, separators=(",", ":")).encode("utf8")
+        return base64.b64encode(text) if prepare else text
+    if not isinstance(data, str):
+        raise ValueError(f"data must be a JSON value, text or bytes, got {type(data).__name__}")
+    if data and not _reads_back_as_text(data, prepare): # empty data always reads back as ""
+        raise ValueError(f"data text {data[:40]!r} would decode as JSON; give the JSON value instead")
+    return data.encode("utf8")
+
+
+def _reads_back_as_text(text, prepare):
+    """
+    True if the decoder gives text back unchanged: it reads data as JSON when it parses as JSON
+    and, for Prepare, first as base64/base64url encoded JSON.
+    """
+    candidates = [text]
+    if prepare:
+        standard = text.replace("-", "+").replace("_", "/")
+        try:
+            candidates.append(base64.b64decode(standard + "=" * (-len(standard) % 4), validate=True).decode("utf8"))
+        except ValueError: # not base64 (binascii.Error), not ASCII, or not UTF-8 once decoded
+            pass
+    for candidate in candidates:
+        try:
+            json.loads(candidate)
+        except ValueError:
+            continue
+        return False
+    return True
+
+
+# --- Synthetic records ---
+def synthetic_record(rng, packet_type, expires_at):
+    """A random but realistic record: Prepare packets carry a Mojaloop transaction between two demo FSPs."""
+    if packet_type == 0x0C:
+        payer_fsp, payee_fsp = rng.sample(SYNTHETIC_FSPS, 2)
+        payee_msisdn = f"04{rng.randrange(10 ** 8):08d}"
+        amount = rng.randrange(1, 100000)
+        transaction = {
+            "transactionId": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "quoteId": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "payee": {"partyIdInfo": {"partyIdType": "MSISDN", "partyIdentifier": payee_msisdn, "fspId": payee_fsp}},
+            "payer": {"partyIdInfo": {"partyIdType": "MSISDN", "partyIdentifier": f"04{rng.randrange(10 ** 8):08d}",
+                                      "fspId": payer_fsp}},
+            "amount": {"currency": "USD", "amount": str(amount)},
+            "transactionType": {"scenario": "TRANSFER", "initiator": "PAYER", "initiatorType": "CONSUMER"},
+        }
+        return {"packet_type": 0x0C, "amount": amount * 100, "expires_at": expires_at,
+                "execution_condition": rng.getrandbits(256).to_bytes(32, "big").hex(),
+                "destination": f"g.{payee_fsp}.msisdn.{payee_msisdn}", "data": transaction}
+    if packet_type == 0x0D:
+        return {"packet_type": 0x0D, "fulfillment": rng.getrandbits(256).to_bytes(32, "big").hex(), "data": ""}
+    code, message = rng.choice(SYNTHETIC_REJECT_CODES)
+    return {"packet_type": 0x0E, "code": code, "triggered_by": f"g.{rng.choice(SYNTHETIC_FSPS)}",
+            "message": message, "data": ""}
+
+
+def synthetic_records(count, packet_types, seed=None, expires_at=None):
+    """Yields count synthetic records, cycling through packet_types, reproducible for a given seed."""
+    rng = random.Random(seed)
+    if expires_at is None:
+        expires = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(minutes=5)
+        expires_at = expires.strftime("%Y-%m-%dT%H:%M:%S.") + f"{expires.microsecond // 1000:03d}Z"
+    for n in range(count):
+        yield synthetic_record(rng, packet_types[n % len(packet_types)], expires_at)
+
+
+# --- Streaming encoding ---
+def read_records(paths):
+    """Yields the JSON records in JSONL files (plain, .gz or '-' for stdin), skipping blank lines and decoder error records."""
+    for path in paths:
+        if path == "-":
+            handle = sys.stdin.buffer
+        else:
+            with open(path, "rb") as probe:
+                gzipped = probe.read(2) == b"\x1f\x8b"
+            handle = gzip.open(path, "rb") if gzipped else open(path, "rb")
+        try:
+            for line in handle:
+                if line.strip():
+                    record = json.loads(line)
+                    if "error" not in record:
+                        yield record
+        finally:
+            if handle is not sys.stdin.buffer:
+                handle.close()
+
+
+def encode_stream(records, output, wrap_json=False):
+    """
+    Encodes records and writes one base64 packet per line (or {"ilpPacket": "..."} with
+    wrap_json, the form the decoder finds in transfer logs), in batches of WRITE_BATCH_LINES.
+    Returns (encoded, failed) counts; failures are reported on stderr and skipped.
+    """
+    encoder = PacketEncoder()
+    encoded = failed = 0
+    lines = []
+    for record in records:
+        try:
+            packet = encoder.encode_base64(record)
+        except (ValueError, TypeError) as e:
+            failed += 1
+            print(f"Skipping record {encoded + failed}: {e}", file=sys.stderr)
+            continue
+        lines.append(f'{{"ilpPacket":"{packet}"}}' if wrap_json else packet)
+        encoded += 1
+        if len(lines) >= WRITE_BATCH_LINES:
+            output.write("\n".join(lines) + "\n")
+            lines.clear()
+    if lines:
+        output.write("\n".join(lines) + "\n")
+    return encoded, failed
+
+
+def open_output(path):
+    if not path or path == "-":
+        return sys.stdout
+    if path.endswith(".gz"):
+        return gzip.open(path, "wt", encoding="ascii", compresslevel=1)
+    return open(path, "w", encoding="ascii")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Encode ILP Prepare/Fulfill/Reject packets.")
+    parser.add_argument("record", nargs="?", help="a single JSON record to print as a base64 packet")
+    parser.add_argument("-i", "--input", action="append", metavar="FILE",
+                        help="encode every JSON record in FILE (JSONL, plain or .gz; '-' for stdin); may be repeated")
+    parser.add_argument("--synthetic", type=int, metavar="COUNT", help="encode COUNT synthetic records instead")
+    parser.add_argument("--types", default="prepare",
+                        help=f"with --synthetic, comma-separated packet types to cycle through (default: prepare)")
+    parser.add_argument("--seed", type=int, help="with --synthetic, seed for reproducible records")
+    parser.add_argument("-o", "--output", metavar="FILE", help="write base64 packets here, gzipped if it ends in .gz (default: stdout)")
+    parser.add_argument("--wrap-json", action="store_true", help='write {"ilpPacket": "..."} lines instead of bare base64')
+    args = parser.parse_args()
+    if not args.record and not args.input and args.synthetic is None:
+        parser.print_usage()
+        sys.exit(1)
+    if args.synthetic is not None and args.synthetic < 0:
+        parser.error("--synthetic cannot be negative")
+    try:
+        args.types = [PACKET_TYPES[name.strip().lower()] for name in args.types.split(",") if name.strip()]
+    except KeyError as e:
+        parser.error(f"unknown packet type {e}; expected {', '.join(PACKET_TYPES)}")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.record and not args.input and args.synthetic is None:
+        try:
+            print(PacketEncoder().encode_base64(json.loads(args.record)))
+        except ValueError as e:
+            sys.exit(f"Error: {e}")
+        sys.exit(0)
+
+    records = synthetic_records(args.synthetic, args.types, args.seed) if args.synthetic is not None else read_records(args.input)
+    output = open_output(args.output)
+    try:
+        encoded, failed = encode_stream(records, output, args.wrap_json)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f"Encoded {encoded} packets, {failed} failed.", file=sys.stderr)
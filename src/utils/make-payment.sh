@@ -16,8 +16,8 @@ MIFOS_AUTH="mifos:password"
 function usage() {
 cat <<EOF
 Usage: $0 [-p <payer_msisdn>] [-r <payee_msisdn>] [-t <tenant_id>] [-d <payee_dfsp_id>] [-v]
- -p Payer MSISDN (default: 0413356886) [optional]
- -r Payee MSISDN (default: 0495822412) [optional]
+ -p Payer MSISDN (default: 0468831414) [optional]
+ -r Payee MSISDN (default: 0485689135) [optional]
  -t Platform-TenantId (default: greenbank) [optional]
  -d X-PayeeDFSP-ID (default: bluebank) [optional]
  -v Enable debug/verbose mode [optional]
@@ -99,8 +99,8 @@ function lookup_client_name() {
 }
 
 # Defaults
-payer_msisdn="0413356886"
-payee_msisdn="0495822412"
+payer_msisdn="0468831414"
+payee_msisdn="0485689135"
 tenant_id="greenbank"
 payee_dfsp_id="bluebank"
 debug=false
@@ -0,0 +1,175 @@
+# per-stage profiling behind the --profile option of data-loading/generate-mifos-vnext-data.py and
+# decode-ilp-packet.py: for each stage of a run it records wall time against CPU time, which shows
+# whether the time went to our own Python code or to waiting for servers and disks, and samples the
+# stacks of all threads into a collapsed-stack file for flamegraph.pl, speedscope or inferno; on
+# request it also records the tracemalloc peak and dumps cProfile stats per stage (both slow the
+# run down several times, so the timings of such a run are only good for comparing stages)
+#
+# usage (through the tools):
+#   generate-mifos-vnext-data.py --clients-per-tenant 1000 --workers 16 --profile /tmp/seed
+#   decode-ilp-packet.py -i day.jsonl.gz -o /dev/null --profile /tmp/decode --cprofile --profile-memory
+#   flamegraph.pl /tmp/seed.folded > seed.svg
+#   python -m pstats /tmp/decode.decode.pstats
+#
+# writes PREFIX.stages.json, PREFIX.folded and, with --cprofile, PREFIX.<stage>.pstats; the tools load
+# this file with importlib only when --profile is given, so normal runs do not pay for any of it
+import cProfile
+import collections
+import contextlib
+import json
+import os
+import re
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+
+SAMPLE_INTERVAL = 0.01 # Wall clock seconds between stack samples of all threads
+THREAD_NUMBER = re.compile(r"[-_]\d+(_\d+)?$") # "ThreadPoolExecutor-0_3" -> "ThreadPoolExecutor"
+
+
+def _cpu_seconds():
+    """User + system CPU time of this process and of its finished children (e.g. a --jobs pool)."""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def _idle(stack):
+    """True for a pool worker thread waiting for its next task, which says nothing about the run."""
+    for (name, filename, _), following in zip(stack, stack[1:]):
+        if name == "_worker" and filename.endswith(os.path.join("concurrent", "futures", "thread.py")):
+            return following[0] == "get"
+    return False
+
+
+def _slug(name):
+    return re.sub(r"[^A-Za-z0-9]+", "-", name).strip("-").lower()
+
+
+class StageProfiler:
+    """
+    Times the stages of a run, entered one after another with `with profiler.stage(name):`
+    (a stage entered inside another counts towards the outer one).
+
+    Per stage it records wall and CPU seconds, the CPU share of the wall time and, when
+    trace_memory is set, the tracemalloc peak. While a stage runs the stacks of all threads are
+    sampled every sample_interval seconds and counted by "stage;thread;frame;...;frame", the
+    collapsed-stack format of flamegraph.pl. With use_cprofile each stage is also run under
+    cProfile, which before Python 3.12 only sees the thread that entered the stage; the sampled
+    stacks cover worker threads as well.
+
+    Samples are taken by a SIGALRM handler, so the main thread is caught wherever it is. A
+    sampler thread would only get the GIL when the main thread gives it up, mostly for I/O, and
+    the stacks would all point there. Where there is no setitimer, or the profiler is not created
+    on the main thread, a sampler thread is used anyway.
+    """
+
+    def __init__(self, prefix, use_cprofile=False, trace_memory=False, sample_interval=SAMPLE_INTERVAL):
+        self.prefix = prefix
+        self.use_cprofile = use_cprofile
+        self.trace_memory = trace_memory
+        self.sample_interval = sample_interval
+        self.stages = []
+        self.stacks = collections.Counter()
+        self._current = None
+        self._stopped = threading.Event()
+        self._sampler = None
+        self._previous_handler = None
+        if trace_memory:
+            tracemalloc.start()
+        if hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread():
+            self._previous_handler = signal.signal(signal.SIGALRM, self._on_alarm)
+            signal.setitimer(signal.ITIMER_REAL, sample_interval, sample_interval)
+        else:
+            self._sampler = threading.Thread(target=self._sample, name="stage-profiler", daemon=True)
+            self._sampler.start()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        if self._current is not None:
+            yield
+            return
+        repeats = sum(1 for stage in self.stages if stage["stage"] == name)
+        profile = cProfile.Profile() if self.use_cprofile else None
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        cpu_started = _cpu_seconds()
+        started = time.perf_counter()
+        self._current = name
+        if profile is not None:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            self._current = None
+            wall = time.perf_counter() - started
+            cpu = _cpu_seconds() - cpu_started
+            stage = {"stage": name, "wall_seconds": round(wall, 4), "cpu_seconds": round(cpu, 4),
+                     "cpu_share": round(cpu / wall, 3) if wall > 0 else 0.0}
+            if self.trace_memory:
+                stage["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+            if profile is not None:
+                stage["pstats"] = f"{self.prefix}.{_slug(name)}{f'-{repeats + 1}' if repeats else ''}.pstats"
+                profile.dump_stats(stage["pstats"])
+            self.stages.append(stage)
+
+    def _on_alarm(self, signum, frame):
+        self._record(threading.get_ident(), frame)
+
+    def _sample(self):
+        while not self._stopped.wait(self.sample_interval):
+            self._record(threading.get_ident(), None)
+
+    def _record(self, own, own_frame):
+        """Counts the current stack of every thread; own_frame stands for the calling thread's, None to skip it."""
+        stage = self._current
+        if stage is None:
+            return
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        frames = sys._current_frames()
+        if own_frame is not None:
+            frames[own] = own_frame
+        else:
+            frames.pop(own, None)
+        for ident, frame in frames.items():
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            stack.reverse()
+            if _idle(stack):
+                continue
+            frame_names = [f"{name} ({os.path.basename(filename)}:{line})" for name, filename, line in stack]
+            self.stacks[";".join([stage, THREAD_NUMBER.sub("", names.get(ident, "thread"))] + frame_names)] += 1
+
+    def summary_table(self):
+        """The stages as a text table: wall and CPU seconds, CPU share and peak traced memory."""
+        lines = [f"{'Stage':<22} {'wall s':>9} {'CPU s':>9} {'CPU %':>6} {'peak MB':>8}"]
+        for stage in self.stages:
+            peak = f"{stage['peak_memory_bytes'] / 1e6:.1f}" if "peak_memory_bytes" in stage else "-"
+            lines.append(f"{stage['stage']:<22} {stage['wall_seconds']:>9.3f} {stage['cpu_seconds']:>9.3f} "
+                         f"{stage['cpu_share'] * 100:>6.0f} {peak:>8}")
+        return "\n".join(lines)
+
+    def close(self):
+        """Stops sampling and writes PREFIX.stages.json and PREFIX.folded. Returns their paths."""
+        if self._sampler is not None:
+            self._stopped.set()
+            self._sampler.join()
+        else:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, self._previous_handler)
+        if self.trace_memory:
+            tracemalloc.stop()
+        stages_path, folded_path = f"{self.prefix}.stages.json", f"{self.prefix}.folded"
+        with open(stages_path, "w", encoding="utf-8") as stages_file:
+            json.dump({"sample_interval": self.sample_interval, "samples": sum(self.stacks.values()),
+                       "stages": self.stages}, stages_file, indent=2)
+        with open(folded_path, "w", encoding="utf-8") as folded_file:
+            for stack, count in sorted(self.stacks.items()):
+                folded_file.write(f"{stack} {count}\n")
+        return stages_path, folded_path